@@ -5,7 +5,7 @@ from alembic import context
 
 # Import your models' Base
 from app.db.base import Base
-from app.db.models import User, RecoveryLog, WearableData, Workout, WorkoutSession, ExercisePerformance
+from app.db.models import User, RecoveryLog, RecoveryDailyRollup, WearableData, WearableDailyFused, WearableRRSeries, WearableRawPayload, WearableRollup, UserBaseline, UserWorkload, RefreshTokenFamily, ImportJob, Workout, WorkoutSession, ExercisePerformance, PersonalRecord
 from app.core.config import settings
 
 # this is the Alembic Config object
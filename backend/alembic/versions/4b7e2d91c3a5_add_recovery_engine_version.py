@@ -0,0 +1,24 @@
+"""Add engine_version to recovery_logs
+
+Revision ID: 4b7e2d91c3a5
+Revises: 12c2c695b06b
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2d91c3a5'
+down_revision = '12c2c695b06b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('recovery_logs', sa.Column('engine_version', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('recovery_logs', 'engine_version')
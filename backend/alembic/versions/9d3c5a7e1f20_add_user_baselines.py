@@ -0,0 +1,35 @@
+"""Add user_baselines
+
+Revision ID: 9d3c5a7e1f20
+Revises: 4b7e2d91c3a5
+Create Date: 2026-10-18 10:03:11.427815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3c5a7e1f20'
+down_revision = '4b7e2d91c3a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_baselines',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('hrv_count', sa.Integer(), nullable=False),
+    sa.Column('hrv_mean', sa.Float(), nullable=True),
+    sa.Column('hrv_variance', sa.Float(), nullable=True),
+    sa.Column('rhr_count', sa.Integer(), nullable=False),
+    sa.Column('rhr_mean', sa.Float(), nullable=True),
+    sa.Column('rhr_variance', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_baselines')
@@ -0,0 +1,45 @@
+"""Add import_jobs
+
+Revision ID: a3e61c0d9b54
+Revises: f2c7d8e91a36
+Create Date: 2026-10-18 14:22:47.901356
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e61c0d9b54'
+down_revision = 'f2c7d8e91a36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('import_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('format', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('bytes_total', sa.BigInteger(), nullable=True),
+    sa.Column('bytes_processed', sa.BigInteger(), nullable=False),
+    sa.Column('records_parsed', sa.Integer(), nullable=False),
+    sa.Column('records_rejected', sa.Integer(), nullable=False),
+    sa.Column('rows_written', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_jobs_id'), 'import_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_import_jobs_user_id'), 'import_jobs', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_import_jobs_user_id'), table_name='import_jobs')
+    op.drop_index(op.f('ix_import_jobs_id'), table_name='import_jobs')
+    op.drop_table('import_jobs')
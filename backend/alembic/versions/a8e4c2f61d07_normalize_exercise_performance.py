@@ -0,0 +1,48 @@
+"""Index exercise_performance for per-exercise history
+
+Revision ID: a8e4c2f61d07
+Revises: f1d6a2c8e395
+Create Date: 2026-10-18 20:47:19.205813
+
+Adds performed_at (the session date) and the per-user history index, and
+widens rpe to a float. Rows for existing sessions are written by
+`python -m app.jobs.backfill_exercise_performance`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e4c2f61d07'
+down_revision = 'f1d6a2c8e395'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('exercise_performance', sa.Column('performed_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("""
+        UPDATE exercise_performance
+        SET performed_at = coalesce(workout_sessions.session_date, exercise_performance.created_at, now())
+        FROM workout_sessions
+        WHERE workout_sessions.id = exercise_performance.session_id
+    """)
+    op.alter_column('exercise_performance', 'performed_at', nullable=False)
+    op.alter_column('exercise_performance', 'rpe', type_=sa.Float(), existing_nullable=True)
+    op.create_index(
+        'ix_exercise_performance_user_id_exercise_name_performed_at',
+        'exercise_performance',
+        ['user_id', 'exercise_name', 'performed_at', 'id'],
+        unique=False
+    )
+    op.create_index(op.f('ix_exercise_performance_session_id'), 'exercise_performance', ['session_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_exercise_performance_session_id'), table_name='exercise_performance')
+    op.drop_index('ix_exercise_performance_user_id_exercise_name_performed_at', table_name='exercise_performance')
+    op.alter_column(
+        'exercise_performance', 'rpe',
+        type_=sa.Integer(), existing_nullable=True, postgresql_using='round(rpe)::integer'
+    )
+    op.drop_column('exercise_performance', 'performed_at')
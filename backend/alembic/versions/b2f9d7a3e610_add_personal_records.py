@@ -0,0 +1,37 @@
+"""Add personal_records
+
+Revision ID: b2f9d7a3e610
+Revises: a8e4c2f61d07
+Create Date: 2026-10-18 21:20:05.774109
+
+Filled from exercise_performance by `python -m app.jobs.rebuild_personal_records`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f9d7a3e610'
+down_revision = 'a8e4c2f61d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('personal_records',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_name', sa.String(), nullable=False),
+    sa.Column('best_weight_kg', sa.Float(), nullable=True),
+    sa.Column('best_weight_reps', sa.Integer(), nullable=True),
+    sa.Column('best_weight_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('best_estimated_1rm', sa.Float(), nullable=True),
+    sa.Column('best_estimated_1rm_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('rep_maxes', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'exercise_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('personal_records')
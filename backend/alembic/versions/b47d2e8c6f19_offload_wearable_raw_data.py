@@ -0,0 +1,94 @@
+"""Move wearable raw_data into compressed wearable_raw_payloads
+
+Revision ID: b47d2e8c6f19
+Revises: a3e61c0d9b54
+Create Date: 2026-10-18 15:40:02.118734
+
+"""
+import hashlib
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47d2e8c6f19'
+down_revision = 'a3e61c0d9b54'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _encode(payload):
+    # Same encoding as app.services.raw_payloads.encode_payload
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(canonical).hexdigest(), len(canonical), zlib.compress(canonical, 6)
+
+
+def upgrade() -> None:
+    op.create_table('wearable_raw_payloads',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('encoding', sa.String(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('last_referenced_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    op.add_column('wearable_data', sa.Column('raw_data_digest', sa.String(length=64), nullable=True))
+
+    # Copy existing payloads in id order, one batch per round trip
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(sa.text(
+            "SELECT id, raw_data FROM wearable_data "
+            "WHERE id > :last_id AND raw_data IS NOT NULL "
+            "ORDER BY id LIMIT :batch"
+        ), {"last_id": last_id, "batch": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        payloads = {}
+        updates = []
+        for row_id, raw_data in rows:
+            if not raw_data:
+                continue
+            digest, size, data = _encode(raw_data)
+            payloads[digest] = {"digest": digest, "size": size, "data": data}
+            updates.append({"id": row_id, "digest": digest})
+
+        if payloads:
+            conn.execute(sa.text(
+                "INSERT INTO wearable_raw_payloads (digest, encoding, size_bytes, data) "
+                "VALUES (:digest, 'zlib', :size, :data) ON CONFLICT (digest) DO NOTHING"
+            ), list(payloads.values()))
+            conn.execute(sa.text(
+                "UPDATE wearable_data SET raw_data_digest = :digest WHERE id = :id"
+            ), updates)
+
+    op.create_foreign_key(
+        'fk_wearable_data_raw_data_digest', 'wearable_data', 'wearable_raw_payloads',
+        ['raw_data_digest'], ['digest']
+    )
+    op.create_index(op.f('ix_wearable_data_raw_data_digest'), 'wearable_data', ['raw_data_digest'], unique=False)
+    op.drop_column('wearable_data', 'raw_data')
+
+
+def downgrade() -> None:
+    op.add_column('wearable_data', sa.Column('raw_data', sa.JSON(), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT digest, data FROM wearable_raw_payloads"))
+    for digest, data in rows.fetchall():
+        conn.execute(sa.text(
+            "UPDATE wearable_data SET raw_data = CAST(:raw_data AS json) WHERE raw_data_digest = :digest"
+        ), {"raw_data": zlib.decompress(data).decode("utf-8"), "digest": digest})
+
+    op.drop_index(op.f('ix_wearable_data_raw_data_digest'), table_name='wearable_data')
+    op.drop_constraint('fk_wearable_data_raw_data_digest', 'wearable_data', type_='foreignkey')
+    op.drop_column('wearable_data', 'raw_data_digest')
+    op.drop_table('wearable_raw_payloads')
@@ -0,0 +1,63 @@
+"""Add combined-source wearable rollups
+
+Revision ID: b6d1f4e8a273
+Revises: e3f9a1c7b402
+Create Date: 2026-10-19 11:07:53.218604
+
+Combined history used to add up the rows of every source, counting a walk
+logged by both phone and watch twice. Rows under source '*' now hold the
+combined figures, with steps and active calories taken from the largest
+source total per day.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d1f4e8a273'
+down_revision = 'e3f9a1c7b402'
+branch_labels = None
+depends_on = None
+
+COLUMNS = """
+    user_id, resolution, source, period_start, reading_count,
+    hrv_count, hrv_sum, hrv_min, hrv_max,
+    rhr_count, rhr_sum, rhr_min, rhr_max,
+    sleep_count, sleep_sum, sleep_min, sleep_max,
+    steps_sum, active_calories_sum
+"""
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        INSERT INTO wearable_rollups ({COLUMNS})
+        SELECT
+            user_id, 'day', '*', period_start,
+            sum(reading_count),
+            sum(hrv_count), sum(hrv_sum), min(hrv_min), max(hrv_max),
+            sum(rhr_count), sum(rhr_sum), min(rhr_min), max(rhr_max),
+            sum(sleep_count), sum(sleep_sum), min(sleep_min), max(sleep_max),
+            max(steps_sum), max(active_calories_sum)
+        FROM wearable_rollups
+        WHERE resolution = 'day'
+        GROUP BY user_id, period_start
+    """)
+    for resolution in ('week', 'month'):
+        op.execute(f"""
+            INSERT INTO wearable_rollups ({COLUMNS})
+            SELECT
+                user_id, '{resolution}', '*',
+                date_trunc('{resolution}', period_start::timestamp)::date,
+                sum(reading_count),
+                sum(hrv_count), sum(hrv_sum), min(hrv_min), max(hrv_max),
+                sum(rhr_count), sum(rhr_sum), min(rhr_min), max(rhr_max),
+                sum(sleep_count), sum(sleep_sum), min(sleep_min), max(sleep_max),
+                sum(steps_sum), sum(active_calories_sum)
+            FROM wearable_rollups
+            WHERE resolution = 'day' AND source = '*'
+            GROUP BY user_id, date_trunc('{resolution}', period_start::timestamp)::date
+        """)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM wearable_rollups WHERE source = '*'")
@@ -0,0 +1,55 @@
+"""Add per-metric measurement times to wearable_daily_fused
+
+Revision ID: c2e8b5a19f64
+Revises: b6d1f4e8a273
+Create Date: 2026-10-19 12:24:36.905117
+
+The check-in filtered a fused day on its latest reading, so a metric
+measured before the 24h window still counted whenever anything else was
+synced later that day. Each metric group now records when its chosen
+reading was taken.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e8b5a19f64'
+down_revision = 'b6d1f4e8a273'
+branch_labels = None
+depends_on = None
+
+# Group -> condition on wearable_data for a reading of that group
+GROUPS = {
+    'hrv': "hrv_rmssd IS NOT NULL OR hrv_sdnn IS NOT NULL",
+    'heart_rate': "resting_heart_rate IS NOT NULL OR avg_heart_rate IS NOT NULL",
+    'sleep': "sleep_duration_minutes IS NOT NULL",
+    'activity': "steps IS NOT NULL OR active_calories IS NOT NULL",
+}
+
+
+def upgrade() -> None:
+    for group in GROUPS:
+        op.add_column('wearable_daily_fused', sa.Column(f'{group}_measured_at', sa.DateTime(timezone=True), nullable=True))
+
+    # The chosen reading is the chosen source's newest of the group that day
+    for group, condition in GROUPS.items():
+        op.execute(f"""
+            UPDATE wearable_daily_fused AS fused
+            SET {group}_measured_at = (
+                SELECT max(measurement_date)
+                FROM wearable_data
+                WHERE wearable_data.user_id = fused.user_id
+                  AND wearable_data.source = fused.{group}_source
+                  AND measurement_date >= fused.day::timestamp AT TIME ZONE 'UTC'
+                  AND measurement_date < (fused.day + 1)::timestamp AT TIME ZONE 'UTC'
+                  AND ({condition})
+            )
+            WHERE fused.{group}_source IS NOT NULL
+        """)
+
+
+def downgrade() -> None:
+    for group in reversed(list(GROUPS)):
+        op.drop_column('wearable_daily_fused', f'{group}_measured_at')
@@ -0,0 +1,36 @@
+"""Add user_workloads
+
+Revision ID: c4a7e9b15f32
+Revises: b2f9d7a3e610
+Create Date: 2026-10-18 21:58:42.190337
+
+Filled from workout history by `python -m app.jobs.rebuild_workloads`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e9b15f32'
+down_revision = 'b2f9d7a3e610'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_workloads',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('acute_load', sa.Float(), nullable=False),
+    sa.Column('chronic_load', sa.Float(), nullable=False),
+    sa.Column('daily_loads', sa.JSON(), nullable=False),
+    sa.Column('last_load_date', sa.Date(), nullable=True),
+    sa.Column('first_load_date', sa.Date(), nullable=True),
+    sa.Column('session_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_workloads')
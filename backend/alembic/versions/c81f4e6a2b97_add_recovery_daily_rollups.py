@@ -0,0 +1,57 @@
+"""Add recovery_daily_rollups
+
+Revision ID: c81f4e6a2b97
+Revises: 9d3c5a7e1f20
+Create Date: 2026-10-18 11:20:54.602381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f4e6a2b97'
+down_revision = '9d3c5a7e1f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('recovery_daily_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('log_count', sa.Integer(), nullable=False),
+    sa.Column('score_count', sa.Integer(), nullable=False),
+    sa.Column('score_sum', sa.Float(), nullable=False),
+    sa.Column('score_min', sa.Float(), nullable=True),
+    sa.Column('score_max', sa.Float(), nullable=True),
+    sa.Column('last_logged_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_recommendation', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    
+    # Seed from existing logs
+    op.execute("""
+        INSERT INTO recovery_daily_rollups (
+            user_id, day, log_count, score_count, score_sum,
+            score_min, score_max, last_logged_at, last_recommendation
+        )
+        SELECT
+            user_id,
+            (date AT TIME ZONE 'UTC')::date,
+            count(*),
+            count(recovery_score),
+            coalesce(sum(recovery_score), 0),
+            min(recovery_score),
+            max(recovery_score),
+            max(date),
+            (array_agg(recommended_intensity ORDER BY date DESC))[1]
+        FROM recovery_logs
+        WHERE date IS NOT NULL
+        GROUP BY user_id, (date AT TIME ZONE 'UTC')::date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('recovery_daily_rollups')
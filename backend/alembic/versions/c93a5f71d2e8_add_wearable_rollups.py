@@ -0,0 +1,89 @@
+"""Add wearable_rollups
+
+Revision ID: c93a5f71d2e8
+Revises: b47d2e8c6f19
+Create Date: 2026-10-18 16:58:31.552907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c93a5f71d2e8'
+down_revision = 'b47d2e8c6f19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('wearable_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('resolution', sa.String(), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('reading_count', sa.Integer(), nullable=False),
+    sa.Column('hrv_count', sa.Integer(), nullable=False),
+    sa.Column('hrv_sum', sa.Float(), nullable=False),
+    sa.Column('hrv_min', sa.Float(), nullable=True),
+    sa.Column('hrv_max', sa.Float(), nullable=True),
+    sa.Column('rhr_count', sa.Integer(), nullable=False),
+    sa.Column('rhr_sum', sa.Float(), nullable=False),
+    sa.Column('rhr_min', sa.Integer(), nullable=True),
+    sa.Column('rhr_max', sa.Integer(), nullable=True),
+    sa.Column('sleep_count', sa.Integer(), nullable=False),
+    sa.Column('sleep_sum', sa.Float(), nullable=False),
+    sa.Column('sleep_min', sa.Integer(), nullable=True),
+    sa.Column('sleep_max', sa.Integer(), nullable=True),
+    sa.Column('steps_sum', sa.BigInteger(), nullable=True),
+    sa.Column('active_calories_sum', sa.BigInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'resolution', 'period_start', 'source')
+    )
+    
+    # Seed from existing readings: days first, then weeks/months from days
+    op.execute("""
+        INSERT INTO wearable_rollups (
+            user_id, resolution, source, period_start, reading_count,
+            hrv_count, hrv_sum, hrv_min, hrv_max,
+            rhr_count, rhr_sum, rhr_min, rhr_max,
+            sleep_count, sleep_sum, sleep_min, sleep_max,
+            steps_sum, active_calories_sum
+        )
+        SELECT
+            user_id, 'day', source, (measurement_date AT TIME ZONE 'UTC')::date,
+            count(*),
+            count(hrv_rmssd), coalesce(sum(hrv_rmssd), 0), min(hrv_rmssd), max(hrv_rmssd),
+            count(resting_heart_rate), coalesce(sum(resting_heart_rate), 0),
+            min(resting_heart_rate), max(resting_heart_rate),
+            count(sleep_duration_minutes), coalesce(sum(sleep_duration_minutes), 0),
+            min(sleep_duration_minutes), max(sleep_duration_minutes),
+            sum(steps), sum(active_calories)
+        FROM wearable_data
+        GROUP BY user_id, source, (measurement_date AT TIME ZONE 'UTC')::date
+    """)
+    for resolution in ('week', 'month'):
+        op.execute(f"""
+            INSERT INTO wearable_rollups (
+                user_id, resolution, source, period_start, reading_count,
+                hrv_count, hrv_sum, hrv_min, hrv_max,
+                rhr_count, rhr_sum, rhr_min, rhr_max,
+                sleep_count, sleep_sum, sleep_min, sleep_max,
+                steps_sum, active_calories_sum
+            )
+            SELECT
+                user_id, '{resolution}', source,
+                date_trunc('{resolution}', period_start::timestamp)::date,
+                sum(reading_count),
+                sum(hrv_count), sum(hrv_sum), min(hrv_min), max(hrv_max),
+                sum(rhr_count), sum(rhr_sum), min(rhr_min), max(rhr_max),
+                sum(sleep_count), sum(sleep_sum), min(sleep_min), max(sleep_max),
+                sum(steps_sum), sum(active_calories_sum)
+            FROM wearable_rollups
+            WHERE resolution = 'day'
+            GROUP BY user_id, source, date_trunc('{resolution}', period_start::timestamp)::date
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table('wearable_rollups')
@@ -0,0 +1,42 @@
+"""Add wearable_rr_series
+
+Revision ID: d5b8e2a4c713
+Revises: c93a5f71d2e8
+Create Date: 2026-10-18 18:12:40.337195
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b8e2a4c713'
+down_revision = 'c93a5f71d2e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('wearable_rr_series',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('wearable_data_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('encoding', sa.String(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('beat_count', sa.Integer(), nullable=False),
+    sa.Column('artifact_count', sa.Integer(), nullable=False),
+    sa.Column('pnn50', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['wearable_data_id'], ['wearable_data.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('wearable_data_id')
+    )
+    op.create_index(op.f('ix_wearable_rr_series_id'), 'wearable_rr_series', ['id'], unique=False)
+    op.create_index(op.f('ix_wearable_rr_series_user_id'), 'wearable_rr_series', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_wearable_rr_series_user_id'), table_name='wearable_rr_series')
+    op.drop_index(op.f('ix_wearable_rr_series_id'), table_name='wearable_rr_series')
+    op.drop_table('wearable_rr_series')
@@ -0,0 +1,36 @@
+"""Add refresh_token_families
+
+Revision ID: d8b3f6a0c251
+Revises: c4a7e9b15f32
+Create Date: 2026-10-18 23:14:05.512864
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b3f6a0c251'
+down_revision = 'c4a7e9b15f32'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('refresh_token_families',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('current_jti', sa.String(length=32), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_refresh_token_families_user_id'), 'refresh_token_families', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_refresh_token_families_user_id'), table_name='refresh_token_families')
+    op.drop_table('refresh_token_families')
@@ -0,0 +1,24 @@
+"""Add heartbeat_at to import_jobs
+
+Revision ID: e3f9a1c7b402
+Revises: d8b3f6a0c251
+Create Date: 2026-10-19 09:41:12.403518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f9a1c7b402'
+down_revision = 'd8b3f6a0c251'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('import_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('import_jobs', 'heartbeat_at')
@@ -0,0 +1,47 @@
+"""Add per-user composite indexes for hot queries
+
+Revision ID: e5a09b3d4c12
+Revises: c81f4e6a2b97
+Create Date: 2026-10-18 12:41:07.390522
+
+Every hot query filters on user_id and orders by a timestamp. Postgres
+walks a btree in either direction, so (user_id, ts, id) also serves the
+"ORDER BY ts DESC, id DESC" history/latest queries. Built CONCURRENTLY so
+the tables stay writable while the indexes build.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a09b3d4c12'
+down_revision = 'c81f4e6a2b97'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_recovery_logs_user_id_date', 'recovery_logs', ['user_id', 'date', 'id']),
+    ('ix_wearable_data_user_id_measurement_date', 'wearable_data', ['user_id', 'measurement_date', 'id']),
+    ('ix_wearable_data_user_id_source_measurement_date', 'wearable_data', ['user_id', 'source', 'measurement_date']),
+    ('ix_workouts_user_id_created_at', 'workouts', ['user_id', 'created_at']),
+    ('ix_workout_sessions_user_id_session_date', 'workout_sessions', ['user_id', 'session_date']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,140 @@
+"""Partition wearable_data and recovery_logs by month
+
+Revision ID: e7c1a9d4b286
+Revises: d5b8e2a4c713
+Create Date: 2026-10-18 19:31:08.640152
+
+Rebuilds both tables as RANGE-partitioned parents with one partition per
+UTC month (existing data through three months ahead) plus a default
+partition, copies the rows across and recreates keys and indexes on the
+parent. Later months are created by app.services.partitions. The copy takes
+an exclusive lock on each table for its duration.
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c1a9d4b286'
+down_revision = 'd5b8e2a4c713'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition(table, column):
+    """Swap `table` for a partitioned copy holding the same rows"""
+    conn = op.get_bind()
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"""
+        CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE ({column})
+    """)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    now = datetime.now(timezone.utc)
+    first = conn.execute(sa.text(
+        f"SELECT min({column} AT TIME ZONE 'UTC') FROM {table}_unpartitioned"
+    )).scalar() or now
+    month = date(first.year, first.month, 1)
+    last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_y{month.year:04d}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_unpartitioned")
+    op.execute(f"DROP TABLE {table}_unpartitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def _unpartition(table):
+    """Swap a partitioned `table` back for a plain table with the same rows"""
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+    op.execute(f"DROP TABLE {table}_partitioned")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def upgrade() -> None:
+    # A foreign key to a partitioned table must cover the partition key
+    op.drop_constraint('wearable_rr_series_wearable_data_id_fkey', 'wearable_rr_series', type_='foreignkey')
+
+    _partition('wearable_data', 'measurement_date')
+    op.create_primary_key('wearable_data_pkey', 'wearable_data', ['id', 'measurement_date'])
+    op.create_unique_constraint(
+        'uq_wearable_data_user_id_source_measurement_date',
+        'wearable_data',
+        ['user_id', 'source', 'measurement_date']
+    )
+    op.create_index(op.f('ix_wearable_data_id'), 'wearable_data', ['id'], unique=False)
+    op.create_index(
+        'ix_wearable_data_user_id_measurement_date',
+        'wearable_data',
+        ['user_id', 'measurement_date', 'id'],
+        unique=False
+    )
+    op.create_index(op.f('ix_wearable_data_raw_data_digest'), 'wearable_data', ['raw_data_digest'], unique=False)
+    op.create_foreign_key('wearable_data_user_id_fkey', 'wearable_data', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(
+        'fk_wearable_data_raw_data_digest', 'wearable_data', 'wearable_raw_payloads',
+        ['raw_data_digest'], ['digest']
+    )
+
+    # The partition key must be NOT NULL
+    op.execute("UPDATE recovery_logs SET date = coalesce(created_at, now()) WHERE date IS NULL")
+    op.alter_column('recovery_logs', 'date', nullable=False)
+    _partition('recovery_logs', 'date')
+    op.create_primary_key('recovery_logs_pkey', 'recovery_logs', ['id', 'date'])
+    op.create_index(op.f('ix_recovery_logs_id'), 'recovery_logs', ['id'], unique=False)
+    op.create_index('ix_recovery_logs_user_id_date', 'recovery_logs', ['user_id', 'date', 'id'], unique=False)
+    op.create_foreign_key('recovery_logs_user_id_fkey', 'recovery_logs', 'users', ['user_id'], ['id'])
+
+
+def downgrade() -> None:
+    _unpartition('recovery_logs')
+    op.create_primary_key('recovery_logs_pkey', 'recovery_logs', ['id'])
+    op.create_index(op.f('ix_recovery_logs_id'), 'recovery_logs', ['id'], unique=False)
+    op.create_index('ix_recovery_logs_user_id_date', 'recovery_logs', ['user_id', 'date', 'id'], unique=False)
+    op.create_foreign_key('recovery_logs_user_id_fkey', 'recovery_logs', 'users', ['user_id'], ['id'])
+    op.alter_column('recovery_logs', 'date', nullable=True)
+
+    _unpartition('wearable_data')
+    op.create_primary_key('wearable_data_pkey', 'wearable_data', ['id'])
+    op.create_unique_constraint(
+        'uq_wearable_data_user_id_source_measurement_date',
+        'wearable_data',
+        ['user_id', 'source', 'measurement_date']
+    )
+    op.create_index(op.f('ix_wearable_data_id'), 'wearable_data', ['id'], unique=False)
+    op.create_index(
+        'ix_wearable_data_user_id_measurement_date',
+        'wearable_data',
+        ['user_id', 'measurement_date', 'id'],
+        unique=False
+    )
+    op.create_index(op.f('ix_wearable_data_raw_data_digest'), 'wearable_data', ['raw_data_digest'], unique=False)
+    op.create_foreign_key('wearable_data_user_id_fkey', 'wearable_data', 'users', ['user_id'], ['id'])
+    op.create_foreign_key(
+        'fk_wearable_data_raw_data_digest', 'wearable_data', 'wearable_raw_payloads',
+        ['raw_data_digest'], ['digest']
+    )
+    op.execute("DELETE FROM wearable_rr_series WHERE wearable_data_id NOT IN (SELECT id FROM wearable_data)")
+    op.create_foreign_key(
+        'wearable_rr_series_wearable_data_id_fkey', 'wearable_rr_series', 'wearable_data',
+        ['wearable_data_id'], ['id'], ondelete='CASCADE'
+    )
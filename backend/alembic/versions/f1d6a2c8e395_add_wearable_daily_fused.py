@@ -0,0 +1,120 @@
+"""Add wearable_daily_fused
+
+Revision ID: f1d6a2c8e395
+Revises: e7c1a9d4b286
+Create Date: 2026-10-18 20:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1d6a2c8e395'
+down_revision = 'e7c1a9d4b286'
+branch_labels = None
+depends_on = None
+
+# Source priority at the time of this revision (best first)
+PRIORITY = {
+    'hrv': "ARRAY['polar_h10', 'apple_health', 'google_fit']",
+    'heart_rate': "ARRAY['polar_h10', 'apple_health', 'google_fit']",
+    'sleep': "ARRAY['apple_health', 'google_fit', 'polar_h10']",
+    'activity': "ARRAY['apple_health', 'google_fit', 'polar_h10']",
+}
+
+
+def upgrade() -> None:
+    op.create_table('wearable_daily_fused',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('last_measurement_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('hrv_source', sa.String(), nullable=True),
+    sa.Column('hrv_rmssd', sa.Float(), nullable=True),
+    sa.Column('hrv_sdnn', sa.Float(), nullable=True),
+    sa.Column('heart_rate_source', sa.String(), nullable=True),
+    sa.Column('resting_heart_rate', sa.Integer(), nullable=True),
+    sa.Column('avg_heart_rate', sa.Integer(), nullable=True),
+    sa.Column('sleep_source', sa.String(), nullable=True),
+    sa.Column('sleep_duration_minutes', sa.Integer(), nullable=True),
+    sa.Column('deep_sleep_minutes', sa.Integer(), nullable=True),
+    sa.Column('rem_sleep_minutes', sa.Integer(), nullable=True),
+    sa.Column('activity_source', sa.String(), nullable=True),
+    sa.Column('steps', sa.BigInteger(), nullable=True),
+    sa.Column('active_calories', sa.BigInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+    # Seed from existing readings
+    op.execute(f"""
+        WITH readings AS (
+            SELECT user_id, source, measurement_date,
+                   (measurement_date AT TIME ZONE 'UTC')::date AS day,
+                   hrv_rmssd, hrv_sdnn, resting_heart_rate, avg_heart_rate,
+                   sleep_duration_minutes, deep_sleep_minutes, rem_sleep_minutes,
+                   steps, active_calories
+            FROM wearable_data
+        ),
+        hrv AS (
+            SELECT DISTINCT ON (user_id, day) user_id, day, source, hrv_rmssd, hrv_sdnn
+            FROM readings
+            WHERE hrv_rmssd IS NOT NULL OR hrv_sdnn IS NOT NULL
+            ORDER BY user_id, day, array_position({PRIORITY['hrv']}, source) NULLS LAST,
+                     measurement_date DESC
+        ),
+        heart_rate AS (
+            SELECT DISTINCT ON (user_id, day) user_id, day, source, resting_heart_rate, avg_heart_rate
+            FROM readings
+            WHERE resting_heart_rate IS NOT NULL OR avg_heart_rate IS NOT NULL
+            ORDER BY user_id, day, array_position({PRIORITY['heart_rate']}, source) NULLS LAST,
+                     measurement_date DESC
+        ),
+        sleep AS (
+            SELECT DISTINCT ON (user_id, day) user_id, day, source,
+                   sleep_duration_minutes, deep_sleep_minutes, rem_sleep_minutes
+            FROM readings
+            WHERE sleep_duration_minutes IS NOT NULL
+            ORDER BY user_id, day, array_position({PRIORITY['sleep']}, source) NULLS LAST,
+                     measurement_date DESC
+        ),
+        activity AS (
+            SELECT DISTINCT ON (user_id, day) user_id, day, source, steps, active_calories
+            FROM (
+                SELECT user_id, day, source, sum(steps) AS steps, sum(active_calories) AS active_calories,
+                       max(measurement_date) AS measurement_date
+                FROM readings
+                WHERE steps IS NOT NULL OR active_calories IS NOT NULL
+                GROUP BY user_id, day, source
+            ) per_source
+            ORDER BY user_id, day, array_position({PRIORITY['activity']}, source) NULLS LAST,
+                     measurement_date DESC
+        ),
+        days AS (
+            SELECT user_id, day, max(measurement_date) AS last_measurement_date
+            FROM readings
+            GROUP BY user_id, day
+        )
+        INSERT INTO wearable_daily_fused (
+            user_id, day, last_measurement_date,
+            hrv_source, hrv_rmssd, hrv_sdnn,
+            heart_rate_source, resting_heart_rate, avg_heart_rate,
+            sleep_source, sleep_duration_minutes, deep_sleep_minutes, rem_sleep_minutes,
+            activity_source, steps, active_calories
+        )
+        SELECT
+            days.user_id, days.day, days.last_measurement_date,
+            hrv.source, hrv.hrv_rmssd, hrv.hrv_sdnn,
+            heart_rate.source, heart_rate.resting_heart_rate, heart_rate.avg_heart_rate,
+            sleep.source, sleep.sleep_duration_minutes, sleep.deep_sleep_minutes, sleep.rem_sleep_minutes,
+            activity.source, activity.steps, activity.active_calories
+        FROM days
+        LEFT JOIN hrv ON hrv.user_id = days.user_id AND hrv.day = days.day
+        LEFT JOIN heart_rate ON heart_rate.user_id = days.user_id AND heart_rate.day = days.day
+        LEFT JOIN sleep ON sleep.user_id = days.user_id AND sleep.day = days.day
+        LEFT JOIN activity ON activity.user_id = days.user_id AND activity.day = days.day
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('wearable_daily_fused')
@@ -0,0 +1,82 @@
+"""Make (user_id, source, measurement_date) unique on wearable_data
+
+Revision ID: f2c7d8e91a36
+Revises: e5a09b3d4c12
+Create Date: 2026-10-18 13:30:42.771940
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c7d8e91a36'
+down_revision = 'e5a09b3d4c12'
+branch_labels = None
+depends_on = None
+
+
+# Columns a re-sync merges: its non-null values overwrite, nulls never do
+MERGED_COLUMNS = (
+    'hrv_rmssd',
+    'hrv_sdnn',
+    'resting_heart_rate',
+    'avg_heart_rate',
+    'sleep_duration_minutes',
+    'deep_sleep_minutes',
+    'rem_sleep_minutes',
+    'steps',
+    'active_calories',
+    'raw_data',
+)
+
+
+def upgrade() -> None:
+    # Collapse duplicates left by the old select-then-insert sync into the
+    # newest row, which takes each column's newest non-null value like an
+    # ON CONFLICT merge would have
+    op.execute(f"""
+        UPDATE wearable_data w
+        SET {', '.join(f'{column} = d.{column}' for column in MERGED_COLUMNS)},
+            sync_timestamp = d.sync_timestamp
+        FROM (
+            SELECT max(id) AS id,
+                   {', '.join(
+                       f'(array_agg({column} ORDER BY id DESC) FILTER (WHERE {column} IS NOT NULL))[1] AS {column}'
+                       for column in MERGED_COLUMNS
+                   )},
+                   max(sync_timestamp) AS sync_timestamp
+            FROM wearable_data
+            GROUP BY user_id, source, measurement_date
+            HAVING count(*) > 1
+        ) d
+        WHERE w.id = d.id
+    """)
+    op.execute("""
+        DELETE FROM wearable_data a
+        USING wearable_data b
+        WHERE a.user_id = b.user_id
+          AND a.source = b.source
+          AND a.measurement_date = b.measurement_date
+          AND a.id < b.id
+    """)
+    op.create_unique_constraint(
+        'uq_wearable_data_user_id_source_measurement_date',
+        'wearable_data',
+        ['user_id', 'source', 'measurement_date']
+    )
+    # The unique constraint's index supersedes the plain one
+    op.drop_index('ix_wearable_data_user_id_source_measurement_date', table_name='wearable_data')
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_wearable_data_user_id_source_measurement_date',
+        'wearable_data',
+        ['user_id', 'source', 'measurement_date'],
+        unique=False
+    )
+    op.drop_constraint(
+        'uq_wearable_data_user_id_source_measurement_date',
+        'wearable_data',
+        type_='unique'
+    )
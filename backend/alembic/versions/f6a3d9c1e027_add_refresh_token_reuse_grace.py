@@ -0,0 +1,29 @@
+"""Add the previous jti to refresh_token_families
+
+Revision ID: f6a3d9c1e027
+Revises: c2e8b5a19f64
+Create Date: 2026-10-20 10:41:52.318406
+
+Two tabs refreshing with the same token at once revoked the family. The
+token rotated last is now accepted for a short grace window.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a3d9c1e027'
+down_revision = 'c2e8b5a19f64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('refresh_token_families', sa.Column('previous_jti', sa.String(length=32), nullable=True))
+    op.add_column('refresh_token_families', sa.Column('rotated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('refresh_token_families', 'rotated_at')
+    op.drop_column('refresh_token_families', 'previous_jti')
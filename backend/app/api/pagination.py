@@ -0,0 +1,113 @@
+"""
+Keyset pagination and NDJSON streaming helpers for history endpoints
+
+History is ordered newest first on (timestamp, id). A cursor encodes the
+last row of a page, and the next page starts strictly after it, so each
+page is one index range scan regardless of how deep the client has paged.
+Endpoints that predate pagination return the whole window when the client
+sends neither `limit` nor `cursor` (see page_limit).
+"""
+import base64
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import async_session
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(position: datetime, row_id: int) -> str:
+    raw = f"{position.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(position), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_before(position_column, id_column, cursor: str):
+    """Filter for rows after `cursor` in (position DESC, id DESC) order"""
+    position, row_id = decode_cursor(cursor)
+    return tuple_(position_column, id_column) < tuple_(position, row_id)
+
+
+def page_limit(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """
+    Page size for a history endpoint that predates pagination: the
+    client's limit, DEFAULT_PAGE_SIZE once it pages with a cursor, and
+    None (every row, as before) when it sends neither
+    """
+    if limit is not None:
+        return limit
+    return DEFAULT_PAGE_SIZE if cursor else None
+
+
+async def paginate(
+    db: AsyncSession,
+    statement,
+    position_column,
+    id_column,
+    limit: Optional[int],
+    response
+) -> List:
+    """
+    Fetch one page (newest first) of a select() of one entity and, when
+    more rows exist, set the X-Next-Cursor header on `response`. A limit
+    of None returns every row.
+    """
+    statement = statement.order_by(position_column.desc(), id_column.desc())
+    if limit is None:
+        return (await db.scalars(statement)).all()
+
+    rows = (await db.scalars(statement.limit(limit + 1))).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, position_column.key), getattr(last, id_column.key)
+        )
+
+    return rows
+
+
+def stream_ndjson(
+    model,
+    filters: Sequence,
+    order_by: Sequence,
+    schema: Type[BaseModel]
+) -> StreamingResponse:
+    """
+    Stream matching rows as NDJSON through a server-side cursor.
+
+    Uses its own session: request-scoped sessions from get_async_db are
+    closed before a streaming body is sent.
+    """
+    async def rows() -> AsyncIterator[str]:
+        async with async_session() as db:
+            result = await db.stream_scalars(
+                select(model).where(*filters).order_by(*order_by)
+                .execution_options(yield_per=STREAM_CHUNK_SIZE)
+            )
+            async for partition in result.partitions():
+                yield "\n".join(schema.model_validate(row).model_dump_json() for row in partition) + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
@@ -1,46 +1,76 @@
 """
-Authentication routes: Register, Login, Logout
+Authentication routes: Register, Login, Refresh, Logout
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
 import structlog
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.db.models import User
-from app.schemas.auth import UserRegister, UserLogin, Token, UserResponse
-from app.core.security import (
-    get_password_hash,
-    verify_password,
-    create_access_token,
-    get_current_user
+from app.schemas.auth import UserRegister, UserResponse
+from app.core.security import get_current_admin_user, get_current_user
+from app.services.password_pool import (
+    PasswordPoolSaturated,
+    get_password_pool,
+    hash_password_async,
+    verify_password_async
 )
-from app.core.config import settings
+from app.services.refresh_tokens import (
+    InvalidRefreshToken,
+    issue_token_pair,
+    revoke_refresh_token,
+    rotate_refresh_token
+)
+from app.services.user_cache import cache_metrics
 
 router = APIRouter()
 logger = structlog.get_logger()
 
 
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+    refresh_expires_at: datetime
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if email already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if await db.scalar(select(User.id).where(User.email == user_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Check if username already exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    if await db.scalar(select(User.id).where(User.username == user_data.username)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await hash_password_async(user_data.password)
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password checks in progress, retry later",
+            headers={"Retry-After": "1"}
+        )
+    
     new_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -48,26 +78,35 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     logger.info("User registered", user_id=new_user.id, username=new_user.username)
     
     return new_user
 
 
-@router.post("/login", response_model=Token)
-def login(
+@router.post("/login", response_model=TokenPair)
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login with username/email and password"""
     # Try to find user by username or email
-    user = db.query(User).filter(
+    user = (await db.scalars(select(User).where(
         (User.username == form_data.username) | (User.email == form_data.username)
-    ).first()
+    ).limit(1))).first()
+    
+    try:
+        password_ok = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password checks in progress, retry later",
+            headers={"Retry-After": "1"}
+        )
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not password_ok:
         logger.warning("Failed login attempt", username=form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -81,29 +120,59 @@ def login(
             detail="Account is inactive"
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "username": user.username},
-        expires_delta=access_token_expires
-    )
+    # Access token plus the first refresh token of a new family
+    tokens = await db.run_sync(issue_token_pair, user)
+    await db.commit()
     
     logger.info("User logged in", user_id=user.id, username=user.username)
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer"
-    }
+    return tokens
+
+
+@router.post("/refresh", response_model=TokenPair)
+async def refresh(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Trade a refresh token for a new access/refresh pair (no password, no bcrypt)"""
+    try:
+        tokens = await db.run_sync(rotate_refresh_token, data.refresh_token)
+    except InvalidRefreshToken:
+        # Keep a replay's family revocation
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await db.commit()
+    
+    return tokens
 
 
 @router.post("/logout")
-def logout(current_user: User = Depends(get_current_user)):
-    """Logout endpoint"""
+async def logout(
+    data: Optional[RefreshRequest] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Logout endpoint; revokes the refresh token's family when one is sent"""
+    if data is not None and await db.run_sync(revoke_refresh_token, data.refresh_token, current_user.id):
+        await db.commit()
     logger.info("User logged out", user_id=current_user.id, username=current_user.username)
     return {"message": "Successfully logged out"}
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current authenticated user info"""
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+@router.get("/cache/metrics")
+async def get_auth_cache_metrics(current_user: User = Depends(get_current_admin_user)):
+    """Hit ratios of this worker's token-claims and user-principal caches (admins only)"""
+    return cache_metrics()
+
+
+@router.get("/password-pool/metrics")
+async def get_password_pool_metrics(current_user: User = Depends(get_current_admin_user)):
+    """Load and timings of this worker's bcrypt process pool (admins only)"""
+    return get_password_pool().metrics()
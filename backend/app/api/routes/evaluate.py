@@ -0,0 +1,113 @@
+"""
+Stateless recovery evaluation: score inputs without logging anything
+
+No auth, no database. Used for previews, the admin dashboard and
+integrations that only need a score; /recovery/log remains the way to
+record a check-in.
+"""
+import math
+
+from fastapi import APIRouter, HTTPException, status
+from pydantic import AliasChoices, BaseModel, Field
+from typing import List, Optional
+
+from integration.load_engine import estimate_1rm
+from integration.recovery_engine import calculate_recovery_score, evaluate_recovery_batch
+from integration.recommendation_rules import get_workout_recommendation
+from integration.progression_tracker import estimate_one_rep_max
+from integration.scoring_policy import get_active_policy
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 1000
+
+
+class RecoveryEvaluateInput(BaseModel):
+    # Non-finite numbers are rejected: an inf weight would otherwise reach the response
+    sleep_hours: Optional[float] = Field(None, allow_inf_nan=False)
+    sleep_quality: Optional[float] = Field(None, allow_inf_nan=False)
+    soreness_level: Optional[float] = Field(
+        None, allow_inf_nan=False, validation_alias=AliasChoices("soreness_level", "soreness")
+    )
+    energy_level: Optional[float] = Field(
+        None, allow_inf_nan=False, validation_alias=AliasChoices("energy_level", "energy")
+    )
+    stress_level: Optional[float] = Field(
+        None, allow_inf_nan=False, validation_alias=AliasChoices("stress_level", "stress")
+    )
+    
+    # Optional wearable readings
+    hrv_rmssd: Optional[float] = Field(None, allow_inf_nan=False)
+    resting_heart_rate: Optional[float] = Field(None, allow_inf_nan=False)
+    sleep_duration_minutes: Optional[float] = Field(None, allow_inf_nan=False)
+    
+    # Optional last working set, for today's 1RM estimate
+    last_set_weight: Optional[float] = Field(None, allow_inf_nan=False)
+    last_set_reps: Optional[int] = None
+
+
+class RecoveryEvaluation(BaseModel):
+    recovery_score: float
+    recommendation: str
+    today_estimated_1rm: Optional[float] = None
+    engine_version: str
+
+
+RECOVERY_FIELDS = ("sleep_hours", "sleep_quality", "soreness_level", "energy_level", "stress_level")
+WEARABLE_FIELDS = ("hrv_rmssd", "resting_heart_rate", "sleep_duration_minutes")
+
+
+# async: pure CPU work measured in microseconds, so skip the threadpool hop
+@router.post("/evaluate", response_model=RecoveryEvaluation)
+async def evaluate_recovery(data: RecoveryEvaluateInput):
+    """Score one set of recovery inputs"""
+    policy = get_active_policy()
+    
+    recovery_data = {
+        key: value for key, value in data.model_dump(include=set(RECOVERY_FIELDS)).items()
+        if value is not None
+    }
+    wearable_data = {
+        key: value for key, value in data.model_dump(include=set(WEARABLE_FIELDS)).items()
+        if value is not None
+    }
+    
+    recovery_score = calculate_recovery_score(recovery_data, wearable_data or None, policy=policy)
+    
+    return {
+        "recovery_score": recovery_score,
+        "recommendation": get_workout_recommendation(recovery_score, policy),
+        "today_estimated_1rm": estimate_one_rep_max(data.last_set_weight, data.last_set_reps),
+        "engine_version": policy.version
+    }
+
+
+@router.post("/evaluate/batch", response_model=List[RecoveryEvaluation])
+async def evaluate_recovery_batch_endpoint(data_list: List[RecoveryEvaluateInput]):
+    """Score up to MAX_BATCH_SIZE inputs in one vectorized pass"""
+    if len(data_list) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size is limited to {MAX_BATCH_SIZE} items"
+        )
+    
+    policy = get_active_policy()
+    columns = {
+        name: [getattr(item, name) for item in data_list]
+        for name in RECOVERY_FIELDS + WEARABLE_FIELDS
+    }
+    scores, recommendations = evaluate_recovery_batch(columns, policy)
+    one_rep_maxes = estimate_1rm(
+        [item.last_set_weight for item in data_list],
+        [item.last_set_reps for item in data_list]
+    )
+    
+    return [
+        {
+            "recovery_score": float(score),
+            "recommendation": recommendation,
+            "today_estimated_1rm": None if math.isnan(one_rep_max) else float(one_rep_max),
+            "engine_version": policy.version
+        }
+        for score, recommendation, one_rep_max in zip(scores, recommendations, one_rep_maxes)
+    ]
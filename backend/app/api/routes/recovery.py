@@ -2,30 +2,44 @@
 Recovery endpoints: Log recovery data, get recovery score and recommendations
 NOW USING FENTHON'S PRODUCTION RECOVERY ENGINE!
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 import structlog
 
-from app.db.session import get_db
-from app.db.models import User, RecoveryLog, WearableData
+from app.db.session import get_async_db
+from app.db.models import User, RecoveryLog
 from app.schemas.auth import RecoveryInput, RecoveryResponse
 from app.core.security import get_current_active_user
+from app.core.config import settings
+from app.api.pagination import (
+    MAX_PAGE_SIZE,
+    keyset_before,
+    page_limit,
+    paginate,
+    stream_ndjson
+)
+from app.services.baselines import get_scoring_baseline
+from app.services.recovery_rollups import record_recovery_log, get_recovery_window_stats
+from app.services.wearable_fusion import get_checkin_wearable
+from app.services.workload import get_workload_snapshot
 
 
 from integration.recovery_engine import calculate_recovery_score
 from integration.recommendation_rules import get_workout_recommendation
+from integration.scoring_policy import get_active_policy, policy_status
 
 router = APIRouter()
 logger = structlog.get_logger()
 
 
 @router.post("/log", response_model=RecoveryResponse, status_code=status.HTTP_201_CREATED)
-def log_recovery_data(
+async def log_recovery_data(
     recovery_data: RecoveryInput,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Log daily recovery data
@@ -35,85 +49,120 @@ def log_recovery_data(
     - Soreness level (inverted)
     - Energy level
     - Stress level (inverted)
-    - Optional wearable data (HRV, resting heart rate)
+    - Optional wearable data (HRV, resting heart rate), scored against the
+      user's personal baseline once enough readings exist
     """
-    # Get latest wearable data if available
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    wearable = db.query(WearableData).filter(
-        WearableData.user_id == current_user.id,
-        WearableData.measurement_date >= yesterday
-    ).order_by(WearableData.measurement_date.desc()).first()
-    
-    wearable_dict = None
-    if wearable:
-        wearable_dict = {
-            "hrv_rmssd": wearable.hrv_rmssd,
-            "resting_heart_rate": wearable.resting_heart_rate,
-            "sleep_duration_minutes": wearable.sleep_duration_minutes
-        }
+    # Wearable metrics from the last 24h, fused across sources
+    wearable_dict = await db.run_sync(
+        get_checkin_wearable,
+        current_user.id,
+        datetime.now(timezone.utc) - timedelta(days=1)
+    )
+    
+    # Pin the active scoring policy so score, recommendation and stored
+    # engine_version all come from the same one
+    policy = get_active_policy()
+    
+    # Training load only counts once the chronic window has filled
+    workload = None
+    if settings.WORKLOAD_IN_RECOVERY_SCORE:
+        snapshot = await db.run_sync(get_workload_snapshot, current_user.id, datetime.now(timezone.utc).date())
+        if snapshot["risk"] not in (None, "insufficient_history"):
+            workload = snapshot
+    
+    baseline = await db.run_sync(get_scoring_baseline, current_user.id)
     
     # ✅ Calculate recovery score using Fenthon's production algorithm
     recovery_score = calculate_recovery_score(
         recovery_data.model_dump(),
-        wearable_dict
+        wearable_dict,
+        baseline,
+        policy=policy,
+        workload=workload
     )
     
     # ✅ Get workout recommendation using Fenthon's production rules
-    recommendation = get_workout_recommendation(recovery_score)
+    recommendation = get_workout_recommendation(recovery_score, policy)
     
     # Create recovery log entry
     new_log = RecoveryLog(
         user_id=current_user.id,
+        date=datetime.now(timezone.utc),
         sleep_hours=recovery_data.sleep_hours,
         sleep_quality=recovery_data.sleep_quality,
         soreness_level=recovery_data.soreness_level,
         energy_level=recovery_data.energy_level,
         stress_level=recovery_data.stress_level,
         recovery_score=recovery_score,
-        recommended_intensity=recommendation
+        recommended_intensity=recommendation,
+        engine_version=policy.version
     )
     
     db.add(new_log)
-    db.commit()
-    db.refresh(new_log)
+    await db.run_sync(record_recovery_log, new_log)
+    await db.commit()
+    await db.refresh(new_log)
     
     logger.info(
         "Recovery data logged",
         user_id=current_user.id,
         recovery_score=recovery_score,
         recommendation=recommendation,
-        engine_version="fenthon_production_v1"
+        engine_version=policy.version
     )
     
     return new_log
 
 
 @router.get("/history", response_model=List[RecoveryResponse])
-def get_recovery_history(
+async def get_recovery_history(
+    response: Response,
     days: int = 30,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get recovery history"""
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    """
+    Get recovery history, newest first
     
-    logs = db.query(RecoveryLog).filter(
+    Without `limit` or `cursor` the whole window is returned, as before
+    pagination. Otherwise it is keyset-paginated on (date, id): when more
+    rows exist the X-Next-Cursor header holds the `cursor` for the next
+    page. `stream=true` returns the whole window as NDJSON instead, read
+    through a server-side cursor.
+    """
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+    
+    filters = [
         RecoveryLog.user_id == current_user.id,
         RecoveryLog.date >= cutoff_date
-    ).order_by(RecoveryLog.date.desc()).all()
+    ]
+    if cursor:
+        filters.append(keyset_before(RecoveryLog.date, RecoveryLog.id, cursor))
+    
+    if stream:
+        return stream_ndjson(
+            RecoveryLog,
+            filters,
+            [RecoveryLog.date.desc(), RecoveryLog.id.desc()],
+            RecoveryResponse
+        )
     
-    return logs
+    statement = select(RecoveryLog).where(*filters)
+    return await paginate(db, statement, RecoveryLog.date, RecoveryLog.id, page_limit(limit, cursor), response)
 
 
 @router.get("/latest", response_model=RecoveryResponse)
-def get_latest_recovery(
+async def get_latest_recovery(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get the most recent recovery score"""
-    latest = db.query(RecoveryLog).filter(
+    latest = (await db.scalars(select(RecoveryLog).where(
         RecoveryLog.user_id == current_user.id
-    ).order_by(RecoveryLog.date.desc()).first()
+    ).order_by(RecoveryLog.date.desc()).limit(1))).first()
     
     if not latest:
         raise HTTPException(
@@ -125,34 +174,33 @@ def get_latest_recovery(
 
 
 @router.get("/stats")
-def get_recovery_stats(
+async def get_recovery_stats(
     days: int = 30,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get recovery statistics"""
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    """Get recovery statistics (served from daily rollups)"""
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
     
-    logs = db.query(RecoveryLog).filter(
-        RecoveryLog.user_id == current_user.id,
-        RecoveryLog.date >= cutoff_date,
-        RecoveryLog.recovery_score.isnot(None)
-    ).all()
+    stats = await db.run_sync(get_recovery_window_stats, current_user.id, cutoff_date)
     
-    if not logs:
+    if not stats["count"]:
         return {
             "average_score": None,
             "total_logs": 0,
             "days_requested": days
         }
     
-    scores = [log.recovery_score for log in logs]
-    avg_score = sum(scores) / len(scores)
-    
     return {
-        "average_score": round(avg_score, 1),
-        "highest_score": max(scores),
-        "lowest_score": min(scores),
-        "total_logs": len(logs),
+        "average_score": round(stats["sum"] / stats["count"], 1),
+        "highest_score": stats["max"],
+        "lowest_score": stats["min"],
+        "total_logs": stats["count"],
         "days_requested": days
     }
+
+
+@router.get("/policy")
+async def get_scoring_policy(current_user: User = Depends(get_current_active_user)):
+    """Version of the scoring policy this worker is using"""
+    return policy_status()
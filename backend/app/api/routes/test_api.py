@@ -69,3 +69,19 @@ def test_weekly_insights():
     assert data["user_id"] == 12
     assert len(data["insights"]) == 7
     assert "average_recovery" in data
+
+
+def test_evaluate_recovery_batch_matches_single():
+    items = [
+        {"sleep_hours": 7.0, "soreness": 3.0, "energy": 8.0, "last_set_weight": 225.0, "last_set_reps": 5},
+        {"sleep_quality": 2, "stress": 9, "hrv_rmssd": 15, "resting_heart_rate": 82},
+        {"sleep_hours": 9.0, "sleep_duration_minutes": 540, "hrv_rmssd": 85},
+    ]
+    r = client.post("/recovery/evaluate/batch", json=items)
+    assert r.status_code == 200
+    results = r.json()
+    assert len(results) == len(items)
+
+    for item, result in zip(items, results):
+        single = client.post("/recovery/evaluate", json=item).json()
+        assert result == single
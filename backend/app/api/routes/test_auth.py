@@ -0,0 +1,28 @@
+"""Tests for the auth routes."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import get_current_active_user
+from app.db.models import User
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def login_as():
+    def login(**fields):
+        user = User(id=1, email="ops@example.com", username="ops", is_active=True, **fields)
+        app.dependency_overrides[get_current_active_user] = lambda: user
+
+    yield login
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("path", ["/api/v1/auth/cache/metrics", "/api/v1/auth/password-pool/metrics"])
+def test_worker_metrics_are_admin_only(login_as, path):
+    login_as(is_admin=False)
+    assert client.get(path).status_code == 403
+
+    login_as(is_admin=True)
+    assert client.get(path).status_code == 200
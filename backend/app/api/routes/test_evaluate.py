@@ -0,0 +1,48 @@
+"""Tests for the stateless recovery evaluation routes."""
+from fastapi.testclient import TestClient
+
+from app.api.routes.evaluate import MAX_BATCH_SIZE
+from integration.scoring_policy import get_active_policy
+from main import app
+
+client = TestClient(app)
+
+INPUTS = [
+    {"sleep_hours": 7.5, "sleep_quality": 8, "soreness": 2, "energy": 9, "stress": 3,
+     "last_set_weight": 100, "last_set_reps": 5},
+    {"sleep_hours": 4.0, "sleep_quality": 3, "soreness_level": 9, "energy_level": 2, "stress_level": 8,
+     "hrv_rmssd": 15, "resting_heart_rate": 85, "sleep_duration_minutes": 250},
+    {},
+]
+
+
+def test_batch_matches_single_evaluations():
+    singles = [client.post("/api/v1/recovery/evaluate", json=item) for item in INPUTS]
+    assert all(r.status_code == 200 for r in singles)
+
+    batch = client.post("/api/v1/recovery/evaluate/batch", json=INPUTS)
+    assert batch.status_code == 200
+    assert batch.json() == [r.json() for r in singles]
+
+    first, second, empty = batch.json()
+    assert first["today_estimated_1rm"] > 100 and second["today_estimated_1rm"] is None
+    assert empty["engine_version"] == get_active_policy().version
+
+    # The admin dashboard's unversioned path serves the same route
+    assert client.post("/recovery/evaluate", json=INPUTS[0]).json() == first
+
+
+def test_batch_size_is_limited():
+    r = client.post("/api/v1/recovery/evaluate/batch", json=[{}] * (MAX_BATCH_SIZE + 1))
+    assert r.status_code == 413
+
+
+def test_non_finite_inputs_are_rejected():
+    # 1e999 is valid JSON that parses as inf
+    body = '{"last_set_weight": 1e999, "last_set_reps": 5}'
+    headers = {"Content-Type": "application/json"}
+    assert client.post("/api/v1/recovery/evaluate", content=body, headers=headers).status_code == 422
+    assert client.post("/api/v1/recovery/evaluate/batch", content=f"[{body}]", headers=headers).status_code == 422
+
+    r = client.post("/api/v1/recovery/evaluate", content='{"hrv_rmssd": NaN}', headers=headers)
+    assert r.status_code == 422
@@ -0,0 +1,54 @@
+"""Tests for the workout routes."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core.security import get_current_active_user
+from app.db.base import Base
+from app.db.models import User, Workout
+from app.db.session import get_async_db
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    """The routes' AsyncSession on a throwaway SQLite file, as user 1"""
+    pytest.importorskip("aiosqlite")
+    url = f"sqlite:///{tmp_path / 'workouts.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=[User.__table__, Workout.__table__])
+    user = dict(id=1, email="lifter@example.com", username="lifter", hashed_password="x", is_active=True)
+    with Session(engine) as db:
+        db.add(User(**user))
+        db.commit()
+
+    sessions = async_sessionmaker(
+        create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool),
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_active_user] = lambda: User(**user)
+    yield engine
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+def test_create_and_list_workouts(async_db):
+    r = client.post("/api/v1/workouts/", json={"name": "Push", "is_template": True, "exercises": [{"name": "Bench Press"}]})
+    assert r.status_code == 201
+    assert (r.json()["user_id"], r.json()["exercises"]) == (1, [{"name": "Bench Press"}])
+    client.post("/api/v1/workouts/", json={"name": "Pull"})
+
+    assert sorted(workout["name"] for workout in client.get("/api/v1/workouts/").json()) == ["Pull", "Push"]
+    assert [workout["name"] for workout in client.get("/api/v1/workouts/", params={"templates_only": True}).json()] == ["Push"]
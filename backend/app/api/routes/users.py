@@ -2,15 +2,18 @@
 User profile management endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 import structlog
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.db.models import User
 from app.schemas.auth import UserResponse
-from app.core.security import get_current_active_user, get_password_hash
+from app.core.security import get_current_active_user
+from app.services.refresh_tokens import revoke_user_families
+from app.services.password_pool import PasswordPoolSaturated, hash_password_async, verify_password_async
+from app.services.user_cache import invalidate_user
 
 router = APIRouter()
 logger = structlog.get_logger()
@@ -29,16 +32,16 @@ class PasswordChange(BaseModel):
 
 
 @router.get("/profile", response_model=UserResponse)
-def get_profile(current_user: User = Depends(get_current_active_user)):
+async def get_profile(current_user: User = Depends(get_current_active_user)):
     """Get current user's profile"""
     return current_user
 
 
 @router.put("/profile", response_model=UserResponse)
-def update_profile(
+async def update_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user profile information"""
     if profile_data.height_cm is not None:
@@ -50,8 +53,9 @@ def update_profile(
     if profile_data.fitness_level is not None:
         current_user.fitness_level = profile_data.fitness_level
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await invalidate_user(current_user.id)
+    await db.refresh(current_user)
     
     logger.info("User profile updated", user_id=current_user.id)
     
@@ -59,24 +63,37 @@ def update_profile(
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Change user password"""
-    from app.core.security import verify_password
+    # Not part of a cached principal
+    await db.refresh(current_user, ["hashed_password"])
     
-    # Verify current password
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    try:
+        # Verify current password
+        if not await verify_password_async(password_data.current_password, current_user.hashed_password):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Current password is incorrect"
+            )
+        
+        # Update to new password
+        new_hash = await hash_password_async(password_data.new_password)
+    except PasswordPoolSaturated:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Current password is incorrect"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password checks in progress, retry later",
+            headers={"Retry-After": "1"}
         )
     
-    # Update to new password
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    db.commit()
+    current_user.hashed_password = new_hash
+    # Sessions logged in with the old password must log in again
+    await db.run_sync(revoke_user_families, current_user.id)
+    await db.commit()
+    await invalidate_user(current_user.id)
     
     logger.info("Password changed", user_id=current_user.id)
     
@@ -84,13 +101,15 @@ def change_password(
 
 
 @router.delete("/account")
-def delete_account(
+async def delete_account(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete user account"""
     current_user.is_active = False
-    db.commit()
+    await db.run_sync(revoke_user_families, current_user.id)
+    await db.commit()
+    await invalidate_user(current_user.id)
     
     logger.info("User account deactivated", user_id=current_user.id)
     
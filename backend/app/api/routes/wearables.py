@@ -2,37 +2,126 @@
 Wearable data ingestion endpoints
 Handles data from Apple Health, Google Fit, and BLE devices
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+import shutil
+import tempfile
 import structlog
 
-from app.db.session import get_db
-from app.db.models import User, WearableData
-from app.schemas.auth import WearableDataInput, WearableDataResponse
-from app.core.security import get_current_active_user
+from app.db.session import get_async_db
+from app.db.models import ImportJob, User, WearableData, WearableRRSeries
+from app.schemas.auth import WEARABLE_SOURCE_PATTERN, WearableDataInput, WearableDataResponse
+from app.core.security import get_current_active_user, get_current_admin_user
+from integration.hrv import compute_hrv_metrics
+from app.api.pagination import (
+    MAX_PAGE_SIZE,
+    keyset_before,
+    page_limit,
+    paginate,
+    stream_ndjson
+)
+from app.services.health_import import FORMATS, detect_format, run_import_job
+from app.services.ingest_queue import QueueFull, get_ingest_queue
+from app.services.raw_payloads import load_raw_payload
+from app.services.rr_series import load_rr_series, store_rr_series
+from app.services.wearable_rollups import (
+    get_wearable_rollup_history,
+    pick_resolution,
+    refresh_wearable_rollups
+)
+from app.services.wearable_ingest import ingest_readings, merge_readings, reading_key
 
 router = APIRouter()
 logger = structlog.get_logger()
 
+# Uploads are spooled to disk in chunks of this size
+UPLOAD_COPY_BUFFER = 1 << 20
 
-def deduplicate_wearable_data(db: Session, user_id: int, source: str, measurement_date: datetime):
-    """Check for duplicate entries"""
-    existing = db.query(WearableData).filter(
-        WearableData.user_id == user_id,
-        WearableData.source == source,
-        WearableData.measurement_date == measurement_date
-    ).first()
+# A full day at 140 bpm
+MAX_RR_BEATS = 200_000
+
+
+class ImportJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
     
-    return existing
+    id: int
+    status: str
+    format: str
+    filename: Optional[str] = None
+    bytes_total: Optional[int] = None
+    bytes_processed: int
+    records_parsed: int
+    records_rejected: int
+    rows_written: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class IngestReceipt(BaseModel):
+    receipt_id: str
+    status: str  # queued, committed, failed
+    readings: int
+    queued_at: str
+    committed_at: Optional[str] = None
+    error: Optional[str] = None
+
+
+class RRIntervalUpload(BaseModel):
+    source: str = Field("polar_h10", pattern=WEARABLE_SOURCE_PATTERN)
+    measurement_date: datetime
+    rr_intervals: List[float] = Field(..., min_length=2, max_length=MAX_RR_BEATS)  # ms
+    resting_heart_rate: Optional[int] = None
+
+
+class RRIntervalResult(BaseModel):
+    wearable_data_id: int
+    beat_count: int
+    artifact_count: int
+    artifact_ratio: Optional[float] = None
+    mean_rr: Optional[float] = None
+    mean_heart_rate: Optional[float] = None
+    hrv_rmssd: Optional[float] = None
+    hrv_sdnn: Optional[float] = None
+    pnn50: Optional[float] = None
+
+
+class WearableRollupPoint(BaseModel):
+    period_start: date
+    resolution: str
+    source: Optional[str] = None
+    reading_count: int
+    hrv_mean: Optional[float] = None
+    hrv_min: Optional[float] = None
+    hrv_max: Optional[float] = None
+    resting_heart_rate_mean: Optional[float] = None
+    resting_heart_rate_min: Optional[int] = None
+    resting_heart_rate_max: Optional[int] = None
+    sleep_duration_minutes_mean: Optional[float] = None
+    sleep_duration_minutes_min: Optional[int] = None
+    sleep_duration_minutes_max: Optional[int] = None
+    steps: Optional[int] = None
+    active_calories: Optional[int] = None
+
+
+def spool_upload(upload) -> tuple:
+    """Copy an upload to a temp file that outlives the request; (path, size)"""
+    with tempfile.NamedTemporaryFile(prefix="equilibria-import-", delete=False) as spool:
+        shutil.copyfileobj(upload, spool, UPLOAD_COPY_BUFFER)
+        return spool.name, spool.tell()
 
 
 @router.post("/sync", response_model=WearableDataResponse, status_code=status.HTTP_201_CREATED)
-def sync_wearable_data(
+async def sync_wearable_data(
     data: WearableDataInput,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Sync wearable data from Apple Health, Google Fit, or BLE devices
@@ -41,159 +130,346 @@ def sync_wearable_data(
     - apple_health: Data from Apple HealthKit
     - google_fit: Data from Google Fit API
     - polar_h10: HRV data from Polar H10 chest strap
+    
+    Re-syncing an existing (source, measurement_date) merges into it like
+    /sync/batch: one INSERT ... ON CONFLICT DO UPDATE, so concurrent
+    duplicates update the same row instead of failing the unique key.
     """
-    # Check for duplicates
-    existing = deduplicate_wearable_data(
-        db,
-        current_user.id,
-        data.source,
-        data.measurement_date
+    readings = merge_readings([data.model_dump()])
+    rows = await db.run_sync(ingest_readings, current_user.id, readings)
+    result = WearableDataResponse.model_validate(rows[reading_key(data.source, data.measurement_date)])
+    await db.commit()
+    
+    logger.info(
+        "Wearable data synced",
+        user_id=current_user.id,
+        source=data.source,
+        date=data.measurement_date
     )
     
-    if existing:
-        logger.info(
-            "Duplicate wearable data detected, updating existing entry",
-            user_id=current_user.id,
-            source=data.source,
-            date=data.measurement_date
+    return result
+
+
+@router.post("/sync/batch", response_model=List[WearableDataResponse])
+async def sync_wearable_data_batch(
+    data_list: List[WearableDataInput],
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Sync multiple wearable data entries at once
+    
+    Uses a constant number of round trips regardless of batch size: one
+    lookup of already-stored metrics (for baselines), one multi-row upsert
+    per UPSERT_CHUNK_SIZE entries (plus one for raw payloads), then the
+    baseline, rollup and fused-day refreshes. Entries for an existing
+    (source, measurement_date) merge exactly like /sync: only non-null
+    fields overwrite.
+    """
+    readings = merge_readings(data.model_dump() for data in data_list)
+    rows = await db.run_sync(ingest_readings, current_user.id, readings)
+    
+    # Serialize before commit so expired rows are not reloaded one by one
+    results = [
+        WearableDataResponse.model_validate(
+            rows[reading_key(data.source, data.measurement_date)]
         )
-        # Update existing entry
-        for key, value in data.model_dump(exclude_unset=True).items():
-            if key not in ["source", "measurement_date"] and value is not None:
-                setattr(existing, key, value)
-        
-        existing.sync_timestamp = datetime.utcnow()
-        db.commit()
-        db.refresh(existing)
-        return existing
-    
-    # Create new entry
-    new_data = WearableData(
+        for data in data_list
+    ]
+    await db.commit()
+    
+    logger.info(
+        "Batch wearable sync completed",
         user_id=current_user.id,
-        source=data.source,
-        measurement_date=data.measurement_date,
-        hrv_rmssd=data.hrv_rmssd,
-        hrv_sdnn=data.hrv_sdnn,
-        resting_heart_rate=data.resting_heart_rate,
-        avg_heart_rate=data.avg_heart_rate,
-        sleep_duration_minutes=data.sleep_duration_minutes,
-        deep_sleep_minutes=data.deep_sleep_minutes,
-        rem_sleep_minutes=data.rem_sleep_minutes,
-        steps=data.steps,
-        active_calories=data.active_calories,
-        raw_data=data.raw_data
+        count=len(results),
+        distinct_readings=len(rows)
     )
     
-    db.add(new_data)
-    db.commit()
-    db.refresh(new_data)
+    return results
+
+
+@router.post("/rr-intervals", response_model=RRIntervalResult, status_code=status.HTTP_201_CREATED)
+async def sync_rr_intervals(
+    data: RRIntervalUpload,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Upload a raw RR-interval recording (e.g. Polar H10)
+    
+    Artifacts are rejected and RMSSD / SDNN / pNN50 computed server-side;
+    the results are merged into the reading for (source, measurement_date)
+    like /sync, and the recording is stored packed alongside it.
+    """
+    metrics = compute_hrv_metrics(data.rr_intervals)
+    if metrics["rmssd"] is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Not enough clean beats to compute HRV"
+        )
+    
+    readings = merge_readings([{
+        "source": data.source,
+        "measurement_date": data.measurement_date,
+        "hrv_rmssd": metrics["rmssd"],
+        "hrv_sdnn": metrics["sdnn"],
+        "avg_heart_rate": round(metrics["mean_heart_rate"]),
+        "resting_heart_rate": data.resting_heart_rate,
+    }])
+    rows = await db.run_sync(ingest_readings, current_user.id, readings)
+    row = rows[reading_key(data.source, data.measurement_date)]
+    
+    await db.run_sync(store_rr_series, current_user.id, row.id, data.rr_intervals, metrics)
+    await db.commit()
     
     logger.info(
-        "Wearable data synced",
+        "RR intervals synced",
         user_id=current_user.id,
         source=data.source,
-        date=data.measurement_date
+        beats=metrics["beat_count"],
+        artifacts=metrics["artifact_count"]
     )
     
-    return new_data
+    return RRIntervalResult(
+        wearable_data_id=row.id,
+        beat_count=metrics["beat_count"],
+        artifact_count=metrics["artifact_count"],
+        artifact_ratio=metrics["artifact_ratio"],
+        mean_rr=metrics["mean_rr"],
+        mean_heart_rate=metrics["mean_heart_rate"],
+        hrv_rmssd=metrics["rmssd"],
+        hrv_sdnn=metrics["sdnn"],
+        pnn50=metrics["pnn50"]
+    )
 
 
-@router.post("/sync/batch", response_model=List[WearableDataResponse])
-def sync_wearable_data_batch(
+def _ingest_queue():
+    queue = get_ingest_queue()
+    if queue is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Async ingest is not enabled"
+        )
+    return queue
+
+
+@router.post("/sync/async", response_model=IngestReceipt, status_code=status.HTTP_202_ACCEPTED)
+def sync_wearable_data_async(
     data_list: List[WearableDataInput],
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user)
 ):
-    """Sync multiple wearable data entries at once"""
-    results = []
+    """
+    Queue wearable readings for a write-behind, group-committed upsert
+    
+    Same merge semantics as /sync/batch, but the request returns as soon
+    as the payload is validated and queued; poll /sync/async/{receipt_id}
+    to see when it is committed.
+    """
+    queue = _ingest_queue()
     
-    for data in data_list:
-        # Check for duplicates
-        existing = deduplicate_wearable_data(
-            db,
+    try:
+        receipt = queue.enqueue(
             current_user.id,
-            data.source,
-            data.measurement_date
+            [data.model_dump(mode="json") for data in data_list]
+        )
+    except QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingest queue is full, retry later",
+            headers={"Retry-After": "5"}
         )
-        
-        if existing:
-            # Update existing
-            for key, value in data.model_dump(exclude_unset=True).items():
-                if key not in ["source", "measurement_date"] and value is not None:
-                    setattr(existing, key, value)
-            existing.sync_timestamp = datetime.utcnow()
-            results.append(existing)
-        else:
-            # Create new
-            new_data = WearableData(
-                user_id=current_user.id,
-                source=data.source,
-                measurement_date=data.measurement_date,
-                hrv_rmssd=data.hrv_rmssd,
-                hrv_sdnn=data.hrv_sdnn,
-                resting_heart_rate=data.resting_heart_rate,
-                avg_heart_rate=data.avg_heart_rate,
-                sleep_duration_minutes=data.sleep_duration_minutes,
-                deep_sleep_minutes=data.deep_sleep_minutes,
-                rem_sleep_minutes=data.rem_sleep_minutes,
-                steps=data.steps,
-                active_calories=data.active_calories,
-                raw_data=data.raw_data
-            )
-            db.add(new_data)
-            results.append(new_data)
-    
-    db.commit()
-    for item in results:
-        db.refresh(item)
+    
+    return receipt
+
+
+@router.get("/sync/async/{receipt_id}", response_model=IngestReceipt)
+def get_sync_receipt(
+    receipt_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the status of a queued sync"""
+    receipt = _ingest_queue().get_receipt(receipt_id)
+    
+    if not receipt or receipt["user_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Receipt not found"
+        )
+    
+    return receipt
+
+
+@router.get("/ingest/metrics")
+def get_ingest_metrics(current_user: User = Depends(get_current_admin_user)):
+    """Queue depth and group-commit counters of the async ingest queue"""
+    queue = _ingest_queue()
+    return {"queue_depth": queue.depth(), **queue.metrics()}
+
+
+@router.post("/import", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_wearable_data(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    import_format: Optional[str] = Form(None, alias="format"),
+    source: str = Form("apple_health", pattern=WEARABLE_SOURCE_PATTERN),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import a full health-data export (Apple Health export.xml/.zip, NDJSON
+    or CSV in the /sync/batch shape). The file is parsed in the background;
+    poll GET /import/{job_id} for progress.
+    """
+    fmt = import_format or detect_format(file.filename)
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown import format; expected one of {list(FORMATS)}"
+        )
+    
+    # Spool to disk so the worker reads a file that outlives this request
+    path, bytes_total = await run_in_threadpool(spool_upload, file.file)
+    
+    job = ImportJob(
+        user_id=current_user.id,
+        status="queued",
+        format=fmt,
+        filename=file.filename,
+        bytes_total=bytes_total,
+        bytes_processed=0,
+        records_parsed=0,
+        records_rejected=0,
+        rows_written=0
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    
+    background_tasks.add_task(run_import_job, job.id, path, source)
     
     logger.info(
-        "Batch wearable sync completed",
+        "Wearable import queued",
         user_id=current_user.id,
-        count=len(results)
+        job_id=job.id,
+        format=fmt,
+        bytes_total=bytes_total
     )
     
-    return results
+    return job
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the status of an import job"""
+    job = await db.scalar(select(ImportJob).where(
+        ImportJob.id == job_id,
+        ImportJob.user_id == current_user.id
+    ))
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    return job
 
 
 @router.get("/history", response_model=List[WearableDataResponse])
-def get_wearable_history(
+async def get_wearable_history(
+    response: Response,
     days: int = 30,
     source: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get wearable data history"""
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    """
+    Get wearable data history, newest first
+    
+    Without `limit` or `cursor` the whole window is returned, as before
+    pagination. Otherwise readings are keyset-paginated on
+    (measurement_date, id): when more rows exist the X-Next-Cursor header
+    holds the `cursor` for the next page. `stream=true` returns the whole window as NDJSON instead, read
+    through a server-side cursor. For long spans, /history/rollups returns
+    aggregates instead.
+    """
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
     
-    query = db.query(WearableData).filter(
+    filters = [
         WearableData.user_id == current_user.id,
         WearableData.measurement_date >= cutoff_date
-    )
+    ]
     
     if source:
-        query = query.filter(WearableData.source == source)
+        filters.append(WearableData.source == source)
+    
+    if cursor:
+        filters.append(keyset_before(WearableData.measurement_date, WearableData.id, cursor))
+    
+    if stream:
+        return stream_ndjson(
+            WearableData,
+            filters,
+            [WearableData.measurement_date.desc(), WearableData.id.desc()],
+            WearableDataResponse
+        )
+    
+    statement = select(WearableData).where(*filters)
+    return await paginate(db, statement, WearableData.measurement_date, WearableData.id, page_limit(limit, cursor), response)
+
+
+@router.get("/history/rollups", response_model=List[WearableRollupPoint])
+async def get_wearable_rollup_points(
+    days: int = 365,
+    source: str = None,
+    resolution: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get one aggregate point per day, week or month, newest first
     
-    data = query.order_by(WearableData.measurement_date.desc()).all()
+    Read from the rollup tables, so a year is ~52 weekly rows. The
+    resolution defaults to daily up to 180 days, weekly up to two years
+    and monthly beyond. Without `source`, sources are combined: readings
+    are pooled, and steps/calories are the largest source's total per day.
+    """
+    cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
     
-    return data
+    return [
+        WearableRollupPoint(**point)
+        for point in await db.run_sync(
+            get_wearable_rollup_history,
+            current_user.id,
+            resolution or pick_resolution(days),
+            cutoff_date,
+            source
+        )
+    ]
 
 
 @router.get("/latest", response_model=WearableDataResponse)
-def get_latest_wearable_data(
+async def get_latest_wearable_data(
     source: str = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get the most recent wearable data entry"""
-    query = db.query(WearableData).filter(
+    statement = select(WearableData).where(
         WearableData.user_id == current_user.id
     )
     
     if source:
-        query = query.filter(WearableData.source == source)
+        statement = statement.where(WearableData.source == source)
     
-    latest = query.order_by(WearableData.measurement_date.desc()).first()
+    latest = await db.scalar(statement.order_by(WearableData.measurement_date.desc()).limit(1))
     
     if not latest:
         raise HTTPException(
@@ -204,27 +480,99 @@ def get_latest_wearable_data(
     return latest
 
 
+@router.get("/latest-by-source", response_model=List[WearableDataResponse])
+async def get_latest_wearable_data_by_source(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the most recent wearable data entry from each source"""
+    # One DISTINCT ON pass; ordering matches a backward scan of the
+    # (user_id, source, measurement_date) unique index
+    latest = (await db.scalars(select(WearableData).where(
+        WearableData.user_id == current_user.id
+    ).distinct(WearableData.source).order_by(
+        WearableData.source.desc(),
+        WearableData.measurement_date.desc()
+    ))).all()
+    
+    return sorted(latest, key=lambda row: row.source)
+
+
+@router.get("/{wearable_id}/raw")
+async def get_wearable_raw_data(
+    wearable_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the raw device payload stored with a wearable data entry"""
+    digest = await db.scalar(select(WearableData.raw_data_digest).where(
+        WearableData.id == wearable_id,
+        WearableData.user_id == current_user.id
+    ))
+    
+    payload = await db.run_sync(load_raw_payload, digest) if digest else None
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No raw data found"
+        )
+    
+    return payload
+
+
+@router.get("/{wearable_id}/rr-intervals")
+async def get_wearable_rr_intervals(
+    wearable_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the RR-interval recording behind a wearable data entry"""
+    series = await db.run_sync(load_rr_series, current_user.id, wearable_id)
+    
+    if series is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No RR intervals found"
+        )
+    
+    return series
+
+
 @router.delete("/clear")
-def clear_wearable_data(
+async def clear_wearable_data(
     days: int = None,
     source: str = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Clear wearable data"""
-    query = db.query(WearableData).filter(
-        WearableData.user_id == current_user.id
-    )
+    filters = [WearableData.user_id == current_user.id]
     
     if days:
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(WearableData.measurement_date < cutoff_date)
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        filters.append(WearableData.measurement_date < cutoff_date)
     
     if source:
-        query = query.filter(WearableData.source == source)
+        filters.append(WearableData.source == source)
+    
+    # Days whose rollups change, read before the rows go
+    days_cleared = (await db.scalars(
+        select(cast(func.timezone("UTC", WearableData.measurement_date), Date)).where(*filters).distinct()
+    )).all()
+    
+    # RR recordings have no foreign key to the (partitioned) readings
+    await db.execute(
+        delete(WearableRRSeries).where(
+            WearableRRSeries.user_id == current_user.id,
+            WearableRRSeries.wearable_data_id.in_(select(WearableData.id).where(*filters))
+        ).execution_options(synchronize_session=False)
+    )
     
-    count = query.delete()
-    db.commit()
+    count = (await db.execute(
+        delete(WearableData).where(*filters).execution_options(synchronize_session=False)
+    )).rowcount
+    await db.run_sync(refresh_wearable_rollups, current_user.id, days_cleared)
+    await db.commit()
     
     logger.info(
         "Wearable data cleared",
@@ -1,25 +1,87 @@
 """
 Workout and workout session endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
 import structlog
 
-from app.db.session import get_db
-from app.db.models import User, Workout, WorkoutSession
+from app.db.session import get_async_db
+from app.db.models import ExercisePerformance, PersonalRecord, User, Workout, WorkoutSession
 from app.schemas.auth import WorkoutCreate, WorkoutResponse, WorkoutSessionCreate, WorkoutSessionResponse
 from app.core.security import get_current_active_user
+from app.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_before, paginate
+from app.services.exercise_performance import (
+    apply_load_targets,
+    latest_recovery_score,
+    normalize_exercise_name,
+    normalize_exercises,
+    record_exercise_performances,
+    total_volume
+)
+from app.services.personal_records import record_personal_records
+from app.services.workload import get_workload_snapshot, update_user_workload
 
 router = APIRouter()
 logger = structlog.get_logger()
 
 
+class ExercisePerformanceResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    session_id: int
+    exercise_name: str
+    exercise_id: Optional[str] = None
+    performed_at: datetime
+    weight_kg: Optional[float] = None
+    reps: int
+    sets: int
+    rpe: Optional[float] = None
+    estimated_1rm: Optional[float] = None
+    suggested_next_weight: Optional[float] = None
+
+
+class ExerciseSummary(BaseModel):
+    exercise_name: str
+    entries: int
+    total_sets: int
+    max_weight_kg: Optional[float] = None
+    last_performed_at: datetime
+
+
+class WorkloadInsights(BaseModel):
+    acute_load: float
+    chronic_load: float
+    acwr: Optional[float] = None
+    risk: Optional[str] = None  # insufficient_history, undertraining, optimal, elevated, high
+    weekly_load: float
+    monotony: Optional[float] = None
+    strain: Optional[float] = None
+    history_days: int
+    session_count: int
+
+
+class PersonalRecordResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    exercise_name: str
+    best_weight_kg: Optional[float] = None
+    best_weight_reps: Optional[int] = None
+    best_weight_at: Optional[datetime] = None
+    best_estimated_1rm: Optional[float] = None
+    best_estimated_1rm_at: Optional[datetime] = None
+    rep_maxes: Dict[str, Dict] = {}
+
+
 @router.post("/", response_model=WorkoutResponse, status_code=status.HTTP_201_CREATED)
-def create_workout(
+async def create_workout(
     workout_data: WorkoutCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new workout plan or template"""
     new_workout = Workout(
@@ -32,8 +94,8 @@ def create_workout(
     )
     
     db.add(new_workout)
-    db.commit()
-    db.refresh(new_workout)
+    await db.commit()
+    await db.refresh(new_workout)
     
     logger.info(
         "Workout created",
@@ -46,32 +108,139 @@ def create_workout(
 
 
 @router.get("/", response_model=List[WorkoutResponse])
-def get_workouts(
+async def get_workouts(
     templates_only: bool = False,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all workouts for the current user"""
-    query = db.query(Workout).filter(Workout.user_id == current_user.id)
+    statement = select(Workout).where(Workout.user_id == current_user.id)
     
     if templates_only:
-        query = query.filter(Workout.is_template == True)
+        statement = statement.where(Workout.is_template == True)
     
-    workouts = query.order_by(Workout.created_at.desc()).all()
+    workouts = (await db.scalars(statement.order_by(Workout.created_at.desc()))).all()
     return workouts
 
 
+# ========== EXERCISE HISTORY & RECORDS ==========
+# Declared before /{workout_id} so "exercises"/"records" are never taken
+# for an id. Reads normalized rows, never session JSON.
+
+@router.get("/exercises", response_model=List[ExerciseSummary])
+async def get_exercises(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get every exercise the user has logged, most recent first"""
+    rows = (await db.execute(select(
+        ExercisePerformance.exercise_name,
+        func.count(ExercisePerformance.id),
+        func.sum(ExercisePerformance.sets),
+        func.max(ExercisePerformance.weight_kg),
+        func.max(ExercisePerformance.performed_at)
+    ).where(
+        ExercisePerformance.user_id == current_user.id
+    ).group_by(ExercisePerformance.exercise_name).order_by(
+        func.max(ExercisePerformance.performed_at).desc()
+    ))).all()
+    
+    return [
+        ExerciseSummary(
+            exercise_name=name,
+            entries=entries,
+            total_sets=total_sets,
+            max_weight_kg=max_weight,
+            last_performed_at=last_performed_at
+        )
+        for name, entries, total_sets, max_weight, last_performed_at in rows
+    ]
+
+
+@router.get("/exercises/{exercise_name}/history", response_model=List[ExercisePerformanceResponse])
+async def get_exercise_history(
+    exercise_name: str,
+    response: Response,
+    days: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the logged sets of one exercise, newest first
+    
+    Keyset-paginated on (performed_at, id): when more rows exist the
+    X-Next-Cursor header holds the `cursor` for the next page.
+    """
+    filters = [
+        ExercisePerformance.user_id == current_user.id,
+        ExercisePerformance.exercise_name == normalize_exercise_name(exercise_name)
+    ]
+    
+    if days:
+        filters.append(ExercisePerformance.performed_at >= datetime.now(timezone.utc) - timedelta(days=days))
+    
+    if cursor:
+        filters.append(keyset_before(ExercisePerformance.performed_at, ExercisePerformance.id, cursor))
+    
+    statement = select(ExercisePerformance).where(*filters)
+    return await paginate(db, statement, ExercisePerformance.performed_at, ExercisePerformance.id, limit, response)
+
+
+@router.get("/records", response_model=List[PersonalRecordResponse])
+async def get_personal_records(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the user's personal records for every exercise"""
+    return (await db.scalars(select(PersonalRecord).where(
+        PersonalRecord.user_id == current_user.id
+    ).order_by(PersonalRecord.exercise_name))).all()
+
+
+@router.get("/records/{exercise_name}", response_model=PersonalRecordResponse)
+async def get_personal_record(
+    exercise_name: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the user's personal records for one exercise"""
+    record = await db.get(PersonalRecord, (current_user.id, normalize_exercise_name(exercise_name)))
+    
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No personal records for this exercise"
+        )
+    
+    return record
+
+
+@router.get("/insights/workload", response_model=WorkloadInsights)
+async def get_workload_insights(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get training-load insights: EWMA acute (7-day) and chronic (28-day)
+    session volume, their ratio with an over/undertraining risk band, and
+    last-week monotony and strain. One primary-key read.
+    """
+    return await db.run_sync(get_workload_snapshot, current_user.id, datetime.now(timezone.utc).date())
+
+
 @router.get("/{workout_id}", response_model=WorkoutResponse)
-def get_workout(
+async def get_workout(
     workout_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific workout by ID"""
-    workout = db.query(Workout).filter(
+    workout = await db.scalar(select(Workout).where(
         Workout.id == workout_id,
         Workout.user_id == current_user.id
-    ).first()
+    ))
     
     if not workout:
         raise HTTPException(
@@ -83,17 +252,17 @@ def get_workout(
 
 
 @router.put("/{workout_id}", response_model=WorkoutResponse)
-def update_workout(
+async def update_workout(
     workout_id: int,
     workout_data: WorkoutCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an existing workout"""
-    workout = db.query(Workout).filter(
+    workout = await db.scalar(select(Workout).where(
         Workout.id == workout_id,
         Workout.user_id == current_user.id
-    ).first()
+    ))
     
     if not workout:
         raise HTTPException(
@@ -107,8 +276,8 @@ def update_workout(
     workout.is_template = workout_data.is_template
     workout.exercises = workout_data.exercises
     
-    db.commit()
-    db.refresh(workout)
+    await db.commit()
+    await db.refresh(workout)
     
     logger.info("Workout updated", user_id=current_user.id, workout_id=workout_id)
     
@@ -116,16 +285,16 @@ def update_workout(
 
 
 @router.delete("/{workout_id}")
-def delete_workout(
+async def delete_workout(
     workout_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a workout"""
-    workout = db.query(Workout).filter(
+    workout = await db.scalar(select(Workout).where(
         Workout.id == workout_id,
         Workout.user_id == current_user.id
-    ).first()
+    ))
     
     if not workout:
         raise HTTPException(
@@ -133,8 +302,8 @@ def delete_workout(
             detail="Workout not found"
         )
     
-    db.delete(workout)
-    db.commit()
+    await db.delete(workout)
+    await db.commit()
     
     logger.info("Workout deleted", user_id=current_user.id, workout_id=workout_id)
     
@@ -144,66 +313,75 @@ def delete_workout(
 # ========== WORKOUT SESSIONS ==========
 
 @router.post("/sessions", response_model=WorkoutSessionResponse, status_code=status.HTTP_201_CREATED)
-def log_workout_session(
+async def log_workout_session(
     session_data: WorkoutSessionCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Log a completed workout session"""
-    # Calculate total volume
-    total_volume = 0
-    for exercise in session_data.exercises_completed:
-        if "weight" in exercise and "reps" in exercise and "sets" in exercise:
-            total_volume += exercise["weight"] * exercise["reps"] * exercise["sets"]
+    session_date = datetime.now(timezone.utc)
+    performances = normalize_exercises(session_data.exercises_completed)
+    volume = total_volume(performances)
+    
+    # 1RM estimates and next-session loads, scaled down on low-recovery days
+    recovery_score = await db.run_sync(latest_recovery_score, current_user.id, session_date)
+    apply_load_targets(performances, recovery_score)
     
     new_session = WorkoutSession(
         user_id=current_user.id,
         workout_id=session_data.workout_id,
+        session_date=session_date,
         duration_minutes=session_data.duration_minutes,
         exercises_completed=session_data.exercises_completed,
-        total_volume=total_volume if total_volume > 0 else None,
+        total_volume=volume if volume > 0 else None,
         notes=session_data.notes
     )
     
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    await db.flush()
+    await db.run_sync(record_exercise_performances, new_session, performances)
+    new_records = await db.run_sync(record_personal_records, current_user.id, performances, session_date)
+    await db.run_sync(update_user_workload, current_user.id, session_date.date(), volume)
+    await db.commit()
+    await db.refresh(new_session)
     
     logger.info(
         "Workout session logged",
         user_id=current_user.id,
         session_id=new_session.id,
-        volume=total_volume
+        volume=volume,
+        exercises=len(performances),
+        personal_records=new_records or None
     )
     
     return new_session
 
 
 @router.get("/sessions", response_model=List[WorkoutSessionResponse])
-def get_workout_sessions(
+async def get_workout_sessions(
     limit: int = 50,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get workout session history"""
-    sessions = db.query(WorkoutSession).filter(
+    sessions = (await db.scalars(select(WorkoutSession).where(
         WorkoutSession.user_id == current_user.id
-    ).order_by(WorkoutSession.session_date.desc()).limit(limit).all()
+    ).order_by(WorkoutSession.session_date.desc()).limit(limit))).all()
     
     return sessions
 
 
 @router.get("/sessions/{session_id}", response_model=WorkoutSessionResponse)
-def get_workout_session(
+async def get_workout_session(
     session_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific workout session"""
-    session = db.query(WorkoutSession).filter(
+    session = await db.scalar(select(WorkoutSession).where(
         WorkoutSession.id == session_id,
         WorkoutSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(
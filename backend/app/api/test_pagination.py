@@ -0,0 +1,79 @@
+"""Tests for keyset pagination of history endpoints."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import Column, DateTime, Integer, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from app.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    keyset_before,
+    page_limit,
+    paginate,
+)
+
+Base = declarative_base()
+
+START = datetime(2026, 6, 1, 12, 0)
+
+
+class Entry(Base):
+    __tablename__ = "entries"
+
+    id = Column(Integer, primary_key=True)
+    logged_at = Column(DateTime, nullable=False)
+
+
+def test_cursor_round_trip():
+    position = datetime(2026, 6, 1, 7, 30, 15, 250, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(position, 42)) == (position, 42)
+
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor")
+    assert error.value.status_code == 400
+
+
+def test_page_limit_keeps_unpaged_clients_whole():
+    assert page_limit(None, None) is None
+    assert page_limit(None, "cursor") == DEFAULT_PAGE_SIZE
+    assert page_limit(20, None) == 20
+
+
+async def _pages(limit):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session = async_sessionmaker(engine, expire_on_commit=False)
+    async with session() as db:
+        # Pairs of entries share a timestamp, so ids break the ties
+        db.add_all([Entry(id=i, logged_at=START - timedelta(hours=i // 2)) for i in range(1, 8)])
+        await db.commit()
+
+        pages, cursor = [], None
+        while True:
+            statement = select(Entry)
+            if cursor:
+                statement = statement.where(keyset_before(Entry.logged_at, Entry.id, cursor))
+            response = Response()
+            rows = await paginate(db, statement, Entry.logged_at, Entry.id, limit, response)
+            pages.append([row.id for row in rows])
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+
+    await engine.dispose()
+    return pages
+
+
+def test_pages_walk_every_row_once_in_timestamp_then_id_order():
+    pytest.importorskip("aiosqlite")
+    # Newest first: 1 (12:00), 3 and 2 (11:00), 5 and 4 (10:00), 7 and 6 (09:00)
+    assert asyncio.run(_pages(2)) == [[1, 3], [2, 5], [4, 7], [6]]
+    assert asyncio.run(_pages(None)) == [[1, 3, 2, 5, 4, 7, 6]]
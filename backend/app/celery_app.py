@@ -0,0 +1,84 @@
+"""
+Celery application (worker: celery -A app.celery_app worker, scheduler:
+celery -A app.celery_app beat)
+"""
+from celery import Celery
+
+from app.core.config import settings
+
+celery_app = Celery(
+    "equilibria",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND
+)
+
+celery_app.conf.beat_schedule = {
+    "drain-wearable-ingest": {
+        "task": "app.celery_app.drain_wearable_ingest",
+        "schedule": settings.WEARABLE_INGEST_DRAIN_INTERVAL_SECONDS,
+    },
+    "maintain-partitions": {
+        "task": "app.celery_app.maintain_partitions",
+        "schedule": 24 * 60 * 60,
+    },
+    "reap-import-jobs": {
+        "task": "app.celery_app.reap_import_jobs",
+        "schedule": 5 * 60,
+    },
+    "prune-refresh-tokens": {
+        "task": "app.celery_app.prune_refresh_tokens",
+        "schedule": 24 * 60 * 60,
+    },
+}
+
+# Drainer lock lifetime, renewed before every batch; longer than one batch
+# so a live drainer never loses it
+DRAIN_LOCK_SECONDS = 60
+DRAIN_MAX_SECONDS = 30
+
+
+@celery_app.task(name="app.celery_app.drain_wearable_ingest", ignore_result=True)
+def drain_wearable_ingest():
+    """Group-commit queued /wearables/sync/async receipts"""
+    from app.services.ingest_queue import RedisIngestQueue, drain, get_ingest_queue
+
+    queue = get_ingest_queue()
+    if not isinstance(queue, RedisIngestQueue):
+        return 0
+    token = queue.acquire_drainer(DRAIN_LOCK_SECONDS)
+    if token is None:
+        return 0  # another worker is draining
+    try:
+        return drain(
+            queue,
+            max_seconds=DRAIN_MAX_SECONDS,
+            keep_alive=lambda: queue.extend_drainer(token, DRAIN_LOCK_SECONDS)
+        )
+    finally:
+        queue.release_drainer(token)
+
+
+@celery_app.task(name="app.celery_app.maintain_partitions", ignore_result=True)
+def maintain_partitions():
+    """Create upcoming monthly partitions and apply retention"""
+    from app.jobs.maintain_partitions import run_maintenance
+
+    run_maintenance()
+
+
+@celery_app.task(name="app.celery_app.reap_import_jobs", ignore_result=True)
+def reap_import_jobs():
+    """Fail bulk imports whose API worker died mid-job"""
+    from app.db.session import SessionLocal
+    from app.services.health_import import reap_stalled_import_jobs
+
+    with SessionLocal() as db:
+        return reap_stalled_import_jobs(db)
+
+
+@celery_app.task(name="app.celery_app.prune_refresh_tokens", ignore_result=True)
+def prune_refresh_tokens():
+    """Delete expired and revoked refresh token families"""
+    from app.jobs.prune_refresh_tokens import main
+
+    main()
@@ -1,17 +1,18 @@
 """
 Security utilities: Password hashing, JWT token creation/validation
 """
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.db.models import User
+from app.services.user_cache import cache_claims, get_cached_claims, load_user
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -35,9 +36,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+        expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -45,34 +46,62 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(
+def create_refresh_token(user_id: int, family_id: str, jti: str, expires_at: datetime) -> str:
+    """Create a refresh JWT for one rotation of a token family"""
+    to_encode = {"sub": str(user_id), "type": "refresh", "fam": family_id, "jti": jti, "exp": expires_at}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    """Claims of a valid, unexpired refresh JWT, else None"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "refresh" or not payload.get("fam") or not payload.get("jti"):
+        return None
+    return payload
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
-    """Validate JWT token and return current user"""
+    """Validate JWT token and return current user (cached, see app.services.user_cache)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    payload = get_cached_claims(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
             raise credentials_exception
-    except JWTError:
+        cache_claims(token, payload)
+    
+    user_id: str = payload.get("sub")
+    if user_id is None or payload.get("type") == "refresh":
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await load_user(db, int(user_id))
     if user is None:
         raise credentials_exception
     
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Ensure user is active"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Ensure user is an active admin"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
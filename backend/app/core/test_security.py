@@ -0,0 +1,19 @@
+"""Tests for access and refresh token handling."""
+from datetime import datetime, timedelta, timezone
+
+from app.core.security import create_access_token, create_refresh_token, decode_refresh_token
+
+
+def test_refresh_tokens_are_not_access_tokens():
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    claims = decode_refresh_token(create_refresh_token(7, "family", "jti", expires_at))
+    assert (claims["sub"], claims["fam"], claims["jti"]) == ("7", "family", "jti")
+
+    assert decode_refresh_token(create_access_token({"sub": "7"})) is None
+    assert decode_refresh_token(create_refresh_token(7, "family", "jti", expires_at - timedelta(days=2))) is None
+
+
+def test_refresh_token_is_reproducible_from_its_claims():
+    # A grace-window reuse hands out the token the other request was issued
+    expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+    assert create_refresh_token(7, "family", "jti", expires_at) == create_refresh_token(7, "family", "jti", expires_at)
@@ -0,0 +1,231 @@
+"""
+Per-request SQL instrumentation
+
+Cursor-execute hooks on the sync and async engines count every statement,
+time it, and add it to the stats of the request it runs in. The stats are
+held in a ContextVar, which is visible from the async engine's greenlets
+and from threadpool calls. QueryStatsMiddleware opens the stats for each
+HTTP request. It binds them into the structlog context, returns them as
+response headers when SQL_STATS_HEADERS is on, and logs:
+
+- statements slower than SQL_SLOW_QUERY_MS (jobs and workers included);
+- requests that run the same statement SQL_N_PLUS_ONE_THRESHOLD or more
+  times, the N+1 pattern of one query per item.
+
+The statement text is the parameterized SQL, so one statement run with
+different ids is still the same statement. Hook cost is two perf_counter
+calls, a ContextVar lookup and a dict increment per statement, so it stays
+on in production. SQL_ECHO is the statement dump DEBUG used to turn on.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+N_PLUS_ONE_HEADER = "X-DB-N-Plus-One"
+
+# Longest statement text kept in logs
+STATEMENT_LOG_CHARS = 500
+
+_START_STACK = "equilibria_query_start"
+
+
+class RequestQueryStats:
+    """Statements run while handling one request"""
+
+    __slots__ = ("count", "total_seconds", "slowest_seconds", "slowest_statement", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements run at least `threshold` times, most repeated first"""
+        if self.count < threshold:
+            return []
+        return sorted(
+            ((statement, runs) for statement, runs in self.statements.items() if runs >= threshold),
+            key=lambda item: item[1],
+            reverse=True
+        )
+
+    def summary(self) -> Dict:
+        return {
+            "db_queries": self.count,
+            "db_time_ms": round(self.total_seconds * 1000, 2),
+            "db_slowest_ms": round(self.slowest_seconds * 1000, 2)
+        }
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("equilibria_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    """Stats of the request being handled, or None outside a request"""
+    return _current_stats.get()
+
+
+class _WorkerTotals:
+    """Counters across every request this worker has served"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.max_queries = 0
+        self.slow_queries = 0
+        self.n_plus_one_requests = 0
+
+    def add_request(self, stats: RequestQueryStats, n_plus_one: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.queries += stats.count
+            self.db_seconds += stats.total_seconds
+            self.max_queries = max(self.max_queries, stats.count)
+            if n_plus_one:
+                self.n_plus_one_requests += 1
+
+    def add_slow_query(self) -> None:
+        with self._lock:
+            self.slow_queries += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            requests = self.requests or 1
+            return {
+                "requests": self.requests,
+                "queries": self.queries,
+                "avg_queries_per_request": round(self.queries / requests, 2),
+                "max_queries_per_request": self.max_queries,
+                "avg_db_time_ms": round(self.db_seconds * 1000 / requests, 2),
+                "slow_queries": self.slow_queries,
+                "n_plus_one_requests": self.n_plus_one_requests
+            }
+
+
+_totals = _WorkerTotals()
+
+
+def query_metrics() -> Dict:
+    """SQL counters of this worker, for the /health/sql endpoint"""
+    return {
+        **_totals.snapshot(),
+        "slow_query_ms": settings.SQL_SLOW_QUERY_MS,
+        "n_plus_one_threshold": settings.SQL_N_PLUS_ONE_THRESHOLD
+    }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_STACK, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info[_START_STACK].pop()
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+    if seconds * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        _totals.add_slow_query()
+        logger.warning(
+            "Slow query",
+            duration_ms=round(seconds * 1000, 2),
+            statement=statement[:STATEMENT_LOG_CHARS],
+            executemany=executemany
+        )
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_START_STACK):
+        connection.info[_START_STACK].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement `engine` runs (a sync Engine, or an AsyncEngine's sync_engine)"""
+    if not settings.SQL_INSTRUMENTATION or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def finish_request(stats: RequestQueryStats, path: str) -> None:
+    """Bind `stats` into the structlog context and log an N+1 pattern if one ran"""
+    structlog.contextvars.bind_contextvars(**stats.summary())
+
+    repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+    _totals.add_request(stats, bool(repeated))
+
+    if repeated:
+        statement, runs = repeated[0]
+        logger.warning(
+            "N+1 query pattern",
+            path=path,
+            repeated_statements=len(repeated),
+            runs=runs,
+            statement=statement[:STATEMENT_LOG_CHARS]
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that collects RequestQueryStats for each HTTP request.
+    With SQL_STATS_HEADERS on, the stats go out as headers on the response
+    start. Statements run while a streamed body is sent are not in the
+    headers, but they are in the log context and the worker totals.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_INSTRUMENTATION:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        stats_token = _current_stats.set(stats)
+        log_tokens = structlog.contextvars.bind_contextvars(path=scope["path"])
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and settings.SQL_STATS_HEADERS:
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.encode(), str(stats.count).encode()))
+                headers.append((QUERY_TIME_HEADER.encode(), f"{stats.total_seconds * 1000:.2f}".encode()))
+                repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+                if repeated:
+                    headers.append((N_PLUS_ONE_HEADER.encode(), str(repeated[0][1]).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            finish_request(stats, scope["path"])
+            structlog.contextvars.reset_contextvars(**log_tokens)
+            structlog.contextvars.unbind_contextvars(*stats.summary())
+            _current_stats.reset(stats_token)
@@ -1,7 +1,7 @@
 """
 SQLAlchemy Database Models for Equilibria
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey, Boolean, Text, JSON, LargeBinary, Index, UniqueConstraint, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -30,14 +30,23 @@ class User(Base):
     wearable_data = relationship("WearableData", back_populates="user", cascade="all, delete-orphan")
     workouts = relationship("Workout", back_populates="user", cascade="all, delete-orphan")
     workout_sessions = relationship("WorkoutSession", back_populates="user", cascade="all, delete-orphan")
+    baseline = relationship("UserBaseline", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    import_jobs = relationship("ImportJob", back_populates="user", cascade="all, delete-orphan")
 
 
 class RecoveryLog(Base):
     __tablename__ = "recovery_logs"
+    __table_args__ = (
+        # latest / history (keyset on date, id) / stats partial day
+        Index("ix_recovery_logs_user_id_date", "user_id", "date", "id"),
+        # Monthly partitions, see app.services.partitions
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    # The partition key has to be part of the primary key
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    date = Column(DateTime(timezone=True), server_default=func.now())
+    date = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     
     # Manual inputs
     sleep_hours = Column(Float, nullable=True)
@@ -49,6 +58,7 @@ class RecoveryLog(Base):
     # Calculated score
     recovery_score = Column(Float, nullable=True)
     recommended_intensity = Column(String, nullable=True)
+    engine_version = Column(String, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -56,10 +66,40 @@ class RecoveryLog(Base):
     user = relationship("User", back_populates="recovery_logs")
 
 
+class RecoveryDailyRollup(Base):
+    """Per-user, per-day recovery aggregates maintained on every check-in"""
+    __tablename__ = "recovery_daily_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC date of RecoveryLog.date
+    
+    log_count = Column(Integer, nullable=False, default=0)
+    score_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_min = Column(Float, nullable=True)
+    score_max = Column(Float, nullable=True)
+    
+    last_logged_at = Column(DateTime(timezone=True), nullable=True)
+    last_recommendation = Column(String, nullable=True)
+
+
 class WearableData(Base):
     __tablename__ = "wearable_data"
+    __table_args__ = (
+        # latest / history (keyset on measurement_date, id) / check-in lookup
+        Index("ix_wearable_data_user_id_measurement_date", "user_id", "measurement_date", "id"),
+        # one row per reading; backs sync dedup, batch upserts and
+        # source-filtered history
+        UniqueConstraint(
+            "user_id", "source", "measurement_date",
+            name="uq_wearable_data_user_id_source_measurement_date"
+        ),
+        # Monthly partitions, see app.services.partitions
+        {"postgresql_partition_by": "RANGE (measurement_date)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    # The partition key (measurement_date) has to be part of the primary key
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     source = Column(String, nullable=False)
@@ -82,16 +122,220 @@ class WearableData(Base):
     steps = Column(Integer, nullable=True)
     active_calories = Column(Integer, nullable=True)
     
-    raw_data = Column(JSON, nullable=True)
-    measurement_date = Column(DateTime(timezone=True), nullable=False)
+    # Raw device payload lives compressed in wearable_raw_payloads; only the
+    # content hash is stored on the (hot) reading row
+    raw_data_digest = Column(String(64), ForeignKey("wearable_raw_payloads.digest"), nullable=True, index=True)
+    measurement_date = Column(DateTime(timezone=True), primary_key=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="wearable_data")
+    # Never loaded implicitly; see GET /wearables/{id}/raw
+    raw_payload = relationship("WearableRawPayload", lazy="raise")
+
+
+class WearableRRSeries(Base):
+    """Raw RR-interval recording behind a reading's HRV values, stored packed"""
+    __tablename__ = "wearable_rr_series"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: wearable_data is partitioned and its id alone is not a
+    # key. Rows are removed with their reading (/wearables/clear, retention).
+    wearable_data_id = Column(Integer, nullable=False, unique=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    
+    # Little-endian int16 or float32 milliseconds (see integration.hrv)
+    encoding = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    
+    beat_count = Column(Integer, nullable=False)
+    artifact_count = Column(Integer, nullable=False)
+    pnn50 = Column(Float, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class WearableRawPayload(Base):
+    """Compressed raw wearable payload, shared by every reading with the same content"""
+    __tablename__ = "wearable_raw_payloads"
+    
+    digest = Column(String(64), primary_key=True)  # sha256 of the canonical JSON
+    encoding = Column(String, nullable=False, default="zlib")
+    size_bytes = Column(Integer, nullable=False)  # uncompressed
+    data = Column(LargeBinary, nullable=False)
+    
+    # Touched on every re-use; pruning skips recently referenced payloads
+    last_referenced_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class WearableRollup(Base):
+    """
+    Per-user, per-source wearable aggregates at day, week (ISO, Monday
+    start) and month resolution, kept in step with wearable_data on every
+    sync and delete (see app.services.wearable_rollups)
+    """
+    __tablename__ = "wearable_rollups"
+    
+    # Key order serves history with or without a source filter
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    resolution = Column(String, primary_key=True)  # day, week, month
+    period_start = Column(Date, primary_key=True)  # UTC
+    source = Column(String, primary_key=True)
+    
+    reading_count = Column(Integer, nullable=False, default=0)
+    
+    # count/sum (for means that compose across periods), min, max
+    hrv_count = Column(Integer, nullable=False, default=0)
+    hrv_sum = Column(Float, nullable=False, default=0)
+    hrv_min = Column(Float, nullable=True)
+    hrv_max = Column(Float, nullable=True)
+    
+    rhr_count = Column(Integer, nullable=False, default=0)
+    rhr_sum = Column(Float, nullable=False, default=0)
+    rhr_min = Column(Integer, nullable=True)
+    rhr_max = Column(Integer, nullable=True)
+    
+    sleep_count = Column(Integer, nullable=False, default=0)
+    sleep_sum = Column(Float, nullable=False, default=0)
+    sleep_min = Column(Integer, nullable=True)
+    sleep_max = Column(Integer, nullable=True)
+    
+    steps_sum = Column(BigInteger, nullable=True)
+    active_calories_sum = Column(BigInteger, nullable=True)
+
+
+class WearableDailyFused(Base):
+    """
+    One fused wearable record per user per UTC day: each metric group comes
+    from the highest-priority source that reported it that day (see
+    app.services.wearable_fusion). Read by the recovery check-in.
+    """
+    __tablename__ = "wearable_daily_fused"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC
+    last_measurement_date = Column(DateTime(timezone=True), nullable=False)
+    
+    # *_measured_at: when the chosen reading was taken (activity: the
+    # source's latest reading that day)
+    hrv_source = Column(String, nullable=True)
+    hrv_measured_at = Column(DateTime(timezone=True), nullable=True)
+    hrv_rmssd = Column(Float, nullable=True)
+    hrv_sdnn = Column(Float, nullable=True)
+    
+    heart_rate_source = Column(String, nullable=True)
+    heart_rate_measured_at = Column(DateTime(timezone=True), nullable=True)
+    resting_heart_rate = Column(Integer, nullable=True)
+    avg_heart_rate = Column(Integer, nullable=True)
+    
+    sleep_source = Column(String, nullable=True)
+    sleep_measured_at = Column(DateTime(timezone=True), nullable=True)
+    sleep_duration_minutes = Column(Integer, nullable=True)
+    deep_sleep_minutes = Column(Integer, nullable=True)
+    rem_sleep_minutes = Column(Integer, nullable=True)
+    
+    # Day total from the chosen source
+    activity_source = Column(String, nullable=True)
+    activity_measured_at = Column(DateTime(timezone=True), nullable=True)
+    steps = Column(BigInteger, nullable=True)
+    active_calories = Column(BigInteger, nullable=True)
+
+
+class UserBaseline(Base):
+    """Rolling personal HRV / resting HR baseline, updated on every wearable sync"""
+    __tablename__ = "user_baselines"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    
+    # Exponentially weighted mean/variance (see integration.baselines)
+    hrv_count = Column(Integer, nullable=False, default=0)
+    hrv_mean = Column(Float, nullable=True)
+    hrv_variance = Column(Float, nullable=True)
+    
+    rhr_count = Column(Integer, nullable=False, default=0)
+    rhr_mean = Column(Float, nullable=True)
+    rhr_variance = Column(Float, nullable=True)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="baseline")
+
+
+class UserWorkload(Base):
+    """
+    Running training-load state per user (EWMA acute/chronic load plus the
+    last week of daily loads), updated on every logged session
+    """
+    __tablename__ = "user_workloads"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    
+    # See integration.workload
+    acute_load = Column(Float, nullable=False, default=0.0)
+    chronic_load = Column(Float, nullable=False, default=0.0)
+    daily_loads = Column(JSON, nullable=False)  # newest day first
+    last_load_date = Column(Date, nullable=True)
+    first_load_date = Column(Date, nullable=True)
+    session_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RefreshTokenFamily(Base):
+    """
+    One login's chain of rotated refresh tokens (see
+    app.services.refresh_tokens); only current_jti may be redeemed, or
+    previous_jti briefly after rotated_at
+    """
+    __tablename__ = "refresh_token_families"
+    
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    current_jti = Column(String(32), nullable=False)
+    previous_jti = Column(String(32), nullable=True)
+    rotated_at = Column(DateTime(timezone=True), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ImportJob(Base):
+    """Progress of a bulk health-data import (see app.services.health_import)"""
+    __tablename__ = "import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    format = Column(String, nullable=False)  # apple_health_xml, ndjson, csv
+    filename = Column(String, nullable=True)
+    
+    # Progress
+    bytes_total = Column(BigInteger, nullable=True)
+    bytes_processed = Column(BigInteger, nullable=False, default=0)
+    records_parsed = Column(Integer, nullable=False, default=0)
+    records_rejected = Column(Integer, nullable=False, default=0)
+    rows_written = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Written with progress; a stale heartbeat means the worker died
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    user = relationship("User", back_populates="import_jobs")
 
 
 class Workout(Base):
     __tablename__ = "workouts"
+    __table_args__ = (
+        Index("ix_workouts_user_id_created_at", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -111,6 +355,9 @@ class Workout(Base):
 
 class WorkoutSession(Base):
     __tablename__ = "workout_sessions"
+    __table_args__ = (
+        Index("ix_workout_sessions_user_id_session_date", "user_id", "session_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -129,21 +376,65 @@ class WorkoutSession(Base):
 
 
 class ExercisePerformance(Base):
+    """Normalized sets from WorkoutSession.exercises_completed (see app.services.exercise_performance)"""
     __tablename__ = "exercise_performance"
+    __table_args__ = (
+        # Per-exercise history, newest first, keyset-paginated on (performed_at, id)
+        Index(
+            "ix_exercise_performance_user_id_exercise_name_performed_at",
+            "user_id", "exercise_name", "performed_at", "id"
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    session_id = Column(Integer, ForeignKey("workout_sessions.id"), nullable=False)
+    session_id = Column(Integer, ForeignKey("workout_sessions.id"), nullable=False, index=True)
     
     exercise_name = Column(String, nullable=False, index=True)
     exercise_id = Column(String, nullable=True)
     
+    # The session's session_date, copied so history never joins sessions
+    performed_at = Column(DateTime(timezone=True), nullable=False)
+    
     weight_kg = Column(Float, nullable=True)
     reps = Column(Integer, nullable=False)
     sets = Column(Integer, nullable=False)
-    rpe = Column(Integer, nullable=True)
+    rpe = Column(Float, nullable=True)  # half points (8.5) are common
     
     estimated_1rm = Column(Float, nullable=True)
     suggested_next_weight = Column(Float, nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PersonalRecord(Base):
+    """
+    Per-user, per-exercise personal records, updated from each logged
+    session's sets (see app.services.personal_records)
+    """
+    __tablename__ = "personal_records"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    exercise_name = Column(String, primary_key=True)
+    
+    best_weight_kg = Column(Float, nullable=True)
+    best_weight_reps = Column(Integer, nullable=True)
+    best_weight_at = Column(DateTime(timezone=True), nullable=True)
+    
+    best_estimated_1rm = Column(Float, nullable=True)
+    best_estimated_1rm_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Best reps at each load: {"100": {"reps": 5, "achieved_at": "..."}}
+    rep_maxes = Column(JSON, nullable=False, default=dict)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# create_all (tests, fresh databases) gets a catch-all partition so inserts
+# work before app.services.partitions has created the monthly ones
+for _table in (RecoveryLog.__table__, WearableData.__table__):
+    event.listen(
+        _table,
+        "after_create",
+        DDL("CREATE TABLE %(table)s_default PARTITION OF %(table)s DEFAULT").execute_if(dialect="postgresql")
+    )
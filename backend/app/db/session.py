@@ -1,26 +1,70 @@
 """
 Database session management
+
+Route handlers use the async engine (psycopg 3) through get_async_db; the
+sync engine (psycopg2) stays for Alembic, jobs, Celery tasks and the
+background import/ingest workers. Sync service helpers are called from
+async handlers with AsyncSession.run_sync.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.instrumentation import instrument_engine
 
 # Create engine
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=settings.DEBUG
+    echo=settings.SQL_ECHO
 )
+instrument_engine(engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-# Dependency to get DB session
-def get_db():
-    """Database session dependency for FastAPI endpoints"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+def async_database_url() -> str:
+    """
+    ASYNC_DATABASE_URL, or DATABASE_URL on the psycopg 3 driver, which
+    binds naive datetimes and JSON the same way psycopg2 does
+    """
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+
+
+# Created on first use so jobs and Alembic never need the async driver
+_async_engine = None
+
+# No expiry on commit: an expired attribute would need a lazy load, which
+# async sessions cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(),
+            pool_pre_ping=True,
+            pool_size=settings.ASYNC_DB_POOL_SIZE,
+            max_overflow=settings.ASYNC_DB_MAX_OVERFLOW,
+            echo=settings.SQL_ECHO
+        )
+        instrument_engine(_async_engine.sync_engine)
+        AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+def async_session() -> AsyncSession:
+    """A new AsyncSession on the (lazily created) async engine"""
+    get_async_engine()
+    return AsyncSessionLocal()
+
+
+async def get_async_db():
+    """Async database session dependency for FastAPI endpoints"""
+    async with async_session() as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""Tests for per-request SQL instrumentation."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.security import get_current_active_user
+from app.db.instrumentation import QueryStatsMiddleware, instrument_engine
+from app.db.models import User
+from main import app
+
+
+def test_query_stats_flag_repeated_statements(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_STATS_HEADERS", True)
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+
+    stats_app = FastAPI()
+    stats_app.add_middleware(QueryStatsMiddleware)
+
+    @stats_app.get("/items")
+    def read_items(n: int):
+        with engine.connect() as conn:
+            for item_id in range(n):
+                conn.execute(text("SELECT :id"), {"id": item_id})
+        return {}
+
+    client = TestClient(stats_app)
+    r = client.get("/items", params={"n": 2})
+    assert r.headers["X-DB-Query-Count"] == "2"
+    assert float(r.headers["X-DB-Time-Ms"]) >= 0
+    assert "X-DB-N-Plus-One" not in r.headers
+
+    r = client.get("/items", params={"n": settings.SQL_N_PLUS_ONE_THRESHOLD})
+    assert r.headers["X-DB-N-Plus-One"] == str(settings.SQL_N_PLUS_ONE_THRESHOLD)
+
+
+def test_query_stats_stay_private_by_default():
+    client = TestClient(app)
+    assert not any(header.startswith("x-db-") for header in client.get("/health").headers)
+
+    user = User(id=1, email="ops@example.com", username="ops", is_active=True, is_admin=False)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    try:
+        assert client.get("/health/sql").status_code == 403
+        assert client.get("/api/v1/wearables/ingest/metrics").status_code == 403
+
+        user.is_admin = True
+        r = client.get("/health/sql")
+        assert r.status_code == 200
+        assert r.json()["n_plus_one_threshold"] == settings.SQL_N_PLUS_ONE_THRESHOLD
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,9 @@
+"""Tests for the sync and async engine setup."""
+from app.core.config import settings
+from app.db.session import async_database_url
+
+
+def test_async_database_url_keeps_credentials():
+    url = async_database_url()
+    assert url.startswith("postgresql+psycopg://")
+    assert url.split("://", 1)[1] == settings.DATABASE_URL.split("://", 1)[1]
@@ -0,0 +1,160 @@
+"""
+Write ExercisePerformance rows for workout sessions logged before ingest
+normalized them, then fill their 1RM estimates and next-load suggestions
+
+Walks workout_sessions in id order, in batches, skipping sessions that
+already have rows, and bulk-inserts the normalized sets of each batch in
+one transaction. Rows without an estimate are then scored in batches with
+the vectorized load engine, each against the recovery score logged in the
+24h before it, and written back with one bulk UPDATE per batch. Safe to
+interrupt and re-run: finished sessions and rows are skipped on the next
+pass (`--all` re-scores every row, e.g. after changing the engine).
+
+Usage:
+    python -m app.jobs.backfill_exercise_performance [--batch-size 1000] [--all]
+"""
+import argparse
+import time
+from datetime import timedelta
+
+import structlog
+from sqlalchemy import exists, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+from app.db.models import ExercisePerformance, RecoveryLog, WorkoutSession
+from app.services.exercise_performance import apply_load_targets, normalize_exercises
+from integration.scoring_policy import get_active_policy
+
+logger = structlog.get_logger()
+
+
+def run_backfill(batch_size: int = 1000, rescore_all: bool = False) -> int:
+    """Backfill every session without rows and return how many rows were written"""
+    last_id = 0
+    sessions_done = 0
+    written = 0
+    started = time.perf_counter()
+
+    with Session(engine) as db:
+        while True:
+            sessions = db.execute(
+                select(
+                    WorkoutSession.id,
+                    WorkoutSession.user_id,
+                    WorkoutSession.session_date,
+                    WorkoutSession.created_at,
+                    WorkoutSession.exercises_completed
+                )
+                .where(
+                    WorkoutSession.id > last_id,
+                    ~exists().where(ExercisePerformance.session_id == WorkoutSession.id)
+                )
+                .order_by(WorkoutSession.id)
+                .limit(batch_size)
+            ).all()
+            if not sessions:
+                break
+
+            rows = [
+                {
+                    **row,
+                    "user_id": session.user_id,
+                    "session_id": session.id,
+                    "performed_at": session.session_date or session.created_at,
+                }
+                for session in sessions
+                for row in normalize_exercises(session.exercises_completed)
+            ]
+            if rows:
+                db.execute(insert(ExercisePerformance), rows)
+            db.commit()
+
+            last_id = sessions[-1].id
+            sessions_done += len(sessions)
+            written += len(rows)
+            logger.info(
+                "Exercise performance backfill batch committed",
+                sessions=sessions_done,
+                rows=written,
+                last_session_id=last_id
+            )
+
+    scored = fill_load_targets(batch_size, rescore_all)
+
+    logger.info(
+        "Exercise performance backfill finished",
+        sessions=sessions_done,
+        rows=written,
+        scored=scored,
+        seconds=round(time.perf_counter() - started, 1)
+    )
+    return written
+
+
+def fill_load_targets(batch_size: int = 1000, rescore_all: bool = False) -> int:
+    """Compute estimated_1rm / suggested_next_weight for rows missing them"""
+    policy = get_active_policy()
+    recovery_score = (
+        select(RecoveryLog.recovery_score)
+        .where(
+            RecoveryLog.user_id == ExercisePerformance.user_id,
+            RecoveryLog.date <= ExercisePerformance.performed_at,
+            RecoveryLog.date >= ExercisePerformance.performed_at - timedelta(days=1)
+        )
+        .order_by(RecoveryLog.date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    filters = [ExercisePerformance.weight_kg > 0]
+    if not rescore_all:
+        filters.append(ExercisePerformance.estimated_1rm.is_(None))
+
+    last_id = 0
+    scored = 0
+    with Session(engine) as db:
+        while True:
+            rows = db.execute(
+                select(
+                    ExercisePerformance.id,
+                    ExercisePerformance.weight_kg,
+                    ExercisePerformance.reps,
+                    ExercisePerformance.rpe,
+                    recovery_score.label("recovery_score")
+                )
+                .where(ExercisePerformance.id > last_id, *filters)
+                .order_by(ExercisePerformance.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            params = apply_load_targets(
+                [{"id": row.id, "weight_kg": row.weight_kg, "reps": row.reps, "rpe": row.rpe} for row in rows],
+                [row.recovery_score for row in rows],
+                policy
+            )
+            db.execute(update(ExercisePerformance), [
+                {key: row[key] for key in ("id", "estimated_1rm", "suggested_next_weight")}
+                for row in params
+            ])
+            db.commit()
+
+            last_id = rows[-1].id
+            scored += len(rows)
+            logger.info("Exercise load targets batch committed", rows=scored, last_id=last_id)
+
+    return scored
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Normalize existing workout sessions into ExercisePerformance rows")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--all", action="store_true", help="Re-score rows that already have estimates")
+    args = parser.parse_args(argv)
+
+    run_backfill(batch_size=args.batch_size, rescore_all=args.all)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Monthly partition maintenance for wearable_data and recovery_logs
+
+Drops months older than the configured retention (whole partitions, no
+row-by-row deletes or vacuum debt), then creates the partitions for the
+coming months and splits out any month that collected rows in the default
+partition. Runs daily from Celery beat; safe to run by hand at any time.
+
+Usage:
+    python -m app.jobs.maintain_partitions [--months-ahead 3] [--dry-run]
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import structlog
+
+from app.core.config import settings
+from app.db.session import engine
+from app.services.partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    drop_partitions_before,
+    maintain_partitions,
+    month_start
+)
+
+logger = structlog.get_logger()
+
+RETENTION_MONTHS = {
+    "wearable_data": lambda: settings.WEARABLE_DATA_RETENTION_MONTHS,
+    "recovery_logs": lambda: settings.RECOVERY_LOG_RETENTION_MONTHS,
+}
+
+
+def run_maintenance(months_ahead: int = None, dry_run: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(datetime.now(timezone.utc))
+    summary = {}
+
+    for table in PARTITIONED_TABLES:
+        # One transaction per table keeps its DDL locks short
+        conn = engine.connect()
+        try:
+            with conn.begin() as transaction:
+                dropped = []
+                retention = RETENTION_MONTHS[table]()
+                if retention:
+                    dropped = drop_partitions_before(conn, table, add_months(current, -retention))
+                created = maintain_partitions(conn, table, months_ahead)
+                if dry_run:
+                    transaction.rollback()
+        finally:
+            conn.close()
+
+        summary[table] = {"created": created, "dropped": dropped}
+        logger.info(
+            "Partition maintenance",
+            table=table,
+            created=created,
+            dropped=dropped,
+            dry_run=dry_run
+        )
+
+    return summary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Create upcoming monthly partitions and apply retention")
+    parser.add_argument("--months-ahead", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change, then roll back")
+    args = parser.parse_args(argv)
+
+    run_maintenance(months_ahead=args.months_ahead, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
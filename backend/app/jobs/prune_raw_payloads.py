@@ -0,0 +1,29 @@
+"""
+Delete raw wearable payloads that no reading references any more
+
+Readings share payloads by content hash, so deleting readings (e.g.
+/wearables/clear) leaves their payloads behind; run this periodically.
+
+Usage:
+    python -m app.jobs.prune_raw_payloads
+"""
+import structlog
+
+from app.db.session import SessionLocal
+from app.services.raw_payloads import prune_raw_payloads
+
+logger = structlog.get_logger()
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        count = prune_raw_payloads(db)
+        db.commit()
+        logger.info("Pruned raw wearable payloads", count=count)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Delete expired and revoked refresh token families
+
+Every password login adds a family and nothing else removes them; a
+revoked or expired family can never be redeemed again. Runs daily from
+Celery beat.
+
+Usage:
+    python -m app.jobs.prune_refresh_tokens
+"""
+import structlog
+
+from app.db.session import SessionLocal
+from app.services.refresh_tokens import prune_refresh_token_families
+
+logger = structlog.get_logger()
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        count = prune_refresh_token_families(db)
+        db.commit()
+        logger.info("Pruned refresh token families", count=count)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Rebuild the personal-record index from exercise_performance
+
+Run after backfilling exercise_performance, after a change to the 1RM
+formula (integration.load_engine.estimate_1rm), or to repair the index.
+Logging a session keeps it current otherwise.
+
+Usage:
+    python -m app.jobs.rebuild_personal_records [--user-id ID]
+"""
+import argparse
+import time
+
+import structlog
+
+from app.db.session import SessionLocal
+from app.services.personal_records import rebuild_personal_records
+
+logger = structlog.get_logger()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild personal_records from exercise_performance")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's records")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        written = rebuild_personal_records(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+
+    logger.info(
+        "Personal records rebuilt",
+        user_id=args.user_id,
+        records=written,
+        seconds=round(time.perf_counter() - started, 1)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Rebuild per-user workload state from workout history
+
+Run once after adding user_workloads, or to repair it. Logging a session
+keeps it current otherwise.
+
+Usage:
+    python -m app.jobs.rebuild_workloads [--user-id ID]
+"""
+import argparse
+import time
+
+import structlog
+
+from app.db.session import SessionLocal
+from app.services.workload import rebuild_user_workloads
+
+logger = structlog.get_logger()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild user_workloads from workout_sessions")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's state")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        users = rebuild_user_workloads(db, args.user_id)
+        db.commit()
+    finally:
+        db.close()
+
+    logger.info(
+        "Workloads rebuilt",
+        user_id=args.user_id,
+        users=users,
+        seconds=round(time.perf_counter() - started, 1)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Re-score stored RecoveryLog rows with the current recovery engine
+
+Streams recovery logs (joined to the fused wearable metrics the check-in
+would have used and to the user's HRV / resting HR baseline) through a
+server-side cursor, scores each chunk with the vectorized engine and
+writes it back with one bulk UPDATE. Baselines are only kept as running
+state, so rows are scored against the user's current baseline. With
+WORKLOAD_IN_RECOVERY_SCORE on, each row's acute:chronic workload ratio is
+recomputed from the sessions up to its check-in. Progress is
+checkpointed after every chunk, so an interrupted run resumes where it
+stopped. Daily recovery rollups are rebuilt once the rows are rescored.
+
+Usage:
+    python -m app.jobs.rescore_recovery [--chunk-size 5000] [--checkpoint FILE] [--all]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import timedelta, timezone
+from typing import Dict, List, Optional
+
+import structlog
+from sqlalchemy import Date, cast, func, select, update, or_, true
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import engine
+from app.db.models import RecoveryLog, UserBaseline, WearableDailyFused, WorkoutSession
+from app.services.recovery_rollups import rebuild_recovery_rollups
+from app.services.wearable_fusion import CHECKIN_METRICS
+from integration.baselines import scoring_baseline
+from integration.recovery_engine import BASELINE_COLUMNS, calculate_recovery_scores
+from integration.recommendation_rules import get_workout_recommendations
+from integration.scoring_policy import CompiledPolicy, get_active_policy
+from integration.workload import ACUTE_ALPHA, CHRONIC_ALPHA, acwr_risk
+
+logger = structlog.get_logger()
+
+DEFAULT_CHECKPOINT = "rescore_checkpoint.json"
+
+SCORE_COLUMNS = [
+    "sleep_hours",
+    "sleep_quality",
+    "soreness_level",
+    "energy_level",
+    "stress_level",
+    "hrv_rmssd",
+    "resting_heart_rate",
+    "sleep_duration_minutes",
+]
+
+# UserBaseline running state, turned into BASELINE_COLUMNS per row
+BASELINE_STATE_COLUMNS = [
+    "hrv_mean",
+    "hrv_variance",
+    "hrv_count",
+    "rhr_mean",
+    "rhr_variance",
+    "rhr_count",
+]
+
+# Workload EWMAs as of each check-in, turned into the acwr column per row
+WORKLOAD_STATE_COLUMNS = [
+    "acute_load",
+    "chronic_load",
+    "first_load_date",
+]
+
+
+def load_checkpoint(path: str, engine_version: str, rescore_all: bool = False) -> int:
+    """Return the last RecoveryLog id committed for `engine_version` in the same mode"""
+    if not os.path.exists(path):
+        return 0
+
+    with open(path) as f:
+        checkpoint = json.load(f)
+
+    # An --all run must not resume past rows a normal run skipped
+    if checkpoint.get("engine_version") != engine_version or checkpoint.get("rescore_all", False) != rescore_all:
+        return 0
+    return int(checkpoint.get("last_id", 0))
+
+
+def save_checkpoint(
+    path: str,
+    engine_version: str,
+    last_id: int,
+    processed: int,
+    rescore_all: bool = False
+) -> None:
+    """Atomically record progress"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(
+            {
+                "engine_version": engine_version,
+                "rescore_all": rescore_all,
+                "last_id": last_id,
+                "processed": processed,
+            },
+            f
+        )
+    os.replace(tmp_path, path)
+
+
+def _checkin_metric(metric: str, measured_at: str):
+    """
+    The log's `metric` as get_checkin_wearable reads it: from the fused rows
+    of the days touching the 24h before the check-in, newest day first,
+    measured within that window. Readings synced for later in the day are
+    ignored, as they did not exist at check-in.
+    """
+    since = RecoveryLog.date - timedelta(days=1)
+    value = getattr(WearableDailyFused, metric)
+    measured = getattr(WearableDailyFused, measured_at)
+    return (
+        select(value)
+        .where(
+            WearableDailyFused.user_id == RecoveryLog.user_id,
+            WearableDailyFused.day >= cast(func.timezone("UTC", since), Date),
+            WearableDailyFused.day <= cast(func.timezone("UTC", RecoveryLog.date), Date),
+            measured >= since,
+            measured <= RecoveryLog.date,
+            value.is_not(None),
+        )
+        .order_by(WearableDailyFused.day.desc())
+        .limit(1)
+        .scalar_subquery()
+        .label(metric)
+    )
+
+
+def _utc_day(column):
+    return cast(func.timezone("UTC", column), Date)
+
+
+def _workload_at_checkin():
+    """
+    The user's acute and chronic load as of each log's UTC day, summed over
+    the sessions up to the check-in: the EWMA state that
+    update_user_workload folds one session at a time.
+    """
+    age = _utc_day(RecoveryLog.date) - _utc_day(WorkoutSession.session_date)
+    load = func.coalesce(WorkoutSession.total_volume, 0.0)
+    return (
+        select(
+            func.sum(ACUTE_ALPHA * load * func.power(1 - ACUTE_ALPHA, age)).label("acute_load"),
+            func.sum(CHRONIC_ALPHA * load * func.power(1 - CHRONIC_ALPHA, age)).label("chronic_load"),
+            func.min(_utc_day(WorkoutSession.session_date)).label("first_load_date"),
+        )
+        .where(
+            WorkoutSession.user_id == RecoveryLog.user_id,
+            WorkoutSession.session_date <= RecoveryLog.date,
+        )
+        .lateral("workload")
+    )
+
+
+def build_rescore_query(
+    after_id: int,
+    engine_version: str,
+    rescore_all: bool = False,
+    with_workload: bool = False
+):
+    """
+    Logs after `after_id` in id order, each with the fused wearable metrics
+    of the 24h before the check-in (what log_recovery_data uses), the
+    user's baseline and, with `with_workload`, the workload at check-in.
+    """
+    query = (
+        select(
+            RecoveryLog.id,
+            RecoveryLog.date,
+            RecoveryLog.sleep_hours,
+            RecoveryLog.sleep_quality,
+            RecoveryLog.soreness_level,
+            RecoveryLog.energy_level,
+            RecoveryLog.stress_level,
+            *(_checkin_metric(metric, measured_at) for metric, measured_at in CHECKIN_METRICS.items()),
+            *(getattr(UserBaseline, name) for name in BASELINE_STATE_COLUMNS),
+        )
+        .select_from(RecoveryLog)
+        .outerjoin(UserBaseline, UserBaseline.user_id == RecoveryLog.user_id)
+        .where(RecoveryLog.id > after_id)
+        .order_by(RecoveryLog.id)
+    )
+
+    if with_workload:
+        workload = _workload_at_checkin()
+        query = query.add_columns(*(workload.c[name] for name in WORKLOAD_STATE_COLUMNS)).outerjoin(
+            workload, true()
+        )
+
+    if not rescore_all:
+        query = query.where(or_(
+            RecoveryLog.engine_version.is_(None),
+            RecoveryLog.engine_version != engine_version
+        ))
+
+    return query
+
+
+def checkin_acwr(row) -> Optional[float]:
+    """
+    The row's acute:chronic ratio, or None where log_recovery_data would
+    not have applied it (no load yet, or the chronic window not filled)
+    """
+    acute, chronic, first_load_date = (row._mapping[name] for name in WORKLOAD_STATE_COLUMNS)
+    if not chronic:
+        return None
+    acwr = round(acute / chronic, 2)
+    history_days = (row.date.astimezone(timezone.utc).date() - first_load_date).days + 1
+    if acwr_risk(acwr, history_days) == "insufficient_history":
+        return None
+    return acwr
+
+
+def rescore_rows(rows, policy: CompiledPolicy) -> List[Dict]:
+    """Score a chunk of joined rows and build bulk UPDATE parameters"""
+    columns = {name: [row._mapping[name] for row in rows] for name in SCORE_COLUMNS}
+    # Same baseline gating as get_scoring_baseline on check-in
+    baselines = [
+        scoring_baseline(*(row._mapping[name] for name in BASELINE_STATE_COLUMNS))
+        for row in rows
+    ]
+    for name in BASELINE_COLUMNS:
+        columns[name] = [baseline[name] for baseline in baselines]
+    if "acute_load" in rows[0]._mapping:
+        columns["acwr"] = [checkin_acwr(row) for row in rows]
+    scores = calculate_recovery_scores(columns, policy)
+    recommendations = get_workout_recommendations(scores, policy)
+
+    return [
+        {
+            # Full primary key (id, date); the date also prunes partitions
+            "id": row.id,
+            "date": row.date,
+            "recovery_score": float(score),
+            "recommended_intensity": recommendation,
+            "engine_version": policy.version,
+        }
+        for row, score, recommendation in zip(rows, scores, recommendations)
+    ]
+
+
+def run_backfill(
+    chunk_size: int = 5000,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    rescore_all: bool = False,
+    limit: Optional[int] = None
+) -> int:
+    """Re-score logs in chunks and return how many rows were updated"""
+    # One policy for the whole run, even if the active one is swapped midway
+    policy = get_active_policy()
+    with_workload = settings.WORKLOAD_IN_RECOVERY_SCORE
+    last_id = load_checkpoint(checkpoint_path, policy.version, rescore_all)
+    processed = 0
+    started = time.perf_counter()
+
+    logger.info(
+        "Recovery rescore started",
+        engine_version=policy.version,
+        resume_after_id=last_id,
+        chunk_size=chunk_size,
+        with_workload=with_workload
+    )
+
+    # Reads stream on their own connection so each chunk's UPDATE can be
+    # committed without closing the server-side cursor.
+    with engine.connect() as read_conn, Session(engine) as write_session:
+        result = read_conn.execution_options(
+            stream_results=True,
+            yield_per=chunk_size
+        ).execute(build_rescore_query(last_id, policy.version, rescore_all, with_workload))
+
+        for rows in result.partitions():
+            params = rescore_rows(rows, policy)
+            write_session.execute(update(RecoveryLog), params)
+            write_session.commit()
+
+            last_id = params[-1]["id"]
+            processed += len(params)
+            save_checkpoint(checkpoint_path, policy.version, last_id, processed, rescore_all)
+
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "Recovery rescore chunk committed",
+                rows=processed,
+                last_id=last_id,
+                rows_per_second=round(processed / elapsed) if elapsed else None
+            )
+
+            if limit is not None and processed >= limit:
+                break
+
+        if processed:
+            # Daily min/max/sum were built from the old scores
+            rebuild_recovery_rollups(write_session)
+            write_session.commit()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Recovery rescore finished",
+        rows=processed,
+        seconds=round(elapsed, 1),
+        engine_version=policy.version
+    )
+    return processed
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Re-score RecoveryLog rows with the current engine")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--all", action="store_true", help="Re-score rows already on the current engine version")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after roughly this many rows")
+    args = parser.parse_args(argv)
+
+    run_backfill(
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        rescore_all=args.all,
+        limit=args.limit
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Tests for the bulk recovery rescore job."""
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import RecoveryLog, User, WearableData, WorkoutSession
+from app.jobs.rescore_recovery import (
+    BASELINE_STATE_COLUMNS,
+    SCORE_COLUMNS,
+    build_rescore_query,
+    checkin_acwr,
+    load_checkpoint,
+    rescore_rows,
+    save_checkpoint,
+)
+from app.services.wearable_fusion import get_checkin_wearable
+from app.services.wearable_rollups import refresh_wearable_rollups
+from integration.baselines import scoring_baseline
+from integration.recovery_engine import calculate_recovery_score
+from integration.scoring_policy import get_active_policy
+from integration.workload import add_session_load, workload_snapshot
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+CHECKIN = {"sleep_hours": 7.0, "sleep_quality": 6, "soreness_level": 5, "energy_level": 6, "stress_level": 5}
+WEARABLE = {"hrv_rmssd": 48.0, "resting_heart_rate": 60, "sleep_duration_minutes": 420}
+BASELINE_STATE = {"hrv_mean": 40.0, "hrv_variance": 25.0, "hrv_count": 30,
+                  "rhr_mean": 58.0, "rhr_variance": 4.0, "rhr_count": 30}
+
+
+def _row(row_id, baseline_state):
+    mapping = {**CHECKIN, **WEARABLE, **baseline_state}
+    assert set(SCORE_COLUMNS + BASELINE_STATE_COLUMNS) <= set(mapping)
+    return SimpleNamespace(id=row_id, date=datetime(2026, 5, 1, tzinfo=timezone.utc), _mapping=mapping)
+
+
+def test_rescore_uses_each_users_baseline():
+    policy = get_active_policy()
+    no_baseline = dict.fromkeys(BASELINE_STATE_COLUMNS)
+    params = rescore_rows([_row(1, BASELINE_STATE), _row(2, no_baseline)], policy)
+
+    with_baseline = calculate_recovery_score(CHECKIN, WEARABLE, scoring_baseline(*BASELINE_STATE.values()), policy=policy)
+    population = calculate_recovery_score(CHECKIN, WEARABLE, policy=policy)
+    assert with_baseline != population
+    assert [p["recovery_score"] for p in params] == [with_baseline, population]
+    assert {p["engine_version"] for p in params} == {policy.version}
+
+
+def test_checkpoint_resumes_only_the_same_engine_version(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    assert load_checkpoint(path, "v2") == 0
+
+    save_checkpoint(path, "v2", last_id=5000, processed=5000)
+    assert load_checkpoint(path, "v2") == 5000
+    # A new engine version starts over
+    assert load_checkpoint(path, "v3") == 0
+    assert not (tmp_path / "checkpoint.json.tmp").exists()
+
+
+def test_checkpoint_is_not_shared_between_modes(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    # A finished normal run only visited out-of-date rows...
+    save_checkpoint(path, "v2", last_id=9000, processed=120)
+    # ...so --all starts from the first row instead of resuming after it
+    assert load_checkpoint(path, "v2", rescore_all=True) == 0
+
+    save_checkpoint(path, "v2", last_id=4000, processed=4000, rescore_all=True)
+    assert load_checkpoint(path, "v2", rescore_all=True) == 4000
+    assert load_checkpoint(path, "v2") == 0
+
+
+def test_rescore_query_skips_rows_already_on_the_version():
+    pending = str(build_rescore_query(0, "v2"))
+    assert "recovery_logs.engine_version IS NULL OR recovery_logs.engine_version !=" in pending
+    assert "engine_version" not in str(build_rescore_query(0, "v2", rescore_all=True)).split("WHERE", 1)[1]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="rescore@example.com", username="rescore", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@requires_postgres
+def test_rescore_reads_the_fused_checkin_metrics(engine):
+    checked_in = datetime(2026, 6, 2, 12, 0, tzinfo=timezone.utc)
+    readings = [
+        # The strap's HRV outranks the phone's newer one
+        ("polar_h10", checked_in - timedelta(hours=6), {"hrv_rmssd": 55.0}),
+        ("apple_health", checked_in - timedelta(hours=5), {"hrv_rmssd": 40.0, "sleep_duration_minutes": 420}),
+        ("oura", checked_in - timedelta(hours=14), {"resting_heart_rate": 52}),
+    ]
+    with Session(engine) as db:
+        for source, at, metrics in readings:
+            db.add(WearableData(user_id=1, source=source, measurement_date=at, **metrics))
+        log = RecoveryLog(user_id=1, date=checked_in, **CHECKIN)
+        db.add(log)
+        refresh_wearable_rollups(db, 1, [checked_in.date() - timedelta(days=1), checked_in.date()])
+
+        expected = {"hrv_rmssd": 55.0, "resting_heart_rate": 52, "sleep_duration_minutes": 420}
+        assert get_checkin_wearable(db, 1, checked_in - timedelta(days=1)) == expected
+
+        # Synced later, but measured after the check-in: not what it used
+        db.add(WearableData(user_id=1, source="apple_health", measurement_date=checked_in + timedelta(hours=6),
+                            resting_heart_rate=70))
+        refresh_wearable_rollups(db, 1, [checked_in.date()])
+
+        row = db.execute(build_rescore_query(0, "v2")).one()
+        assert {name: row._mapping[name] for name in expected} == expected
+        db.rollback()
+
+
+@requires_postgres
+def test_rescore_applies_the_workload_at_each_checkin(engine):
+    start = datetime(2026, 3, 1, 18, 0, tzinfo=timezone.utc)
+    loads = [(day, 1000.0 + 150 * (day % 5)) for day in range(0, 42, 2)] + [(39, 4000.0), (41, 6000.0)]
+    checked_in = start + timedelta(days=40, hours=-6)
+    with Session(engine) as db:
+        for day, volume in loads:
+            db.add(WorkoutSession(user_id=1, session_date=start + timedelta(days=day),
+                                  exercises_completed=[], total_volume=volume))
+        db.add(RecoveryLog(user_id=1, date=checked_in, **CHECKIN))
+        db.add(RecoveryLog(user_id=1, date=start + timedelta(days=5), **CHECKIN))
+        db.flush()
+
+        state = None
+        for day, volume in sorted(loads):
+            if start + timedelta(days=day) <= checked_in:
+                state = add_session_load(state, (start + timedelta(days=day)).date(), volume)
+        snapshot = workload_snapshot(state, checked_in.date())
+        # The spike the day before counts, the one after the check-in does not
+        assert snapshot["risk"] == "elevated"
+
+        rows = db.execute(build_rescore_query(0, "v2", with_workload=True)).all()
+        late, early = sorted(rows, key=lambda row: row.date, reverse=True)
+        assert checkin_acwr(late) == snapshot["acwr"]
+        # Five days of history is too little for the ratio to count
+        assert checkin_acwr(early) is None
+
+        policy = get_active_policy()
+        scores = [params["recovery_score"] for params in rescore_rows([late, early], policy)]
+        assert scores[0] == calculate_recovery_score(CHECKIN, None, policy=policy, workload=snapshot)
+        assert scores[1] == calculate_recovery_score(CHECKIN, None, policy=policy)
+        db.rollback()
@@ -0,0 +1,142 @@
+"""
+Request/response schemas shared by the API routes and the ingest services
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+
+
+# ========== USERS ==========
+
+class UserRegister(BaseModel):
+    email: EmailStr
+    username: str = Field(..., min_length=3, max_length=50)
+    password: str = Field(..., min_length=8)
+
+
+class UserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    email: str
+    username: str
+    is_active: Optional[bool] = True
+    created_at: Optional[datetime] = None
+    height_cm: Optional[float] = None
+    weight_kg: Optional[float] = None
+    age: Optional[int] = None
+    fitness_level: Optional[str] = None
+
+
+# ========== RECOVERY ==========
+
+class RecoveryInput(BaseModel):
+    sleep_hours: Optional[float] = Field(None, ge=0, le=24, allow_inf_nan=False)
+    sleep_quality: int = Field(..., ge=1, le=10)
+    soreness_level: int = Field(..., ge=1, le=10)
+    energy_level: int = Field(..., ge=1, le=10)
+    stress_level: int = Field(..., ge=1, le=10)
+
+
+class RecoveryResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    user_id: int
+    date: datetime
+    sleep_hours: Optional[float] = None
+    sleep_quality: Optional[int] = None
+    soreness_level: Optional[int] = None
+    energy_level: Optional[int] = None
+    stress_level: Optional[int] = None
+    recovery_score: Optional[float] = None
+    recommended_intensity: Optional[str] = None
+    engine_version: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+# ========== WEARABLES ==========
+
+# "*" is reserved for the combined rows of wearable_rollups
+WEARABLE_SOURCE_PATTERN = r"^[^*]"
+
+
+class WearableDataInput(BaseModel):
+    source: str = Field(..., pattern=WEARABLE_SOURCE_PATTERN)  # apple_health, google_fit, polar_h10, ...
+    measurement_date: datetime
+    # NaN/inf would be stored as-is and poison baselines and rollups
+    hrv_rmssd: Optional[float] = Field(None, allow_inf_nan=False)
+    hrv_sdnn: Optional[float] = Field(None, allow_inf_nan=False)
+    resting_heart_rate: Optional[int] = None
+    avg_heart_rate: Optional[int] = None
+    sleep_duration_minutes: Optional[int] = None
+    deep_sleep_minutes: Optional[int] = None
+    rem_sleep_minutes: Optional[int] = None
+    steps: Optional[int] = None
+    active_calories: Optional[int] = None
+    raw_data: Optional[Dict[str, Any]] = None
+
+
+class WearableDataResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    user_id: int
+    source: str
+    measurement_date: datetime
+    sync_timestamp: Optional[datetime] = None
+    hrv_rmssd: Optional[float] = None
+    hrv_sdnn: Optional[float] = None
+    resting_heart_rate: Optional[int] = None
+    avg_heart_rate: Optional[int] = None
+    sleep_duration_minutes: Optional[int] = None
+    deep_sleep_minutes: Optional[int] = None
+    rem_sleep_minutes: Optional[int] = None
+    steps: Optional[int] = None
+    active_calories: Optional[int] = None
+
+
+# ========== WORKOUTS ==========
+
+class WorkoutCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    workout_type: Optional[str] = None
+    is_template: bool = False
+    exercises: List[Any] = []
+
+
+class WorkoutResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    user_id: int
+    name: str
+    description: Optional[str] = None
+    workout_type: Optional[str] = None
+    is_template: Optional[bool] = False
+    exercises: List[Any] = []
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class WorkoutSessionCreate(BaseModel):
+    workout_id: Optional[int] = None
+    duration_minutes: Optional[int] = Field(None, ge=0)
+    exercises_completed: List[Any] = []
+    notes: Optional[str] = None
+
+
+class WorkoutSessionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    user_id: int
+    workout_id: Optional[int] = None
+    session_date: Optional[datetime] = None
+    duration_minutes: Optional[int] = None
+    exercises_completed: List[Any] = []
+    total_volume: Optional[float] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
@@ -0,0 +1,18 @@
+"""Tests for the shared request schemas."""
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.auth import RecoveryInput, WearableDataInput
+
+CHECK_IN = {"sleep_quality": 7, "soreness_level": 3, "energy_level": 8, "stress_level": 4}
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), float("-inf")])
+def test_float_fields_reject_non_finite_numbers(value):
+    with pytest.raises(ValidationError):
+        RecoveryInput(**CHECK_IN, sleep_hours=value)
+    for field in ("hrv_rmssd", "hrv_sdnn"):
+        with pytest.raises(ValidationError):
+            WearableDataInput(source="polar_h10", measurement_date="2026-06-01T07:00:00Z", **{field: value})
+
+    assert RecoveryInput(**CHECK_IN, sleep_hours=7.5).sleep_hours == 7.5
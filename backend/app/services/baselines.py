@@ -0,0 +1,68 @@
+"""
+Per-user HRV / resting HR baselines
+
+Kept as a single running-state row per user so both maintaining it on sync
+and reading it on check-in are O(1), however much history the user has.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import UserBaseline
+from integration.baselines import update_ewma, scoring_baseline
+
+
+def _lock_baseline(db: Session, user_id: int) -> Optional[UserBaseline]:
+    return db.query(UserBaseline).filter(
+        UserBaseline.user_id == user_id
+    ).with_for_update().first()
+
+
+def update_user_baseline(
+    db: Session,
+    user_id: int,
+    samples: Iterable[Tuple[Optional[float], Optional[float]]]
+) -> Optional[UserBaseline]:
+    """
+    Fold (hrv_rmssd, resting_heart_rate) samples into the user's baseline.
+    Runs inside the caller's transaction; the row is locked so concurrent
+    syncs for the same user apply one after the other.
+    """
+    samples = [(hrv, rhr) for hrv, rhr in samples if hrv is not None or rhr is not None]
+    if not samples:
+        return None
+
+    baseline = _lock_baseline(db, user_id)
+    if baseline is None:
+        # First sync: create the row without racing a concurrent first sync,
+        # then lock whichever insert won
+        db.execute(
+            insert(UserBaseline)
+            .values(user_id=user_id, hrv_count=0, rhr_count=0)
+            .on_conflict_do_nothing(index_elements=[UserBaseline.user_id])
+        )
+        baseline = _lock_baseline(db, user_id)
+
+    for hrv, rhr in samples:
+        if hrv is not None:
+            baseline.hrv_mean, baseline.hrv_variance, baseline.hrv_count = update_ewma(
+                baseline.hrv_mean, baseline.hrv_variance, baseline.hrv_count, float(hrv)
+            )
+        if rhr is not None:
+            baseline.rhr_mean, baseline.rhr_variance, baseline.rhr_count = update_ewma(
+                baseline.rhr_mean, baseline.rhr_variance, baseline.rhr_count, float(rhr)
+            )
+
+    return baseline
+
+
+def get_scoring_baseline(db: Session, user_id: int) -> Optional[Dict]:
+    """Baseline dict for calculate_recovery_score, or None if the user has none yet"""
+    baseline = db.get(UserBaseline, user_id)
+    if baseline is None:
+        return None
+
+    return scoring_baseline(
+        baseline.hrv_mean, baseline.hrv_variance, baseline.hrv_count,
+        baseline.rhr_mean, baseline.rhr_variance, baseline.rhr_count
+    )
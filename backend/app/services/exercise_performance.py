@@ -0,0 +1,157 @@
+"""
+Normalized per-exercise set data
+
+WorkoutSession.exercises_completed keeps whatever the client sent. At
+ingest every entry is also written as ExercisePerformance rows (one per
+exercise, or one per set when the client sends a list of sets), so
+per-exercise history and analytics read an index on
+(user_id, exercise_name, performed_at) instead of parsing session JSON.
+Each row also carries its estimated 1RM and a recovery-adjusted load for
+next session (integration.load_engine), computed for the whole session in
+one vectorized pass.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import ExercisePerformance, RecoveryLog, WorkoutSession
+from integration.load_engine import compute_load_targets
+from integration.scoring_policy import CompiledPolicy
+
+NAME_KEYS = ("name", "exercise_name", "exercise")
+
+
+# Entries claiming more than this are skipped rather than stored
+MAX_REPS = 1000
+MAX_SETS = 100
+
+
+def _number(value) -> Optional[float]:
+    """A finite float, or None (NaN and +/-inf included)"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _field(entry: Dict, exercise: Dict, *keys: str):
+    """First of `keys` present on the set, else on the exercise"""
+    for source in (entry, exercise):
+        for key in keys:
+            if source.get(key) is not None:
+                return source[key]
+    return None
+
+
+def normalize_exercise_name(name: str) -> str:
+    return " ".join(name.split())
+
+
+def normalize_exercises(exercises: Iterable) -> List[Dict]:
+    """
+    Flatten an exercises_completed list into ExercisePerformance fields.
+
+    Accepts {"name", "weight", "reps", "sets", "rpe"} entries, where "sets"
+    is a count or a list of {"weight", "reps", "rpe"} sets (missing set
+    fields fall back to the exercise's). Entries without a name, without a
+    positive rep count, or with more than MAX_REPS reps or MAX_SETS sets
+    are skipped. Non-numeric and non-finite numbers count as missing.
+    """
+    rows = []
+    for exercise in exercises or []:
+        if not isinstance(exercise, dict):
+            continue
+        name = next((exercise[key] for key in NAME_KEYS if isinstance(exercise.get(key), str)), None)
+        if not name or not name.strip():
+            continue
+        exercise_id = exercise.get("exercise_id", exercise.get("id"))
+
+        sets = exercise.get("sets")
+        if isinstance(sets, list):
+            entries = [(entry, 1) for entry in sets if isinstance(entry, dict)]
+        else:
+            entries = [({}, _number(sets) or 1)]
+
+        for entry, set_count in entries:
+            reps = _number(_field(entry, exercise, "reps"))
+            if not reps or not 0 < reps <= MAX_REPS or set_count > MAX_SETS:
+                continue
+            rows.append({
+                "exercise_name": normalize_exercise_name(name),
+                "exercise_id": str(exercise_id) if exercise_id is not None else None,
+                "weight_kg": _number(_field(entry, exercise, "weight_kg", "weight")),
+                "reps": int(reps),
+                "sets": max(int(set_count), 1),
+                "rpe": _number(_field(entry, exercise, "rpe")),
+            })
+    return rows
+
+
+def total_volume(rows: Iterable[Dict]) -> float:
+    """weight x reps x sets over the normalized rows that carry a weight"""
+    return sum(row["weight_kg"] * row["reps"] * row["sets"] for row in rows if row["weight_kg"] is not None)
+
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def apply_load_targets(
+    rows: List[Dict],
+    recovery_scores,
+    policy: Optional[CompiledPolicy] = None
+) -> List[Dict]:
+    """
+    Fill estimated_1rm and suggested_next_weight on normalized rows in
+    place. `recovery_scores` is one score (or None) for every row, or a
+    sequence aligned with the rows.
+    """
+    if not rows:
+        return rows
+    if recovery_scores is None or np.isscalar(recovery_scores):
+        recovery_scores = [recovery_scores] * len(rows)
+    estimated, suggested = compute_load_targets({
+        "weight_kg": [row["weight_kg"] for row in rows],
+        "reps": [row["reps"] for row in rows],
+        "rpe": [row["rpe"] for row in rows],
+        "recovery_score": recovery_scores,
+    }, policy)
+    for row, one_rep_max, next_weight in zip(rows, _optional(estimated), _optional(suggested)):
+        row["estimated_1rm"] = one_rep_max
+        row["suggested_next_weight"] = next_weight
+    return rows
+
+
+def latest_recovery_score(db: Session, user_id: int, at: datetime) -> Optional[float]:
+    """The user's most recent recovery score from the 24h before `at`"""
+    return db.query(RecoveryLog.recovery_score).filter(
+        RecoveryLog.user_id == user_id,
+        RecoveryLog.date >= at - timedelta(days=1),
+        RecoveryLog.date <= at
+    ).order_by(RecoveryLog.date.desc()).limit(1).scalar()
+
+
+def record_exercise_performances(db: Session, session: WorkoutSession, rows: List[Dict]) -> int:
+    """
+    Bulk-insert normalized rows for a flushed session, in the caller's
+    transaction. Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    db.execute(insert(ExercisePerformance), [
+        {
+            **row,
+            "user_id": session.user_id,
+            "session_id": session.id,
+            "performed_at": session.session_date,
+        }
+        for row in rows
+    ])
+    return len(rows)
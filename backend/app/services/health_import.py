@@ -0,0 +1,371 @@
+"""
+Streaming import of full health-data exports
+
+Formats:
+- apple_health_xml: Apple Health export.xml (or the export.zip around it).
+  Parsed with iterparse, clearing each record once handled, and aggregated
+  into one WearableData row per local calendar day.
+- ndjson / csv: rows in the /wearables/sync/batch shape, upserted in
+  bounded batches with the usual merge semantics.
+
+Memory stays flat in the file size: XML holds one small aggregate per day
+of history, NDJSON/CSV at most one batch of rows. Lines that are not
+valid JSON objects count as rejected records. Progress is written to the
+ImportJob row so any worker can serve its status.
+
+Jobs run in the API process that took the upload, which is also where the
+spooled file is. If that process dies, the job stops updating heartbeat_at.
+reap_stalled_import_jobs (Celery beat, and API startup) then marks it
+failed, so it is not left "running" forever.
+"""
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import IO, Dict, Iterator, Optional, Tuple
+
+import structlog
+from pydantic import ValidationError
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.models import ImportJob
+from app.schemas.auth import WearableDataInput
+from app.services.wearable_ingest import (
+    UPSERT_CHUNK_SIZE,
+    ReadingKey,
+    ingest_readings,
+    merge_readings,
+)
+
+logger = structlog.get_logger()
+
+FORMATS = ("apple_health_xml", "ndjson", "csv")
+
+# How often running jobs write progress (and their heartbeat)
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+STALLED_JOB_ERROR = "Import stopped (worker restarted); upload the file again"
+
+# Apple Health record type -> (WearableData field, aggregation)
+APPLE_QUANTITY_TYPES = {
+    "HKQuantityTypeIdentifierHeartRateVariabilitySDNN": ("hrv_sdnn", "mean"),
+    "HKQuantityTypeIdentifierRestingHeartRate": ("resting_heart_rate", "mean"),
+    "HKQuantityTypeIdentifierHeartRate": ("avg_heart_rate", "mean"),
+    "HKQuantityTypeIdentifierStepCount": ("steps", "sum"),
+    "HKQuantityTypeIdentifierActiveEnergyBurned": ("active_calories", "sum"),
+}
+APPLE_SLEEP_TYPE = "HKCategoryTypeIdentifierSleepAnalysis"
+APPLE_ASLEEP_VALUES = {
+    "HKCategoryValueSleepAnalysisAsleep": None,
+    "HKCategoryValueSleepAnalysisAsleepUnspecified": None,
+    "HKCategoryValueSleepAnalysisAsleepCore": None,
+    "HKCategoryValueSleepAnalysisAsleepDeep": "deep_sleep_minutes",
+    "HKCategoryValueSleepAnalysisAsleepREM": "rem_sleep_minutes",
+}
+APPLE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+
+INTEGER_FIELDS = {
+    "resting_heart_rate",
+    "avg_heart_rate",
+    "sleep_duration_minutes",
+    "deep_sleep_minutes",
+    "rem_sleep_minutes",
+    "steps",
+    "active_calories",
+}
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith((".xml", ".zip")):
+        return "apple_health_xml"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    return None
+
+
+class CountingReader(io.RawIOBase):
+    """Wraps a binary stream and counts the bytes read through it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        self.bytes_read += len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class DailyAggregator:
+    """
+    Per-day aggregates of Apple Health samples.
+
+    Sums are kept per device (sourceName) and the largest device total is
+    used, because the raw export repeats steps/sleep recorded by both a
+    phone and a watch that the Health app would de-duplicate.
+    """
+
+    def __init__(self):
+        self.means: Dict[Tuple[str, str], list] = {}
+        self.sums: Dict[Tuple[str, str, str], float] = {}
+
+    def add_mean(self, day: str, field: str, value: float) -> None:
+        total = self.means.setdefault((day, field), [0.0, 0])
+        total[0] += value
+        total[1] += 1
+
+    def add_sum(self, day: str, field: str, device: str, value: float) -> None:
+        key = (day, field, device)
+        self.sums[key] = self.sums.get(key, 0.0) + value
+
+    def readings(self, source: str) -> Dict[ReadingKey, Dict]:
+        days: Dict[str, Dict] = {}
+        for (day, field), (total, count) in self.means.items():
+            days.setdefault(day, {})[field] = total / count
+        for (day, field, _), total in self.sums.items():
+            fields = days.setdefault(day, {})
+            fields[field] = max(fields.get(field, 0.0), total)
+
+        return merge_readings(
+            {
+                "source": source,
+                "measurement_date": datetime.fromisoformat(day).replace(tzinfo=timezone.utc),
+                **{
+                    field: round(value) if field in INTEGER_FIELDS else round(value, 1)
+                    for field, value in fields.items()
+                },
+            }
+            for day, fields in sorted(days.items())
+        )
+
+
+def iter_apple_health_records(stream) -> Iterator[Dict[str, str]]:
+    """Yield the attributes of each top-level Record, clearing as we go"""
+    context = ET.iterparse(stream, events=("start", "end"))
+    _, root = next(context)
+    depth = 1
+
+    for event, elem in context:
+        if event == "start":
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1:
+            # A direct child of <HealthData> is complete: use it, then drop
+            # it so the tree never grows
+            if elem.tag == "Record":
+                yield elem.attrib
+            root.clear()
+
+
+def aggregate_apple_health(stream, aggregator: DailyAggregator, progress) -> Tuple[int, int]:
+    """Fold an export.xml stream into `aggregator`; returns (parsed, rejected)"""
+    parsed = rejected = 0
+
+    for record in iter_apple_health_records(stream):
+        record_type = record.get("type")
+        try:
+            if record_type in APPLE_QUANTITY_TYPES:
+                field, how = APPLE_QUANTITY_TYPES[record_type]
+                value = float(record["value"])
+                if field == "active_calories" and record.get("unit") == "kJ":
+                    value /= 4.184
+                # startDate is local time, so its date is the user's day
+                day = record["startDate"][:10]
+                if how == "mean":
+                    aggregator.add_mean(day, field, value)
+                else:
+                    aggregator.add_sum(day, field, record.get("sourceName", ""), value)
+            elif record_type == APPLE_SLEEP_TYPE:
+                stage = record.get("value")
+                if stage not in APPLE_ASLEEP_VALUES:
+                    continue  # in bed / awake
+                start = datetime.strptime(record["startDate"], APPLE_DATE_FORMAT)
+                end = datetime.strptime(record["endDate"], APPLE_DATE_FORMAT)
+                minutes = (end - start).total_seconds() / 60.0
+                # Sleep counts toward the day the user woke up
+                day = record["endDate"][:10]
+                device = record.get("sourceName", "")
+                aggregator.add_sum(day, "sleep_duration_minutes", device, minutes)
+                if APPLE_ASLEEP_VALUES[stage]:
+                    aggregator.add_sum(day, APPLE_ASLEEP_VALUES[stage], device, minutes)
+            else:
+                continue
+            parsed += 1
+        except (KeyError, ValueError):
+            rejected += 1
+
+        progress(parsed, rejected)
+
+    return parsed, rejected
+
+
+def iter_rows(stream, fmt: str) -> Iterator[Optional[Dict]]:
+    """Rows of an NDJSON/CSV export; None for a line that is not a JSON object"""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        for row in csv.DictReader(text):
+            yield {key: value for key, value in row.items() if value not in ("", None)}
+    else:
+        for line in text:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else None
+
+
+class ImportProgress:
+    """Throttled progress writer for an ImportJob"""
+
+    def __init__(self, db: Session, job: ImportJob, reader: CountingReader):
+        self.db = db
+        self.job = job
+        self.reader = reader
+        self.next_write = time.monotonic() + PROGRESS_INTERVAL_SECONDS
+
+    def __call__(self, parsed: int, rejected: int, rows_written: Optional[int] = None, force: bool = False):
+        now = time.monotonic()
+        if not force and now < self.next_write:
+            return
+        self.next_write = now + PROGRESS_INTERVAL_SECONDS
+        self.job.heartbeat_at = datetime.now(timezone.utc)
+        self.job.bytes_processed = self.reader.bytes_read
+        self.job.records_parsed = parsed
+        self.job.records_rejected = rejected
+        if rows_written is not None:
+            self.job.rows_written = rows_written
+        self.db.commit()
+
+
+@contextmanager
+def _open_export(path: str) -> Iterator[IO[bytes]]:
+    """Binary stream of the export, looking inside Apple's export.zip"""
+    if not zipfile.is_zipfile(path):
+        with open(path, "rb") as raw:
+            yield raw
+        return
+    with zipfile.ZipFile(path) as archive:
+        name = next((name for name in archive.namelist() if name.endswith("export.xml")), None)
+        if name is None:
+            raise ValueError("No export.xml found in archive")
+        with archive.open(name) as raw:
+            yield raw
+
+
+def run_import_job(job_id: int, path: str, source: str) -> None:
+    """Process an uploaded export; runs after the upload request returns"""
+    db = SessionLocal()
+    job = db.get(ImportJob, job_id)
+    try:
+        job.status = "running"
+        job.started_at = job.heartbeat_at = datetime.now(timezone.utc)
+        db.commit()
+
+        with _open_export(path) as raw:
+            reader = CountingReader(raw)
+            stream = io.BufferedReader(reader, buffer_size=1 << 20)
+            progress = ImportProgress(db, job, reader)
+
+            if job.format == "apple_health_xml":
+                aggregator = DailyAggregator()
+                parsed, rejected = aggregate_apple_health(stream, aggregator, progress)
+                readings = aggregator.readings(source)
+                keys = list(readings)
+                written = 0
+                for start in range(0, len(keys), UPSERT_CHUNK_SIZE):
+                    chunk = {key: readings[key] for key in keys[start:start + UPSERT_CHUNK_SIZE]}
+                    written += len(ingest_readings(db, job.user_id, chunk))
+                    progress(parsed, rejected, written, force=True)
+            else:
+                parsed = rejected = written = 0
+                batch = []
+                for row in iter_rows(stream, job.format):
+                    if row is None:
+                        rejected += 1
+                    else:
+                        try:
+                            row.setdefault("source", source)
+                            batch.append(WearableDataInput.model_validate(row).model_dump())
+                            parsed += 1
+                        except ValidationError:
+                            rejected += 1
+                    if len(batch) >= UPSERT_CHUNK_SIZE:
+                        written += len(ingest_readings(db, job.user_id, merge_readings(batch)))
+                        batch = []
+                        progress(parsed, rejected, written, force=True)
+                    else:
+                        progress(parsed, rejected)
+                if batch:
+                    written += len(ingest_readings(db, job.user_id, merge_readings(batch)))
+
+            job.status = "completed"
+            job.finished_at = datetime.now(timezone.utc)
+            progress(parsed, rejected, written, force=True)
+
+        logger.info(
+            "Wearable import completed",
+            user_id=job.user_id,
+            job_id=job.id,
+            records=parsed,
+            rejected=rejected,
+            rows_written=written
+        )
+    except Exception as e:
+        db.rollback()
+        job = db.get(ImportJob, job_id)
+        job.status = "failed"
+        job.error = str(e)[:1000]
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.error("Wearable import failed", job_id=job_id, error=str(e))
+    finally:
+        db.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def reap_stalled_import_jobs(db: Session, stale_after_seconds: Optional[float] = None) -> int:
+    """
+    Fail queued/running jobs whose worker stopped writing progress more
+    than `stale_after_seconds` (IMPORT_JOB_STALE_SECONDS) ago. Returns the
+    number of jobs failed.
+    """
+    stale_after_seconds = stale_after_seconds or settings.IMPORT_JOB_STALE_SECONDS
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after_seconds)
+    reaped = db.execute(
+        update(ImportJob).where(
+            ImportJob.status.in_(("queued", "running")),
+            func.coalesce(ImportJob.heartbeat_at, ImportJob.created_at) < cutoff
+        ).values(
+            status="failed",
+            error=STALLED_JOB_ERROR,
+            finished_at=datetime.now(timezone.utc)
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+
+    if reaped:
+        logger.warning("Stalled wearable imports failed", jobs=reaped, stale_after_seconds=stale_after_seconds)
+    return reaped
@@ -0,0 +1,413 @@
+"""
+Write-behind ingestion queue for wearable syncs
+
+POST /wearables/sync/async validates a batch, enqueues it and returns a
+receipt; a drainer pops many receipts at once and writes them all with
+ingest_readings in one transaction (group commit), so a sync storm becomes
+a few large upserts instead of thousands of tiny commits.
+
+Backends (WEARABLE_INGEST_QUEUE):
+- "redis": durable Redis list. Celery beat runs the drainer
+  (app.celery_app); a Redis lock keeps a single drainer at a time, and
+  batches are parked on a processing list until committed so a crashed
+  drainer's batch is retried. The lock holds a per-drainer token: only
+  its owner extends or releases it, so a drainer that outlived its TTL
+  cannot free the lock of the one that took over.
+- "memory": in-process stand-in for tests and single-process setups,
+  drained by a background thread.
+- "" (default): async ingest disabled; /sync/async answers 503.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import structlog
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas.auth import WearableDataInput
+from app.services.wearable_ingest import ingest_readings, merge_readings
+
+logger = structlog.get_logger()
+
+# Receipts written per transaction
+GROUP_COMMIT_MAX_RECEIPTS = 500
+# Receipt statuses are kept this long after enqueue
+RECEIPT_TTL_SECONDS = 24 * 60 * 60
+# Enqueue answers 503 above this depth so producers back off
+MAX_QUEUE_DEPTH = 100_000
+# The in-process drainer waits this long after the first item so a burst
+# lands in one transaction
+GROUP_COMMIT_LINGER_SECONDS = 0.05
+# Receipts the in-process queue remembers (oldest forgotten first)
+MAX_MEMORY_RECEIPTS = 100_000
+
+METRIC_FIELDS = (
+    "enqueued",
+    "committed",
+    "failed",
+    "batches",
+    "last_batch_receipts",
+    "last_batch_readings",
+    "last_commit_ms",
+)
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class InProcessIngestQueue:
+    """Thread-safe in-memory queue with the same interface as RedisIngestQueue"""
+
+    def __init__(self):
+        self._items = deque()
+        self._processing: List[Dict] = []
+        self._receipts: Dict[str, Dict] = {}
+        self._metrics = defaultdict(int)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def enqueue(self, user_id: int, readings: List[Dict]) -> Dict:
+        receipt = {"receipt_id": uuid.uuid4().hex, "user_id": user_id, "status": "queued",
+                   "readings": len(readings), "queued_at": _now()}
+        with self._lock:
+            if len(self._items) >= MAX_QUEUE_DEPTH:
+                raise QueueFull()
+            self._items.append({"receipt_id": receipt["receipt_id"], "user_id": user_id, "readings": readings})
+            self._receipts[receipt["receipt_id"]] = receipt
+            while len(self._receipts) > MAX_MEMORY_RECEIPTS:
+                del self._receipts[next(iter(self._receipts))]
+            self._metrics["enqueued"] += 1
+        self._ready.set()
+        return receipt
+
+    def pop_batch(self, max_items: int) -> List[Dict]:
+        with self._lock:
+            batch = [self._items.popleft() for _ in range(min(max_items, len(self._items)))]
+            self._processing.extend(batch)
+            if not self._items:
+                self._ready.clear()
+        return batch
+
+    def ack(self, batch: List[Dict]) -> None:
+        done = {id(item) for item in batch}
+        with self._lock:
+            self._processing = [item for item in self._processing if id(item) not in done]
+
+    def requeue_stranded(self) -> int:
+        """Put popped but unacknowledged items back at the head of the queue"""
+        with self._lock:
+            stranded, self._processing = self._processing, []
+            self._items.extendleft(reversed(stranded))
+            if stranded:
+                self._ready.set()
+        return len(stranded)
+
+    def wait(self, timeout: float) -> None:
+        self._ready.wait(timeout)
+
+    def set_status(self, receipt_id: str, **fields) -> None:
+        with self._lock:
+            if receipt_id in self._receipts:
+                self._receipts[receipt_id].update(fields)
+
+    def get_receipt(self, receipt_id: str) -> Optional[Dict]:
+        with self._lock:
+            receipt = self._receipts.get(receipt_id)
+            return dict(receipt) if receipt else None
+
+    def record_batch(self, committed: int, failed: int, readings: int, commit_ms: float) -> None:
+        with self._lock:
+            self._metrics["committed"] += committed
+            self._metrics["failed"] += failed
+            self._metrics["batches"] += 1
+            self._metrics["last_batch_receipts"] = committed + failed
+            self._metrics["last_batch_readings"] = readings
+            self._metrics["last_commit_ms"] = round(commit_ms, 1)
+
+    def depth(self) -> int:
+        return len(self._items)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {field: self._metrics[field] for field in METRIC_FIELDS}
+
+
+# Moves up to ARGV[1] items from the head of the queue to the processing list
+_POP_BATCH_SCRIPT = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('LTRIM', KEYS[1], #items, -1)
+    redis.call('RPUSH', KEYS[2], unpack(items))
+end
+return items
+"""
+
+
+# Deletes the drain lock only while it still holds the caller's token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Resets the drain lock's TTL (ms) only while it still holds the caller's token
+_EXTEND_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RedisIngestQueue:
+    """Durable queue on a Redis list; receipts and counters in Redis hashes"""
+
+    PREFIX = "equilibria:ingest"
+
+    def __init__(self, url: str):
+        import redis
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.queue_key = f"{self.PREFIX}:queue"
+        self.processing_key = f"{self.PREFIX}:processing"
+        self.metrics_key = f"{self.PREFIX}:metrics"
+        self.lock_key = f"{self.PREFIX}:drain-lock"
+        self._pop_batch = self.redis.register_script(_POP_BATCH_SCRIPT)
+        self._release_lock = self.redis.register_script(_RELEASE_LOCK_SCRIPT)
+        self._extend_lock = self.redis.register_script(_EXTEND_LOCK_SCRIPT)
+
+    def _receipt_key(self, receipt_id: str) -> str:
+        return f"{self.PREFIX}:receipt:{receipt_id}"
+
+    def enqueue(self, user_id: int, readings: List[Dict]) -> Dict:
+        if self.redis.llen(self.queue_key) >= MAX_QUEUE_DEPTH:
+            raise QueueFull()
+
+        receipt = {"receipt_id": uuid.uuid4().hex, "user_id": user_id, "status": "queued",
+                   "readings": len(readings), "queued_at": _now()}
+        item = json.dumps({"receipt_id": receipt["receipt_id"], "user_id": user_id, "readings": readings})
+
+        pipe = self.redis.pipeline()
+        pipe.hset(self._receipt_key(receipt["receipt_id"]), mapping=receipt)
+        pipe.expire(self._receipt_key(receipt["receipt_id"]), RECEIPT_TTL_SECONDS)
+        pipe.rpush(self.queue_key, item)
+        pipe.hincrby(self.metrics_key, "enqueued", 1)
+        pipe.execute()
+        return receipt
+
+    def acquire_drainer(self, ttl_seconds: int) -> Optional[str]:
+        """
+        Become the single drainer; re-queues a crashed drainer's batch.
+        Returns the lock token to extend and release with, or None when
+        another drainer holds the lock.
+        """
+        token = uuid.uuid4().hex
+        if not self.redis.set(self.lock_key, token, nx=True, ex=ttl_seconds):
+            return None
+        self.requeue_stranded()
+        return token
+
+    def extend_drainer(self, token: str, ttl_seconds: int) -> bool:
+        """Push the lock's expiry out; False once the lock is no longer ours"""
+        return bool(self._extend_lock(keys=[self.lock_key], args=[token, int(ttl_seconds * 1000)]))
+
+    def release_drainer(self, token: str) -> bool:
+        """Release the lock if it is still ours"""
+        return bool(self._release_lock(keys=[self.lock_key], args=[token]))
+
+    def requeue_stranded(self) -> int:
+        """Put the processing list back at the head of the queue (lock holder only)"""
+        stranded = self.redis.lrange(self.processing_key, 0, -1)
+        if stranded:
+            pipe = self.redis.pipeline()
+            pipe.lpush(self.queue_key, *reversed(stranded))
+            pipe.delete(self.processing_key)
+            pipe.execute()
+        return len(stranded)
+
+    def pop_batch(self, max_items: int) -> List[Dict]:
+        items = self._pop_batch(keys=[self.queue_key, self.processing_key], args=[max_items])
+        return [json.loads(item) for item in items]
+
+    def ack(self, batch: List[Dict]) -> None:
+        self.redis.delete(self.processing_key)
+
+    def set_status(self, receipt_id: str, **fields) -> None:
+        self.redis.hset(self._receipt_key(receipt_id), mapping={
+            key: "" if value is None else value for key, value in fields.items()
+        })
+
+    def get_receipt(self, receipt_id: str) -> Optional[Dict]:
+        receipt = self.redis.hgetall(self._receipt_key(receipt_id))
+        if not receipt:
+            return None
+        receipt["user_id"] = int(receipt["user_id"])
+        receipt["readings"] = int(receipt["readings"])
+        return receipt
+
+    def record_batch(self, committed: int, failed: int, readings: int, commit_ms: float) -> None:
+        pipe = self.redis.pipeline()
+        pipe.hincrby(self.metrics_key, "committed", committed)
+        pipe.hincrby(self.metrics_key, "failed", failed)
+        pipe.hincrby(self.metrics_key, "batches", 1)
+        pipe.hset(self.metrics_key, mapping={
+            "last_batch_receipts": committed + failed,
+            "last_batch_readings": readings,
+            "last_commit_ms": round(commit_ms, 1),
+        })
+        pipe.execute()
+
+    def depth(self) -> int:
+        return self.redis.llen(self.queue_key)
+
+    def metrics(self) -> Dict:
+        stored = self.redis.hgetall(self.metrics_key)
+        return {field: float(stored.get(field, 0)) if field == "last_commit_ms" else int(stored.get(field, 0))
+                for field in METRIC_FIELDS}
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_ingest_queue():
+    """The configured queue, or None when async ingest is disabled"""
+    global _queue
+    if _queue is None and settings.WEARABLE_INGEST_QUEUE:
+        with _queue_lock:
+            if _queue is None:
+                if settings.WEARABLE_INGEST_QUEUE == "redis":
+                    _queue = RedisIngestQueue(settings.REDIS_URL)
+                elif settings.WEARABLE_INGEST_QUEUE == "memory":
+                    _queue = InProcessIngestQueue()
+                else:
+                    raise ValueError(f"Unknown WEARABLE_INGEST_QUEUE: {settings.WEARABLE_INGEST_QUEUE}")
+    return _queue
+
+
+def _write_batch(db, batch: List[Dict]) -> int:
+    """Upsert every receipt in the batch, per user; returns readings written"""
+    by_user = defaultdict(list)
+    for item in batch:
+        by_user[item["user_id"]].extend(item["readings"])
+
+    written = 0
+    for user_id, readings in by_user.items():
+        validated = (WearableDataInput.model_validate(reading).model_dump() for reading in readings)
+        written += len(ingest_readings(db, user_id, merge_readings(validated)))
+    return written
+
+
+def drain_once(queue, max_items: int = GROUP_COMMIT_MAX_RECEIPTS) -> int:
+    """
+    Pop up to max_items receipts and commit them in one transaction. If the
+    group fails, receipts are retried one per transaction so a single bad
+    payload only fails its own receipt. Returns the number of receipts.
+    """
+    batch = queue.pop_batch(max_items)
+    if not batch:
+        return 0
+
+    started = time.perf_counter()
+    committed, failed = [], []
+    db = SessionLocal()
+    try:
+        try:
+            readings = _write_batch(db, batch)
+            db.commit()
+            committed = batch
+        except Exception as e:
+            db.rollback()
+            logger.warning("Group commit failed, retrying receipts singly", receipts=len(batch), error=str(e))
+            readings = 0
+            for item in batch:
+                try:
+                    readings += _write_batch(db, [item])
+                    db.commit()
+                    committed.append(item)
+                except Exception as item_error:
+                    db.rollback()
+                    failed.append((item, str(item_error)[:500]))
+    finally:
+        db.close()
+
+    commit_ms = (time.perf_counter() - started) * 1000
+    finished_at = _now()
+    for item in committed:
+        queue.set_status(item["receipt_id"], status="committed", committed_at=finished_at)
+    for item, error in failed:
+        queue.set_status(item["receipt_id"], status="failed", error=error, committed_at=finished_at)
+    queue.record_batch(len(committed), len(failed), readings, commit_ms)
+    queue.ack(batch)
+
+    logger.info(
+        "Wearable ingest batch committed",
+        receipts=len(batch),
+        failed=len(failed),
+        readings=readings,
+        commit_ms=round(commit_ms, 1)
+    )
+    return len(batch)
+
+
+def drain(queue, max_seconds: float, keep_alive: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Drain until the queue is empty or max_seconds have passed. keep_alive
+    runs before each batch (to extend a drain lock); draining stops when
+    it returns False.
+    """
+    deadline = time.monotonic() + max_seconds
+    total = 0
+    while time.monotonic() < deadline:
+        if keep_alive is not None and not keep_alive():
+            logger.warning("Wearable ingest drain lock lost, stopping", receipts=total)
+            break
+        count = drain_once(queue)
+        if not count:
+            break
+        total += count
+    return total
+
+
+class InProcessDrainer:
+    """Background thread draining an InProcessIngestQueue"""
+
+    def __init__(self, queue: InProcessIngestQueue, idle_wait: float = 0.5):
+        self.queue = queue
+        self.idle_wait = idle_wait
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wearable-ingest-drainer", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=10)
+        # Write whatever arrived during shutdown
+        drain(self.queue, max_seconds=30)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.queue.wait(self.idle_wait)
+            if not self.queue.depth():
+                continue
+            time.sleep(GROUP_COMMIT_LINGER_SECONDS)
+            try:
+                drain(self.queue, max_seconds=self.idle_wait)
+            except Exception as e:
+                logger.error("Wearable ingest drainer error", error=str(e))
+                # Retry the batch that was popped when the pass failed, after a pause
+                self.queue.requeue_stranded()
+                self._stop.wait(self.idle_wait)
@@ -0,0 +1,175 @@
+"""
+Monthly range partitions for wearable_data and recovery_logs
+
+Each table has one partition per UTC month (<table>_yYYYYmMM) plus a
+<table>_default catch-all for rows outside the managed range, such as an
+import of years-old history. maintain_partitions() creates the coming
+months and moves any month that collected rows in the default partition
+into its own partition. drop_partitions_before() implements retention by
+detaching and dropping whole months instead of deleting rows.
+Rollup tables are left alone, so long-range charts still cover dropped
+months.
+"""
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# table -> partition key column
+PARTITIONED_TABLES = {
+    "wearable_data": "measurement_date",
+    "recovery_logs": "date",
+}
+
+PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+# First key of the advisory lock serializing partition maintenance
+PARTITION_LOCK_CLASS = 4208
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _bounds(month: date):
+    return (
+        datetime.combine(month, datetime.min.time(), tzinfo=timezone.utc),
+        datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc),
+    )
+
+
+def _lock(conn: Connection, table: str) -> None:
+    conn.execute(
+        text("SELECT pg_advisory_xact_lock(:lock_class, CAST(:table AS regclass)::oid::int)"),
+        {"lock_class": PARTITION_LOCK_CLASS, "table": table}
+    )
+
+
+def existing_partitions(conn: Connection, table: str) -> Dict[date, str]:
+    """Monthly partitions of `table` by month (the default partition excluded)"""
+    names = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = CAST(:table AS regclass)
+    """), {"table": table}).scalars()
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.search(name)
+        if match and name == partition_name(table, date(int(match[1]), int(match[2]), 1)):
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def retained_since(conn: Connection, table: str) -> Optional[datetime]:
+    """
+    Start of the oldest monthly partition of `table`, or None when it has
+    none. Months before it may have been dropped by retention, so tables
+    derived from `table` must not be rebuilt past it.
+    """
+    months = existing_partitions(conn, table)
+    return _bounds(min(months))[0] if months else None
+
+
+def create_partition(conn: Connection, table: str, month: date) -> str:
+    """Create the partition for `month`, taking over its rows from the default partition"""
+    column = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    default = f"{table}_default"
+    lo, hi = _bounds(month)
+    params = {"lo": lo, "hi": hi}
+    bounds = f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+
+    stranded = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= :lo AND {column} < :hi)"
+    ), params).scalar()
+
+    if not stranded:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+    else:
+        # Postgres refuses a new partition while the default partition holds
+        # rows for its range: move them into a plain table, then attach it
+        conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+        conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE {column} >= :lo AND {column} < :hi RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), params)
+        conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+
+    return name
+
+
+def maintain_partitions(conn: Connection, table: str, months_ahead: int = 3) -> List[str]:
+    """
+    Ensure a partition for every month from the oldest data through
+    `months_ahead` months from now, splitting months out of the default
+    partition where rows landed there. Returns the partitions created.
+    """
+    _lock(conn, table)
+    column = PARTITIONED_TABLES[table]
+    existing = existing_partitions(conn, table)
+
+    current = month_start(datetime.now(timezone.utc))
+    stray = [
+        month_start(value) for value in conn.execute(text(
+            f"SELECT DISTINCT date_trunc('month', {column} AT TIME ZONE 'UTC') FROM {table}_default"
+        )).scalars()
+    ]
+
+    # Contiguous months from the oldest data to the horizon, so the default
+    # partition only ever holds rows outside the managed range
+    month = min([current, *existing, *stray])
+    last = max([add_months(current, months_ahead), *stray])
+    created = []
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(conn, table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partitions_before(conn: Connection, table: str, cutoff: date) -> List[str]:
+    """
+    Retention: detach and drop every monthly partition that ends on or
+    before `cutoff`, and delete older stragglers from the default partition.
+    """
+    _lock(conn, table)
+    column = PARTITIONED_TABLES[table]
+    dropped = []
+
+    for month, name in sorted(existing_partitions(conn, table).items()):
+        if add_months(month, 1) > cutoff:
+            continue
+        if table == "wearable_data":
+            # RR recordings reference readings without a foreign key
+            conn.execute(text(
+                f"DELETE FROM wearable_rr_series WHERE wearable_data_id IN (SELECT id FROM {name})"
+            ))
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+
+    cutoff_at = datetime.combine(cutoff, datetime.min.time(), tzinfo=timezone.utc)
+    if table == "wearable_data":
+        conn.execute(text("""
+            DELETE FROM wearable_rr_series WHERE wearable_data_id IN (
+                SELECT id FROM wearable_data_default WHERE measurement_date < :cutoff
+            )
+        """), {"cutoff": cutoff_at})
+    conn.execute(text(f"DELETE FROM {table}_default WHERE {column} < :cutoff"), {"cutoff": cutoff_at})
+
+    return dropped
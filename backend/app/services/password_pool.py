@@ -0,0 +1,211 @@
+"""
+Bounded process pool for bcrypt
+
+bcrypt is deliberately slow: each hash or verify is a few hundred ms of
+CPU. The bcrypt C code releases the GIL, but run inline it still blocks
+the event loop, and in the threadpool a login storm occupies every thread
+and core of the worker, starving all other endpoints. Hashing and
+verification run in a small pool of worker processes instead, which caps
+how much CPU bcrypt can take at once; the caller only awaits (or waits
+on) a future.
+
+At most PASSWORD_HASH_MAX_PENDING calls may be queued or running per API
+process. Callers beyond that get PasswordPoolSaturated straight away, and
+the auth routes turn it into a 503 with Retry-After, so excess logins are
+shed instead of piling up behind the pool. A call that waits longer than
+PASSWORD_HASH_TIMEOUT_SECONDS is abandoned the same way. An abandoned
+job that already started keeps running in its worker, so it holds its
+slot until it finishes.
+
+The auth routes await hash_password_async / verify_password_async;
+hash_password / verify_password block the calling thread for sync code.
+PASSWORD_HASH_WORKERS=0 runs bcrypt inline (tests, scripts).
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict
+
+import structlog
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password as bcrypt_verify
+
+logger = structlog.get_logger()
+
+METRIC_FIELDS = ("submitted", "completed", "rejected", "timeouts", "failed")
+
+
+class PasswordPoolSaturated(Exception):
+    pass
+
+
+def _timed(func, *args):
+    """Runs in the worker process: the result and the CPU-side duration"""
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+
+class PasswordPool:
+    """Process pool with an admission limit and timing counters"""
+
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        # spawn: forking a process that already runs threads is not safe
+        self._executor = (
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            if workers > 0 else None
+        )
+        self._pending = 0
+        self._metrics = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._metrics["rejected"] += 1
+                raise PasswordPoolSaturated()
+            self._pending += 1
+            self._metrics["submitted"] += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _record(self, outcome: str, total: float = 0.0, run: float = 0.0) -> None:
+        with self._lock:
+            self._metrics[outcome] += 1
+            if outcome == "completed":
+                self._metrics["total_seconds"] += total
+                self._metrics["run_seconds"] += run
+                self._metrics["max_total_seconds"] = max(self._metrics["max_total_seconds"], total)
+
+    def _submit(self, func, *args):
+        """Queue func(*args); its slot is released when the job itself ends, not when the caller gives up"""
+        try:
+            future = self._executor.submit(_timed, func, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _run_inline(self, func, args, started: float):
+        try:
+            result, run = _timed(func, *args)
+        except Exception:
+            self._record("failed")
+            raise
+        finally:
+            self._release()
+        self._record("completed", time.perf_counter() - started, run)
+        return result
+
+    def call(self, func, *args):
+        """Run func(*args) in the pool and wait for it on this thread"""
+        self._admit()
+        started = time.perf_counter()
+        if self._executor is None:
+            return self._run_inline(func, args, started)
+
+        future = self._submit(func, *args)
+        try:
+            result, run = future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            # Drops the job if it is still queued; a running one keeps its slot
+            future.cancel()
+            self._record("timeouts")
+            raise PasswordPoolSaturated()
+        except Exception:
+            self._record("failed")
+            raise
+        self._record("completed", time.perf_counter() - started, run)
+        return result
+
+    async def call_async(self, func, *args):
+        """Run func(*args) in the pool without blocking the event loop"""
+        self._admit()
+        started = time.perf_counter()
+        if self._executor is None:
+            return self._run_inline(func, args, started)
+
+        # Cancelling the wrapper (timeout, client gone) cancels a still-queued job
+        future = asyncio.wrap_future(self._submit(func, *args))
+        try:
+            result, run = await asyncio.wait_for(future, self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._record("timeouts")
+            raise PasswordPoolSaturated()
+        except Exception:
+            self._record("failed")
+            raise
+        self._record("completed", time.perf_counter() - started, run)
+        return result
+
+    def _average_ms(self, key: str):
+        completed = self._metrics["completed"]
+        return round(self._metrics[key] / completed * 1000, 1) if completed else None
+
+    def metrics(self) -> Dict:
+        """Counters, plus mean time per call end to end and inside bcrypt (the rest is queueing)"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                **{field: int(self._metrics[field]) for field in METRIC_FIELDS},
+                "avg_total_ms": self._average_ms("total_seconds"),
+                "avg_run_ms": self._average_ms("run_seconds"),
+                "max_total_ms": round(self._metrics["max_total_seconds"] * 1000, 1),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool() -> PasswordPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordPool(
+                    settings.PASSWORD_HASH_WORKERS,
+                    settings.PASSWORD_HASH_MAX_PENDING,
+                    settings.PASSWORD_HASH_TIMEOUT_SECONDS
+                )
+    return _pool
+
+
+def shutdown_password_pool() -> None:
+    """Stop the worker processes, if the pool was ever started (API shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def hash_password(password: str) -> str:
+    return get_password_pool().call(get_password_hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return get_password_pool().call(bcrypt_verify, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await get_password_pool().call_async(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await get_password_pool().call_async(bcrypt_verify, plain_password, hashed_password)
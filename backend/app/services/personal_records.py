@@ -0,0 +1,131 @@
+"""
+Persisted personal-record index
+
+personal_records keeps one row per user per exercise with the best load,
+best estimated 1RM and best reps at each load. Logging a session folds
+only that session's sets into the rows of the exercises it contains, so
+"my PRs" is a primary-key read and new PRs are known as soon as the
+session is written.
+"""
+from collections import defaultdict
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.models import ExercisePerformance, PersonalRecord
+from integration.progression_tracker import update_personal_record
+
+RECORD_FIELDS = (
+    "best_weight_kg",
+    "best_weight_reps",
+    "best_weight_at",
+    "best_estimated_1rm",
+    "best_estimated_1rm_at",
+    "rep_maxes",
+)
+
+# First key of the advisory lock serializing a user's PR updates
+PR_LOCK_CLASS = 4209
+
+REBUILD_CHUNK_SIZE = 5000
+
+
+def _record_fields(row: PersonalRecord) -> Dict:
+    return {field: getattr(row, field) for field in RECORD_FIELDS}
+
+
+def record_personal_records(
+    db: Session,
+    user_id: int,
+    performances: Iterable[Dict],
+    achieved_at: datetime
+) -> Dict[str, List[str]]:
+    """
+    Fold a session's normalized sets into the user's PR rows (caller
+    commits). Returns the improved record kinds by exercise name.
+    """
+    sets_by_exercise = defaultdict(list)
+    for row in performances:
+        sets_by_exercise[row["exercise_name"]].append(row)
+    if not sets_by_exercise:
+        return {}
+
+    # Two sessions logged at once must not both start from the old record
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:lock_class, :user_id)"),
+        {"lock_class": PR_LOCK_CLASS, "user_id": user_id}
+    )
+    stored = {
+        row.exercise_name: row
+        for row in db.query(PersonalRecord).filter(
+            PersonalRecord.user_id == user_id,
+            PersonalRecord.exercise_name.in_(list(sets_by_exercise))
+        )
+    }
+
+    improved_by_exercise = {}
+    for name, sets in sets_by_exercise.items():
+        current = stored.get(name)
+        record, improved = update_personal_record(
+            _record_fields(current) if current else None, sets, achieved_at
+        )
+        if not improved:
+            continue
+        if current is None:
+            db.add(PersonalRecord(user_id=user_id, exercise_name=name, **record))
+        else:
+            for field, value in record.items():
+                setattr(current, field, value)
+        improved_by_exercise[name] = improved
+
+    return improved_by_exercise
+
+
+def rebuild_personal_records(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute PR rows from exercise_performance, streaming it in
+    (user, exercise, time) order (caller commits). Returns rows written.
+    """
+    delete = db.query(PersonalRecord)
+    rows = db.query(
+        ExercisePerformance.user_id,
+        ExercisePerformance.exercise_name,
+        ExercisePerformance.session_id,
+        ExercisePerformance.performed_at,
+        ExercisePerformance.weight_kg,
+        ExercisePerformance.reps,
+        ExercisePerformance.rpe,
+        ExercisePerformance.estimated_1rm
+    )
+    if user_id is not None:
+        delete = delete.filter(PersonalRecord.user_id == user_id)
+        rows = rows.filter(ExercisePerformance.user_id == user_id)
+    delete.delete(synchronize_session=False)
+
+    rows = rows.order_by(
+        ExercisePerformance.user_id,
+        ExercisePerformance.exercise_name,
+        ExercisePerformance.performed_at,
+        ExercisePerformance.id
+    ).yield_per(REBUILD_CHUNK_SIZE)
+
+    written = 0
+    for (row_user_id, name), exercise_rows in groupby(rows, key=lambda row: (row.user_id, row.exercise_name)):
+        record = None
+        for (_, performed_at), session_rows in groupby(exercise_rows, key=lambda row: (row.session_id, row.performed_at)):
+            sets = [
+                {"weight_kg": row.weight_kg, "reps": row.reps, "rpe": row.rpe, "estimated_1rm": row.estimated_1rm}
+                for row in session_rows
+            ]
+            record, _ = update_personal_record(record, sets, performed_at)
+        if record["best_weight_kg"] is None:
+            continue
+        db.add(PersonalRecord(user_id=row_user_id, exercise_name=name, **record))
+        written += 1
+        if written % REBUILD_CHUNK_SIZE == 0:
+            db.flush()
+
+    return written
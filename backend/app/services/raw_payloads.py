@@ -0,0 +1,92 @@
+"""
+Compressed, content-addressed storage for raw wearable payloads
+
+Readings only carry the sha256 of their payload (WearableData.raw_data_digest);
+the zlib-compressed JSON lives once per distinct content in
+wearable_raw_payloads and is read only by the raw-data endpoint.
+"""
+import hashlib
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import WearableData, WearableRawPayload
+
+ENCODING = "zlib"
+COMPRESSION_LEVEL = 6
+
+# Payloads re-used within this window are never pruned, so a sync that is
+# about to reference an old payload cannot lose it to a concurrent prune
+PRUNE_GRACE_PERIOD = timedelta(hours=1)
+
+
+def encode_payload(payload: Any) -> Dict[str, Any]:
+    """Row values for a payload: canonical JSON, hashed, then compressed"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return {
+        "digest": hashlib.sha256(canonical).hexdigest(),
+        "encoding": ENCODING,
+        "size_bytes": len(canonical),
+        "data": zlib.compress(canonical, COMPRESSION_LEVEL),
+    }
+
+
+def decode_payload(row: WearableRawPayload) -> Any:
+    if row.encoding != ENCODING:
+        raise ValueError(f"Unsupported raw payload encoding: {row.encoding}")
+    return json.loads(zlib.decompress(row.data))
+
+
+def store_raw_payloads(db: Session, payloads: Iterable[Any]) -> List[Optional[str]]:
+    """
+    Store payloads (one INSERT for the distinct ones) and return their
+    digests in order. None and empty payloads are not stored. Runs in the
+    caller's transaction.
+    """
+    digests = []
+    rows = {}
+    for payload in payloads:
+        if not payload:
+            digests.append(None)
+            continue
+        row = encode_payload(payload)
+        rows.setdefault(row["digest"], row)
+        digests.append(row["digest"])
+
+    if rows:
+        # Sorted so concurrent syncs lock shared payload rows in the same order
+        stmt = insert(WearableRawPayload).values([rows[digest] for digest in sorted(rows)])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[WearableRawPayload.digest],
+            set_={"last_referenced_at": func.now()}
+        ))
+
+    return digests
+
+
+def store_raw_payload(db: Session, payload: Any) -> Optional[str]:
+    return store_raw_payloads(db, [payload])[0]
+
+
+def load_raw_payload(db: Session, digest: str) -> Optional[Any]:
+    row = db.get(WearableRawPayload, digest)
+    return decode_payload(row) if row else None
+
+
+def prune_raw_payloads(db: Session) -> int:
+    """Delete payloads no reading references any more; returns the count"""
+    cutoff = datetime.now(timezone.utc) - PRUNE_GRACE_PERIOD
+    result = db.execute(
+        delete(WearableRawPayload).where(
+            WearableRawPayload.last_referenced_at < cutoff,
+            ~exists(
+                select(WearableData.id).where(WearableData.raw_data_digest == WearableRawPayload.digest)
+            )
+        )
+    )
+    return result.rowcount
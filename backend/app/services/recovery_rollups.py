@@ -0,0 +1,130 @@
+"""
+Daily recovery rollups
+
+One row per user per UTC day, updated with a single upsert on every
+check-in. Stats over any window read at most one rollup row per day plus
+the partial first day from recovery_logs, instead of every log.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from sqlalchemy import case, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import RecoveryLog, RecoveryDailyRollup
+from app.services.partitions import retained_since
+
+
+def record_recovery_log(db: Session, log: RecoveryLog) -> None:
+    """Fold a new log into its day's rollup (caller commits)"""
+    has_score = log.recovery_score is not None
+    stmt = insert(RecoveryDailyRollup).values(
+        user_id=log.user_id,
+        day=log.date.astimezone(timezone.utc).date(),
+        log_count=1,
+        score_count=1 if has_score else 0,
+        score_sum=log.recovery_score if has_score else 0.0,
+        score_min=log.recovery_score,
+        score_max=log.recovery_score,
+        last_logged_at=log.date,
+        last_recommendation=log.recommended_intensity
+    )
+    table = RecoveryDailyRollup.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.day],
+        set_={
+            "log_count": table.c.log_count + 1,
+            "score_count": table.c.score_count + stmt.excluded.score_count,
+            "score_sum": table.c.score_sum + stmt.excluded.score_sum,
+            # LEAST/GREATEST ignore NULLs in Postgres
+            "score_min": func.least(table.c.score_min, stmt.excluded.score_min),
+            "score_max": func.greatest(table.c.score_max, stmt.excluded.score_max),
+            "last_logged_at": func.greatest(table.c.last_logged_at, stmt.excluded.last_logged_at),
+            # The day's latest log's, as in rebuild_recovery_rollups; a
+            # back-dated log leaves it alone
+            "last_recommendation": case(
+                (stmt.excluded.last_logged_at >= table.c.last_logged_at, stmt.excluded.last_recommendation),
+                else_=table.c.last_recommendation
+            ),
+        }
+    )
+    db.execute(stmt)
+
+
+def get_recovery_window_stats(db: Session, user_id: int, since: datetime) -> Dict[str, Optional[float]]:
+    """
+    count/sum/min/max of recovery scores logged at or after `since`.
+    Whole days come from rollups; the partial first day from recovery_logs.
+    """
+    since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+    first_full_day = since.astimezone(timezone.utc).date() + timedelta(days=1)
+    first_full_day_start = datetime.combine(first_full_day, datetime.min.time(), tzinfo=timezone.utc)
+
+    rollup = db.query(
+        func.coalesce(func.sum(RecoveryDailyRollup.score_count), 0),
+        func.coalesce(func.sum(RecoveryDailyRollup.score_sum), 0.0),
+        func.min(RecoveryDailyRollup.score_min),
+        func.max(RecoveryDailyRollup.score_max)
+    ).filter(
+        RecoveryDailyRollup.user_id == user_id,
+        RecoveryDailyRollup.day >= first_full_day
+    ).one()
+
+    partial = db.query(
+        func.count(RecoveryLog.recovery_score),
+        func.coalesce(func.sum(RecoveryLog.recovery_score), 0.0),
+        func.min(RecoveryLog.recovery_score),
+        func.max(RecoveryLog.recovery_score)
+    ).filter(
+        RecoveryLog.user_id == user_id,
+        RecoveryLog.date >= since,
+        RecoveryLog.date < first_full_day_start
+    ).one()
+
+    count = int(rollup[0]) + int(partial[0])
+    mins = [value for value in (rollup[2], partial[2]) if value is not None]
+    maxes = [value for value in (rollup[3], partial[3]) if value is not None]
+
+    return {
+        "count": count,
+        "sum": float(rollup[1]) + float(partial[1]),
+        "min": min(mins) if mins else None,
+        "max": max(maxes) if maxes else None,
+    }
+
+
+def rebuild_recovery_rollups(db: Session, user_id: Optional[int] = None) -> None:
+    """
+    Recompute rollups from recovery_logs, e.g. after a bulk rescore (caller
+    commits). Days before the oldest retained partition keep their rollups.
+    """
+    user_filter = "AND user_id = :user_id" if user_id is not None else ""
+    params = {"user_id": user_id} if user_id is not None else {}
+    rollup_filter = log_filter = user_filter
+
+    since = retained_since(db.connection(), "recovery_logs")
+    if since is not None:
+        params.update(since=since, since_day=since.date())
+        rollup_filter += " AND day >= :since_day"
+        log_filter += " AND date >= :since"
+
+    db.execute(text(f"DELETE FROM recovery_daily_rollups WHERE true {rollup_filter}"), params)
+    db.execute(text(f"""
+        INSERT INTO recovery_daily_rollups (
+            user_id, day, log_count, score_count, score_sum,
+            score_min, score_max, last_logged_at, last_recommendation
+        )
+        SELECT
+            user_id,
+            (date AT TIME ZONE 'UTC')::date,
+            count(*),
+            count(recovery_score),
+            coalesce(sum(recovery_score), 0),
+            min(recovery_score),
+            max(recovery_score),
+            max(date),
+            (array_agg(recommended_intensity ORDER BY date DESC))[1]
+        FROM recovery_logs
+        WHERE date IS NOT NULL {log_filter}
+        GROUP BY user_id, (date AT TIME ZONE 'UTC')::date
+    """), params)
@@ -0,0 +1,169 @@
+"""
+Rotating refresh tokens with server-side revocation
+
+A password login starts a token family: one refresh_token_families row
+that holds the jti of the family's only redeemable refresh token.
+POST /auth/refresh verifies the token's HMAC and then swaps the jti in a
+single conditional UPDATE on the primary key. That returns a new access
+token and a new refresh token without touching bcrypt.
+
+If an already-rotated token is presented again, it was copied or stolen.
+The whole family is then revoked, so both the thief and the real client
+have to log in again. The exception is the token rotated last, within
+REFRESH_TOKEN_REUSE_GRACE_SECONDS: two tabs refreshing at once send the
+same token, and the slower one gets the pair the faster one was issued
+(same refresh token, fresh access token). Changing the password or
+deleting the account revokes every family of the user.
+
+Expired and revoked families are deleted by prune_refresh_token_families.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_access_token, create_refresh_token, decode_refresh_token
+from app.db.models import RefreshTokenFamily, User
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+def _token_pair(user: User, family_id: str, jti: str, expires_at: datetime) -> Dict:
+    access_token = create_access_token(
+        data={"sub": str(user.id), "username": user.username},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": create_refresh_token(user.id, family_id, jti, expires_at),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_expires_at": expires_at,
+    }
+
+
+def issue_token_pair(db: Session, user: User) -> Dict:
+    """Start a new token family for a password login (caller commits)"""
+    now = datetime.now(timezone.utc)
+    family_id, jti = uuid.uuid4().hex, uuid.uuid4().hex
+    pair = _token_pair(user, family_id, jti, now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+    db.add(RefreshTokenFamily(
+        id=family_id,
+        user_id=user.id,
+        current_jti=jti,
+        expires_at=pair["refresh_expires_at"]
+    ))
+    return pair
+
+
+def rotate_refresh_token(db: Session, token: str) -> Dict:
+    """
+    Redeem a refresh token for a new pair (caller commits). Raises
+    InvalidRefreshToken for bad, expired, revoked or replayed tokens; a
+    replay also revokes the family, which the caller must commit too.
+    """
+    payload = decode_refresh_token(token)
+    if payload is None:
+        raise InvalidRefreshToken()
+
+    now = datetime.now(timezone.utc)
+    new_jti = uuid.uuid4().hex
+    expires_at = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    user_id = db.execute(
+        update(RefreshTokenFamily)
+        .where(
+            RefreshTokenFamily.id == payload["fam"],
+            RefreshTokenFamily.current_jti == payload["jti"],
+            RefreshTokenFamily.revoked_at.is_(None),
+            RefreshTokenFamily.expires_at > now
+        )
+        .values(
+            current_jti=new_jti,
+            previous_jti=RefreshTokenFamily.current_jti,
+            rotated_at=now,
+            last_used_at=now,
+            expires_at=expires_at
+        )
+        .returning(RefreshTokenFamily.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+    if user_id is None:
+        family = _concurrent_rotation(db, payload, now)
+        if family is None:
+            # Not the current token of a live family: if the family exists
+            # this is a replay of a rotated token, so nobody may use it any more
+            revoke_family(db, payload["fam"])
+            raise InvalidRefreshToken()
+        # The other request's pair, so both clients hold the current token
+        user_id, new_jti, expires_at = family.user_id, family.current_jti, family.expires_at
+
+    user = db.get(User, user_id)
+    if user is None or not user.is_active:
+        revoke_family(db, payload["fam"])
+        raise InvalidRefreshToken()
+
+    return _token_pair(user, payload["fam"], new_jti, expires_at)
+
+
+def _concurrent_rotation(db: Session, payload: Dict, now: datetime) -> Optional[RefreshTokenFamily]:
+    """The live family if `payload` is its last rotated token, rotated within the grace window"""
+    grace = settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS
+    if grace <= 0:
+        return None
+    family = db.get(RefreshTokenFamily, payload["fam"], populate_existing=True)
+    if (
+        family is None
+        or family.revoked_at is not None
+        or family.expires_at <= now
+        or family.previous_jti != payload["jti"]
+        or family.rotated_at is None
+        or family.rotated_at < now - timedelta(seconds=grace)
+    ):
+        return None
+    return family
+
+
+def revoke_family(db: Session, family_id: str) -> int:
+    """Revoke one token family (caller commits)"""
+    return db.execute(
+        update(RefreshTokenFamily)
+        .where(RefreshTokenFamily.id == family_id, RefreshTokenFamily.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def revoke_refresh_token(db: Session, token: str, user_id: int) -> bool:
+    """Revoke the family of one of the user's refresh tokens, e.g. on logout"""
+    payload = decode_refresh_token(token)
+    if payload is None or payload["sub"] != str(user_id):
+        return False
+    return revoke_family(db, payload["fam"]) > 0
+
+
+def revoke_user_families(db: Session, user_id: int) -> int:
+    """Revoke every token family of a user (caller commits)"""
+    return db.execute(
+        update(RefreshTokenFamily)
+        .where(RefreshTokenFamily.user_id == user_id, RefreshTokenFamily.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def prune_refresh_token_families(db: Session) -> int:
+    """Delete expired and revoked token families (caller commits)"""
+    return db.execute(
+        delete(RefreshTokenFamily)
+        .where(or_(
+            RefreshTokenFamily.expires_at <= datetime.now(timezone.utc),
+            RefreshTokenFamily.revoked_at.is_not(None)
+        ))
+        .execution_options(synchronize_session=False)
+    ).rowcount
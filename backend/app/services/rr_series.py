@@ -0,0 +1,51 @@
+"""
+Packed storage for raw RR-interval recordings
+
+One row per WearableData reading; re-uploading a recording for the same
+reading replaces it.
+"""
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import WearableRRSeries
+from integration.hrv import pack_rr_intervals, unpack_rr_intervals
+
+
+def store_rr_series(
+    db: Session,
+    user_id: int,
+    wearable_data_id: int,
+    rr_intervals: Sequence[float],
+    metrics: Dict
+) -> None:
+    """Upsert the packed recording for a reading (caller commits)"""
+    encoding, data = pack_rr_intervals(rr_intervals)
+    values = {
+        "encoding": encoding,
+        "data": data,
+        "beat_count": metrics["beat_count"],
+        "artifact_count": metrics["artifact_count"],
+        "pnn50": metrics["pnn50"],
+    }
+    stmt = insert(WearableRRSeries).values(user_id=user_id, wearable_data_id=wearable_data_id, **values)
+    db.execute(stmt.on_conflict_do_update(index_elements=[WearableRRSeries.wearable_data_id], set_=values))
+
+
+def load_rr_series(db: Session, user_id: int, wearable_data_id: int) -> Optional[Dict]:
+    series = db.query(WearableRRSeries).filter(
+        WearableRRSeries.wearable_data_id == wearable_data_id,
+        WearableRRSeries.user_id == user_id
+    ).first()
+    if series is None:
+        return None
+
+    return {
+        "wearable_data_id": wearable_data_id,
+        "encoding": series.encoding,
+        "beat_count": series.beat_count,
+        "artifact_count": series.artifact_count,
+        "pnn50": series.pnn50,
+        "rr_intervals": unpack_rr_intervals(series.encoding, series.data).tolist(),
+    }
@@ -0,0 +1,35 @@
+"""Tests for normalizing logged exercises into ExercisePerformance rows."""
+from app.services.exercise_performance import normalize_exercises, total_volume
+
+
+def test_normalize_exercises_flattens_sets():
+    rows = normalize_exercises([
+        {"name": "Bench  Press", "weight": 80, "reps": 5, "sets": 3, "rpe": 8.5},
+        {"name": "Squat", "weight": 100, "sets": [{"reps": 5}, {"reps": 3, "weight": 110}]},
+        {"name": "Plank"},
+        {"weight": 20, "reps": 10},
+    ])
+    assert [(r["exercise_name"], r["weight_kg"], r["reps"], r["sets"]) for r in rows] == [
+        ("Bench Press", 80.0, 5, 3),
+        ("Squat", 100.0, 5, 1),
+        ("Squat", 110.0, 3, 1),
+    ]
+    assert rows[0]["rpe"] == 8.5
+    assert total_volume(rows) == 80 * 5 * 3 + 100 * 5 + 110 * 3
+
+
+def test_normalize_exercises_drops_non_finite_and_absurd_values():
+    rows = normalize_exercises([
+        {"name": "Squat", "weight": float("nan"), "reps": 5, "sets": 2, "rpe": float("inf")},
+        {"name": "Squat", "weight": 100, "reps": float("nan")},
+        {"name": "Squat", "weight": 100, "reps": float("inf")},
+        {"name": "Squat", "weight": 100, "reps": 5, "sets": float("inf")},
+        {"name": "Squat", "weight": 100, "reps": 10 ** 12},
+        {"name": "Squat", "weight": 100, "reps": 5, "sets": 10 ** 6},
+        {"name": "Squat", "weight": "1e999", "reps": 3},
+    ])
+    assert [(r["weight_kg"], r["reps"], r["sets"], r["rpe"]) for r in rows] == [
+        (None, 5, 2, None),
+        (100.0, 5, 1, None),
+        (None, 3, 1, None),
+    ]
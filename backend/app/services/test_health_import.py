@@ -0,0 +1,105 @@
+"""Tests for streaming health-data imports."""
+import io
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.models import ImportJob, User
+from app.services import health_import
+from app.services.health_import import (
+    STALLED_JOB_ERROR,
+    DailyAggregator,
+    aggregate_apple_health,
+    iter_rows,
+    reap_stalled_import_jobs,
+)
+
+APPLE_EXPORT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<HealthData locale="en_US">
+ <Record type="HKQuantityTypeIdentifierStepCount" sourceName="Watch" unit="count" value="4000" startDate="2026-03-01 08:00:00 +0100" endDate="2026-03-01 09:00:00 +0100"/>
+ <Record type="HKQuantityTypeIdentifierStepCount" sourceName="Watch" unit="count" value="3000" startDate="2026-03-01 18:00:00 +0100" endDate="2026-03-01 19:00:00 +0100"/>
+ <Record type="HKQuantityTypeIdentifierStepCount" sourceName="iPhone" unit="count" value="6500" startDate="2026-03-01 08:00:00 +0100" endDate="2026-03-01 20:00:00 +0100"/>
+ <Record type="HKQuantityTypeIdentifierRestingHeartRate" sourceName="Watch" unit="count/min" value="52" startDate="2026-03-01 07:00:00 +0100" endDate="2026-03-01 07:00:00 +0100"/>
+ <Record type="HKQuantityTypeIdentifierRestingHeartRate" sourceName="Watch" unit="count/min" value="oops" startDate="2026-03-01 07:00:00 +0100" endDate="2026-03-01 07:00:00 +0100"/>
+</HealthData>
+"""
+
+
+def test_ndjson_rows_reject_lines_that_are_not_objects():
+    stream = io.BytesIO(
+        b'{"source": "oura", "measurement_date": "2026-03-01T00:00:00Z", "hrv_rmssd": 48}\n'
+        b'\n'
+        b'{"source": "oura", "measurement_date": \n'
+        b'[1, 2, 3]\n'
+        b'42\n'
+        b'{"measurement_date": "2026-03-02T00:00:00Z"}\n'
+    )
+    rows = list(iter_rows(stream, "ndjson"))
+    assert rows == [
+        {"source": "oura", "measurement_date": "2026-03-01T00:00:00Z", "hrv_rmssd": 48},
+        None,
+        None,
+        None,
+        {"measurement_date": "2026-03-02T00:00:00Z"},
+    ]
+
+
+def test_apple_health_sums_per_device_and_takes_the_largest():
+    aggregator = DailyAggregator()
+    parsed, rejected = aggregate_apple_health(io.BytesIO(APPLE_EXPORT), aggregator, lambda *args: None)
+    assert (parsed, rejected) == (4, 1)
+
+    (reading,) = aggregator.readings("apple_health").values()
+    # Watch 7000 vs. iPhone 6500 for the same walk: not 13500
+    assert reading["steps"] == 7000
+    assert reading["resting_heart_rate"] == 52
+
+
+def test_zipped_exports_are_closed_after_reading(tmp_path, monkeypatch):
+    archives = []
+
+    class TrackedZipFile(zipfile.ZipFile):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            archives.append(self)
+
+    monkeypatch.setattr(health_import.zipfile, "ZipFile", TrackedZipFile)
+    path = tmp_path / "export.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("apple_health_export/export.xml", APPLE_EXPORT)
+    with health_import._open_export(str(path)) as raw:
+        assert raw.read() == APPLE_EXPORT
+    assert archives[-1].fp is None
+
+    empty = tmp_path / "empty.zip"
+    with zipfile.ZipFile(empty, "w") as archive:
+        archive.writestr("readme.txt", b"")
+    with pytest.raises(ValueError):
+        with health_import._open_export(str(empty)):
+            pass
+    assert archives[-1].fp is None
+
+
+def test_reaper_fails_jobs_without_a_recent_heartbeat():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    ImportJob.__table__.create(engine)
+    now = datetime.now(timezone.utc)
+
+    with Session(engine) as db:
+        db.add(User(id=1, email="a@b.c", username="ann", hashed_password="x"))
+        db.add_all([
+            ImportJob(id=1, user_id=1, status="running", format="ndjson", heartbeat_at=now - timedelta(hours=1)),
+            ImportJob(id=2, user_id=1, status="running", format="ndjson", heartbeat_at=now),
+            ImportJob(id=3, user_id=1, status="queued", format="csv", created_at=now - timedelta(hours=1)),
+            ImportJob(id=4, user_id=1, status="completed", format="csv", heartbeat_at=now - timedelta(hours=1)),
+        ])
+        db.commit()
+
+        assert reap_stalled_import_jobs(db, stale_after_seconds=600) == 2
+        jobs = {job.id: job for job in db.query(ImportJob)}
+        assert [jobs[i].status for i in (1, 2, 3, 4)] == ["failed", "running", "failed", "completed"]
+        assert jobs[1].error == STALLED_JOB_ERROR
@@ -0,0 +1,101 @@
+"""Tests for the write-behind wearable ingest queues."""
+import pytest
+
+from app.services.ingest_queue import InProcessIngestQueue, QueueFull, RedisIngestQueue
+
+READING = {"source": "oura", "measurement_date": "2026-06-01T07:00:00+00:00", "hrv_rmssd": 48.0}
+
+
+@pytest.fixture
+def redis_queue(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis, "from_url",
+        lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs)
+    )
+    return lambda: RedisIngestQueue("redis://fake")
+
+
+def test_in_process_queue_requeues_unacked_items():
+    queue = InProcessIngestQueue()
+    first = queue.enqueue(1, [READING])
+    second = queue.enqueue(2, [READING])
+
+    batch = queue.pop_batch(1)
+    assert [item["receipt_id"] for item in batch] == [first["receipt_id"]]
+    assert queue.depth() == 1
+
+    # The pass died before acknowledging: the item goes back to the head
+    assert queue.requeue_stranded() == 1
+    batch = queue.pop_batch(10)
+    assert [item["receipt_id"] for item in batch] == [first["receipt_id"], second["receipt_id"]]
+
+    queue.ack(batch)
+    assert queue.requeue_stranded() == 0
+    assert queue.get_receipt(first["receipt_id"])["status"] == "queued"
+
+
+def test_redis_queue_push_pop_ack(redis_queue):
+    queue = redis_queue()
+    receipts = [queue.enqueue(1, [READING]) for _ in range(3)]
+    assert queue.depth() == 3
+
+    token = queue.acquire_drainer(60)
+    batch = queue.pop_batch(2)
+    assert [item["receipt_id"] for item in batch] == [receipt["receipt_id"] for receipt in receipts[:2]]
+    assert batch[0]["readings"] == [READING]
+    assert queue.redis.llen(queue.processing_key) == 2
+
+    queue.ack(batch)
+    assert queue.redis.llen(queue.processing_key) == 0
+    assert queue.depth() == 1
+    assert queue.release_drainer(token)
+
+
+def test_redis_queue_requeues_a_crashed_drainers_batch(redis_queue):
+    crashed = redis_queue()
+    first = crashed.enqueue(1, [READING])
+    second = crashed.enqueue(1, [READING])
+
+    stale_token = crashed.acquire_drainer(60)
+    assert crashed.pop_batch(1)[0]["receipt_id"] == first["receipt_id"]
+
+    # The drainer dies without acking; its lock expires
+    crashed.redis.delete(crashed.lock_key)
+
+    queue = redis_queue()
+    token = queue.acquire_drainer(60)
+    assert token is not None and token != stale_token
+    assert [item["receipt_id"] for item in queue.pop_batch(10)] == [first["receipt_id"], second["receipt_id"]]
+
+
+def test_redis_drain_lock_is_owned_by_its_token(redis_queue):
+    queue = redis_queue()
+    token = queue.acquire_drainer(60)
+    assert token is not None
+    assert queue.acquire_drainer(60) is None
+
+    assert queue.extend_drainer(token, 120)
+    assert 60 < queue.redis.ttl(queue.lock_key) <= 120
+
+    # A drainer whose lock expired and was taken over cannot touch the new one
+    queue.redis.delete(queue.lock_key)
+    new_token = queue.acquire_drainer(60)
+    assert not queue.extend_drainer(token, 120)
+    assert not queue.release_drainer(token)
+    assert queue.redis.get(queue.lock_key) == new_token
+
+    assert queue.release_drainer(new_token)
+    assert queue.redis.get(queue.lock_key) is None
+
+
+def test_queues_refuse_work_when_full(monkeypatch):
+    monkeypatch.setattr("app.services.ingest_queue.MAX_QUEUE_DEPTH", 1)
+    queue = InProcessIngestQueue()
+    queue.enqueue(1, [READING])
+    with pytest.raises(QueueFull):
+        queue.enqueue(1, [READING])
@@ -0,0 +1,146 @@
+"""Tests for monthly partition maintenance."""
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import RecoveryLog, User, WearableData, WearableRRSeries
+from app.services.partitions import (
+    PARTITION_NAME,
+    add_months,
+    drop_partitions_before,
+    existing_partitions,
+    maintain_partitions,
+    month_start,
+    partition_name,
+)
+from app.services.recovery_rollups import rebuild_recovery_rollups
+from app.services.wearable_rollups import rebuild_wearable_rollups
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+
+def test_month_arithmetic_and_names():
+    assert month_start(datetime(2026, 2, 28, 23, 59)) == date(2026, 2, 1)
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+
+    name = partition_name("wearable_data", date(2026, 3, 1))
+    assert name == "wearable_data_y2026m03"
+    assert PARTITION_NAME.search(name).groups() == ("2026", "03")
+    assert PARTITION_NAME.search("wearable_data_default") is None
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="partitions@example.com", username="partitions", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _reading(db, at):
+    reading = WearableData(user_id=1, source="polar_h10", measurement_date=at, hrv_rmssd=50.0)
+    db.add(reading)
+    db.flush()
+    db.add(WearableRRSeries(
+        wearable_data_id=reading.id, user_id=1, encoding="int16", data=b"\x00\x00",
+        beat_count=1, artifact_count=0
+    ))
+    return reading
+
+
+def _default_rows(conn):
+    return conn.execute(text("SELECT count(*) FROM wearable_data_default")).scalar()
+
+
+@requires_postgres
+def test_maintenance_and_retention(engine):
+    current = month_start(datetime.now(timezone.utc))
+    old = add_months(current, -14)
+    with Session(engine) as db:
+        _reading(db, datetime.combine(old, datetime.min.time(), tzinfo=timezone.utc) + timedelta(days=3))
+        kept = _reading(db, datetime.now(timezone.utc)).id
+        db.commit()
+
+    # Every month from the oldest row to the horizon, rows moved out of the default partition
+    with engine.begin() as conn:
+        created = maintain_partitions(conn, "wearable_data", months_ahead=2)
+        months = sorted(existing_partitions(conn, "wearable_data"))
+        assert months == [add_months(old, offset) for offset in range(17)]
+        assert partition_name("wearable_data", add_months(current, 2)) in created
+        assert _default_rows(conn) == 0
+        assert maintain_partitions(conn, "wearable_data", months_ahead=2) == []
+
+    # A reading older than every partition lands in the default partition
+    with Session(engine) as db:
+        _reading(db, datetime.combine(add_months(old, -6), datetime.min.time(), tzinfo=timezone.utc))
+        db.commit()
+
+    cutoff = add_months(current, -12)
+    with engine.begin() as conn:
+        dropped = drop_partitions_before(conn, "wearable_data", cutoff)
+        assert dropped == [partition_name("wearable_data", add_months(old, offset)) for offset in range(2)]
+        assert min(existing_partitions(conn, "wearable_data")) == cutoff
+        assert _default_rows(conn) == 0
+
+    with Session(engine) as db:
+        assert db.scalars(select(WearableData.id)).all() == [kept]
+        assert db.scalars(select(WearableRRSeries.wearable_data_id)).all() == [kept]
+
+
+def _derived_rows(db):
+    return {
+        table: set(db.execute(text(f"SELECT * FROM {table}")).all())
+        for table in ("recovery_daily_rollups", "wearable_rollups", "wearable_daily_fused")
+    }
+
+
+@requires_postgres
+def test_rebuilds_keep_the_rollups_of_dropped_months(engine):
+    keep = add_months(month_start(datetime.now(timezone.utc)), -1)
+    keep_at = datetime.combine(keep, datetime.min.time(), tzinfo=timezone.utc)
+    # The day before the cutoff shares a week with it unless the month starts on a Monday
+    moments = [keep_at - timedelta(days=20), keep_at - timedelta(hours=12), keep_at + timedelta(hours=12)]
+    with Session(engine) as db:
+        for index, at in enumerate(moments):
+            db.add(RecoveryLog(user_id=1, date=at, recovery_score=5.0 + index, recommended_intensity="Moderate"))
+            db.add(WearableData(user_id=1, source="oura", measurement_date=at, hrv_rmssd=40.0 + index,
+                                resting_heart_rate=55))
+        db.commit()
+
+    with engine.begin() as conn:
+        for table in ("recovery_logs", "wearable_data"):
+            maintain_partitions(conn, table, months_ahead=1)
+    with Session(engine) as db:
+        rebuild_recovery_rollups(db)
+        rebuild_wearable_rollups(db)
+        db.commit()
+        before = _derived_rows(db)
+    assert (keep_at - timedelta(days=20)).date() in {row.day for row in before["recovery_daily_rollups"]}
+
+    with engine.begin() as conn:
+        for table in ("recovery_logs", "wearable_data"):
+            assert partition_name(table, add_months(keep, -1)) in drop_partitions_before(conn, table, keep)
+
+    with Session(engine) as db:
+        assert db.query(RecoveryLog).filter(RecoveryLog.date < keep_at).count() == 0
+        rebuild_recovery_rollups(db)
+        rebuild_wearable_rollups(db)
+        db.commit()
+        assert _derived_rows(db) == before
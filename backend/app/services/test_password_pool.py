@@ -0,0 +1,62 @@
+"""Tests for the bounded bcrypt process pool."""
+import asyncio
+import time
+
+import pytest
+
+from app.services import password_pool
+from app.services.password_pool import PasswordPool, PasswordPoolSaturated
+
+
+def test_password_pool_admission_and_metrics():
+    pool = PasswordPool(workers=1, max_pending=2, timeout_seconds=30)
+    try:
+        assert pool.call(len, "abc") == 3
+        assert asyncio.run(pool.call_async(max, 4, 9)) == 9
+    finally:
+        pool.shutdown()
+
+    full = PasswordPool(workers=0, max_pending=0, timeout_seconds=1)
+    with pytest.raises(PasswordPoolSaturated):
+        full.call(len, "abc")
+
+    metrics = pool.metrics()
+    assert (metrics["submitted"], metrics["completed"], metrics["pending"]) == (2, 2, 0)
+    assert metrics["avg_total_ms"] >= metrics["avg_run_ms"]
+    assert full.metrics()["rejected"] == 1
+
+
+def test_abandoned_jobs_hold_their_slot_until_they_finish():
+    pool = PasswordPool(workers=1, max_pending=1, timeout_seconds=30)
+    try:
+        pool.call(len, "warm")  # start the worker, so the next job runs at once
+        pool.timeout_seconds = 0.3
+
+        for call in (pool.call, lambda *args: asyncio.run(pool.call_async(*args))):
+            with pytest.raises(PasswordPoolSaturated):
+                call(time.sleep, 1.0)
+            # The worker is still busy with it, so there is no room yet
+            assert pool.metrics()["pending"] == 1
+            with pytest.raises(PasswordPoolSaturated):
+                pool.call(len, "abc")
+
+            deadline = time.monotonic() + 10
+            while pool.metrics()["pending"] and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert pool.call(len, "abc") == 3
+    finally:
+        pool.shutdown()
+
+    metrics = pool.metrics()
+    assert (metrics["timeouts"], metrics["rejected"], metrics["pending"]) == (2, 2, 0)
+
+
+def test_shutdown_stops_the_shared_pool(monkeypatch):
+    monkeypatch.setattr(password_pool, "_pool", None)
+    password_pool.shutdown_password_pool()  # never started: nothing to stop
+
+    pool = password_pool.get_password_pool()
+    stopped = []
+    monkeypatch.setattr(pool, "shutdown", lambda: stopped.append(pool))
+    password_pool.shutdown_password_pool()
+    assert stopped == [pool] and password_pool._pool is None
@@ -0,0 +1,80 @@
+"""Tests for the persisted personal-record index."""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import PersonalRecord, User, WorkoutSession
+from app.services.exercise_performance import normalize_exercises, record_exercise_performances
+from app.services.personal_records import RECORD_FIELDS, rebuild_personal_records, record_personal_records
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+DAY = datetime(2026, 6, 1, 17, 0, tzinfo=timezone.utc)
+
+SESSIONS = [
+    [{"name": "Squat", "sets": [{"weight": 100, "reps": 5}, {"weight": 110, "reps": 3}]},
+     {"name": "Bench Press", "weight": 80, "reps": 5, "sets": 3}],
+    [{"name": "Squat", "sets": [{"weight": 105, "reps": 5, "rpe": 8}]}],
+    [{"name": "Squat", "weight": 90, "reps": 8, "sets": 2}, {"name": "Deadlift", "weight": 140, "reps": 5}],
+]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="records@example.com", username="records", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _records(db):
+    db.expire_all()
+    return {
+        row.exercise_name: tuple(getattr(row, field) for field in RECORD_FIELDS)
+        for row in db.query(PersonalRecord).filter(PersonalRecord.user_id == 1)
+    }
+
+
+@requires_postgres
+def test_session_updates_match_a_rebuild(engine):
+    with Session(engine) as db:
+        improvements = []
+        for offset, exercises in enumerate(SESSIONS):
+            session_date = DAY + timedelta(days=offset)
+            session = WorkoutSession(user_id=1, session_date=session_date, exercises_completed=exercises)
+            db.add(session)
+            db.flush()
+            performances = normalize_exercises(exercises)
+            record_exercise_performances(db, session, performances)
+            improvements.append(record_personal_records(db, 1, performances, session_date))
+            db.flush()
+
+        assert set(improvements[0]) == {"Squat", "Bench Press"}
+        # 105 x 5 at RPE 8 is no heavier than 110 kg, but a better estimate and a new rep max
+        assert improvements[1] == {"Squat": ["estimated_1rm", "rep_max"]}
+        assert set(improvements[2]) == {"Squat", "Deadlift"}
+
+        incremental = _records(db)
+        squat = dict(zip(RECORD_FIELDS, incremental["Squat"]))
+        assert (squat["best_weight_kg"], squat["best_weight_reps"], squat["best_weight_at"]) == (110, 3, DAY)
+
+        assert rebuild_personal_records(db, 1) == 3
+        db.flush()
+        assert _records(db) == incremental
+        db.rollback()
@@ -0,0 +1,75 @@
+"""Tests for compressed raw wearable payload storage."""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import User, WearableData, WearableRawPayload
+from app.services.raw_payloads import (
+    PRUNE_GRACE_PERIOD,
+    decode_payload,
+    encode_payload,
+    load_raw_payload,
+    prune_raw_payloads,
+    store_raw_payloads,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+PAYLOAD = {"device": "Polar H10", "samples": [812, 798, 805] * 50}
+
+
+def test_payloads_are_content_addressed_and_round_trip():
+    row = encode_payload(PAYLOAD)
+    # Key order does not change the digest
+    assert encode_payload(dict(reversed(list(PAYLOAD.items()))))["digest"] == row["digest"]
+    assert len(row["data"]) < row["size_bytes"]
+    assert decode_payload(WearableRawPayload(**row)) == PAYLOAD
+
+    with pytest.raises(ValueError):
+        decode_payload(WearableRawPayload(**{**row, "encoding": "lz4"}))
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="payloads@example.com", username="payloads", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@requires_postgres
+def test_shared_payloads_are_stored_once_and_pruned_when_unreferenced(engine):
+    with Session(engine) as db:
+        digests = store_raw_payloads(db, [PAYLOAD, None, {"other": 1}, PAYLOAD, {}])
+        assert digests[1] is None and digests[4] is None and digests[0] == digests[3]
+        assert db.query(WearableRawPayload).count() == 2
+
+        db.add(WearableData(user_id=1, source="polar_h10", measurement_date=datetime(2026, 6, 1, tzinfo=timezone.utc),
+                            raw_data_digest=digests[0]))
+        db.flush()
+
+        # Recently referenced payloads survive a prune
+        assert prune_raw_payloads(db) == 0
+        db.execute(update(WearableRawPayload).values(
+            last_referenced_at=datetime.now(timezone.utc) - PRUNE_GRACE_PERIOD - timedelta(minutes=1)
+        ))
+        assert prune_raw_payloads(db) == 1
+        assert load_raw_payload(db, digests[0]) == PAYLOAD
+        assert load_raw_payload(db, digests[2]) is None
+        db.rollback()
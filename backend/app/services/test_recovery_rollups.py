@@ -0,0 +1,108 @@
+"""Tests for daily recovery rollups."""
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import MetaData, create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import RecoveryDailyRollup, RecoveryLog, User
+from app.services.recovery_rollups import (
+    get_recovery_window_stats,
+    rebuild_recovery_rollups,
+    record_recovery_log,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+START = datetime(2026, 6, 1, 18, 0, tzinfo=timezone.utc)
+
+
+def test_window_stats_add_the_partial_first_day_to_whole_days():
+    # A copy of the tables read: SQLite cannot autoincrement recovery_logs' composite key
+    metadata = MetaData()
+    for model in (User, RecoveryLog, RecoveryDailyRollup):
+        model.__table__.to_metadata(metadata)
+    metadata.tables["recovery_logs"].c.id.autoincrement = False
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="stats@example.com", username="stats", hashed_password="x"))
+        db.add_all([
+            # First day: only the log after `since` counts, its rollup row is ignored
+            RecoveryLog(id=1, user_id=1, date=START - timedelta(hours=6), recovery_score=2.0),
+            RecoveryLog(id=2, user_id=1, date=START + timedelta(hours=2), recovery_score=6.0),
+            RecoveryDailyRollup(user_id=1, day=date(2026, 6, 1), log_count=2, score_count=2, score_sum=8.0,
+                                score_min=2.0, score_max=6.0),
+            RecoveryDailyRollup(user_id=1, day=date(2026, 6, 2), log_count=3, score_count=2, score_sum=17.0,
+                                score_min=8.0, score_max=9.0),
+        ])
+        db.commit()
+
+        stats = get_recovery_window_stats(db, 1, START.replace(tzinfo=None))
+        assert stats == {"count": 3, "sum": 23.0, "min": 6.0, "max": 9.0}
+        assert get_recovery_window_stats(db, 2, START) == {"count": 0, "sum": 0.0, "min": None, "max": None}
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="rollups@example.com", username="rollups", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@requires_postgres
+def test_incremental_rollups_match_a_rebuild(engine):
+    scores = [7.0, None, 4.5, 9.0, 6.0]
+    with Session(engine) as db:
+        for offset, score in enumerate(scores):
+            log = RecoveryLog(user_id=1, date=START + timedelta(hours=5 * offset), recovery_score=score,
+                              recommended_intensity=None if score is None else "Moderate")
+            db.add(log)
+            db.flush()
+            record_recovery_log(db, log)
+
+        def rollups():
+            db.expire_all()
+            return [
+                (row.day, row.log_count, row.score_count, row.score_sum, row.score_min, row.score_max,
+                 row.last_logged_at, row.last_recommendation)
+                for row in db.query(RecoveryDailyRollup).order_by(RecoveryDailyRollup.day)
+            ]
+
+        incremental = rollups()
+        assert [row[:6] + row[7:] for row in incremental] == [
+            (date(2026, 6, 1), 2, 1, 7.0, 7.0, 7.0, None),
+            (date(2026, 6, 2), 3, 3, 19.5, 4.5, 9.0, "Moderate"),
+        ]
+        rebuild_recovery_rollups(db, 1)
+        assert rollups() == incremental
+
+        # A back-dated check-in does not replace the day's latest recommendation
+        log = RecoveryLog(user_id=1, date=START + timedelta(hours=1), recovery_score=3.0,
+                          recommended_intensity="Light/Rest")
+        db.add(log)
+        db.flush()
+        record_recovery_log(db, log)
+        assert rollups()[0][6:] == (START + timedelta(hours=5), None)
+        db.delete(log)
+        db.flush()
+        rebuild_recovery_rollups(db, 1)
+
+        stats = get_recovery_window_stats(db, 1, START + timedelta(hours=1))
+        assert stats == {"count": 3, "sum": 19.5, "min": 4.5, "max": 9.0}
+        db.rollback()
@@ -0,0 +1,130 @@
+"""Tests for rotating refresh tokens."""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import RefreshTokenFamily, User
+from app.services.refresh_tokens import (
+    InvalidRefreshToken,
+    issue_token_pair,
+    prune_refresh_token_families,
+    rotate_refresh_token,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="refresh@example.com", username="refresh", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _login(engine):
+    with Session(engine) as db:
+        pair = issue_token_pair(db, db.get(User, 1))
+        db.commit()
+    return pair["refresh_token"]
+
+
+def _rotate(engine, token):
+    with Session(engine) as db:
+        try:
+            return rotate_refresh_token(db, token)["refresh_token"]
+        finally:
+            db.commit()
+
+
+@requires_postgres
+def test_refresh_rotation_revokes_replayed_family(engine):
+    with Session(engine) as db:
+        first = issue_token_pair(db, db.get(User, 1))
+        db.flush()
+
+        second = rotate_refresh_token(db, first["refresh_token"])
+        third = rotate_refresh_token(db, second["refresh_token"])
+        assert third["access_token"] and third["refresh_token"] != second["refresh_token"]
+
+        # Replaying a rotated token kills the family, current token included
+        with pytest.raises(InvalidRefreshToken):
+            rotate_refresh_token(db, first["refresh_token"])
+        with pytest.raises(InvalidRefreshToken):
+            rotate_refresh_token(db, third["refresh_token"])
+        db.rollback()
+
+
+@requires_postgres
+def test_simultaneous_refreshes_share_the_new_token(engine):
+    first = _login(engine)
+    second = _rotate(engine, first)
+
+    # The other tab, a moment later, gets the same pair and the family lives on
+    assert _rotate(engine, first) == second
+    assert _rotate(engine, second) not in (first, second)
+
+
+@requires_postgres
+def test_replays_outside_the_grace_window_revoke_the_family(engine):
+    first = _login(engine)
+    second = _rotate(engine, first)
+    third = _rotate(engine, second)
+
+    # Older than the last rotation: a copied token
+    with pytest.raises(InvalidRefreshToken):
+        _rotate(engine, first)
+    with pytest.raises(InvalidRefreshToken):
+        _rotate(engine, third)
+
+    # The last rotated token, once the window has passed
+    first = _login(engine)
+    _rotate(engine, first)
+    with Session(engine) as db:
+        db.execute(update(RefreshTokenFamily).values(
+            rotated_at=datetime.now(timezone.utc) - timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS + 1)
+        ))
+        db.commit()
+    with pytest.raises(InvalidRefreshToken):
+        _rotate(engine, first)
+
+
+@requires_postgres
+def test_prune_deletes_expired_and_revoked_families(engine):
+    with Session(engine) as db:
+        db.query(RefreshTokenFamily).delete()
+        db.commit()
+    live, revoked, expired = _login(engine), _login(engine), _login(engine)
+    _rotate(engine, _rotate(engine, revoked))
+    with pytest.raises(InvalidRefreshToken):
+        _rotate(engine, revoked)
+
+    with Session(engine) as db:
+        db.execute(update(RefreshTokenFamily).where(RefreshTokenFamily.revoked_at.is_(None)).values(
+            expires_at=datetime.now(timezone.utc) + timedelta(days=1)
+        ))
+        families = db.query(RefreshTokenFamily).filter(RefreshTokenFamily.revoked_at.is_(None)).all()
+        assert len(families) == 2
+        families[0].expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+
+        assert prune_refresh_token_families(db) == 2
+        db.commit()
+        assert db.query(RefreshTokenFamily).count() == 1
@@ -0,0 +1,85 @@
+"""Tests for the cached user principals behind get_current_user."""
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.db.models import User
+from app.services.user_cache import (
+    InProcessPrincipalCache,
+    RedisPrincipalCache,
+    principal_from_user,
+    user_from_principal,
+)
+
+
+def test_cached_principal_attaches_without_select():
+    user = User(id=7, email="a@b.c", username="ann", hashed_password="secret", is_active=True,
+                created_at=datetime(2026, 1, 1, tzinfo=timezone.utc), weight_kg=70.0)
+    principal = principal_from_user(user)
+    assert "hashed_password" not in principal
+
+    cache = InProcessPrincipalCache(max_size=1, ttl_seconds=60)
+    cache.set(7, principal, cache.generation(7))
+    cache.set(8, principal, cache.generation(8))
+    assert cache.get(7) is None  # evicted by the newer entry
+    assert cache.get(8) == principal
+    cache.delete(8)
+    assert cache.get(8) is None
+    assert cache.metrics()["hit_ratio"] == round(1 / 3, 4)
+
+    # No bind: any SELECT would raise
+    db = Session()
+    cached = user_from_principal(db, principal)
+    assert inspect(cached).persistent and not db.new
+    assert (cached.id, cached.username, cached.created_at) == (7, "ann", user.created_at)
+    assert "hashed_password" in inspect(cached).expired_attributes
+    assert user_from_principal(db, principal) is cached
+
+
+def _check_stale_write_is_dropped(cache):
+    old = {"id": 7, "username": "ann", "is_active": True}
+
+    # A miss reads the generation, then loads the row...
+    generation = cache.generation(7)
+    # ...while another request deactivates the user and invalidates
+    cache.delete(7)
+    assert not cache.set(7, old, generation)
+    assert cache.get(7) is None
+
+    assert cache.set(7, {**old, "is_active": False}, cache.generation(7))
+    assert cache.get(7)["is_active"] is False
+    assert cache.metrics()["stale_writes"] == 1
+
+
+def test_in_process_cache_drops_writes_raced_by_an_invalidation():
+    _check_stale_write_is_dropped(InProcessPrincipalCache(max_size=10, ttl_seconds=60))
+
+
+def test_redis_cache_drops_writes_raced_by_an_invalidation(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    import redis
+
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(
+        decode_responses=kwargs.get("decode_responses", False)
+    ))
+    _check_stale_write_is_dropped(RedisPrincipalCache("redis://fake", ttl_seconds=60))
+
+
+def test_redis_cache_skips_lookups_while_unreachable():
+    cache = RedisPrincipalCache("redis://127.0.0.1:1/0", ttl_seconds=60, retry_seconds=0.5)
+    assert cache.get(7) is None
+    assert cache.metrics()["errors"] == 1
+
+    # Lookups no longer touch the socket until the retry delay passes
+    assert cache.get(7) is None and cache.generation(7) is None
+    assert not cache.set(7, {"id": 7}, cache.generation(7))
+    metrics = cache.metrics()
+    assert (metrics["errors"], metrics["bypassed"], metrics["misses"]) == (1, 3, 2)
+
+    time.sleep(0.6)
+    assert cache.get(7) is None
+    assert cache.metrics()["errors"] == 2
@@ -0,0 +1,97 @@
+"""Tests for fused per-day wearable records."""
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import User, WearableData, WearableDailyFused
+from app.services.wearable_fusion import get_checkin_wearable
+from app.services.wearable_rollups import refresh_wearable_rollups
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+NOW = datetime(2026, 6, 2, 8, 0, tzinfo=timezone.utc)
+
+
+def test_checkin_takes_each_metric_only_if_measured_in_the_window():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    WearableDailyFused.__table__.create(engine)
+
+    with Session(engine) as db:
+        db.add(User(id=1, email="fused@example.com", username="fused", hashed_password="x"))
+        db.add_all([
+            # Yesterday: HRV at dawn (outside the window), sleep and RHR in the evening
+            WearableDailyFused(
+                user_id=1, day=date(2026, 6, 1), last_measurement_date=datetime(2026, 6, 1, 22, 0, tzinfo=timezone.utc),
+                hrv_source="polar_h10", hrv_measured_at=datetime(2026, 6, 1, 6, 0, tzinfo=timezone.utc), hrv_rmssd=41.0,
+                heart_rate_source="polar_h10", heart_rate_measured_at=datetime(2026, 6, 1, 22, 0, tzinfo=timezone.utc),
+                resting_heart_rate=55,
+                sleep_source="apple_health", sleep_measured_at=datetime(2026, 6, 1, 21, 0, tzinfo=timezone.utc),
+                sleep_duration_minutes=410,
+            ),
+            # Today: only a fresh RHR
+            WearableDailyFused(
+                user_id=1, day=date(2026, 6, 2), last_measurement_date=datetime(2026, 6, 2, 7, 0, tzinfo=timezone.utc),
+                heart_rate_source="apple_health", heart_rate_measured_at=datetime(2026, 6, 2, 7, 0, tzinfo=timezone.utc),
+                resting_heart_rate=52,
+            ),
+        ])
+        db.commit()
+
+        since = NOW - timedelta(days=1)
+        assert get_checkin_wearable(db, 1, since) == {
+            "hrv_rmssd": None,
+            "resting_heart_rate": 52,
+            "sleep_duration_minutes": 410,
+        }
+        # Nothing measured after the last reading
+        assert get_checkin_wearable(db, 1, NOW) is None
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="fusion@example.com", username="fusion", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@requires_postgres
+def test_fused_day_prefers_source_priority(engine):
+    day = NOW + timedelta(days=5)
+    with Session(engine) as db:
+        db.add_all([
+            WearableData(user_id=1, source="apple_health", measurement_date=day,
+                         hrv_rmssd=40.0, sleep_duration_minutes=450, steps=8000),
+            WearableData(user_id=1, source="polar_h10", measurement_date=day + timedelta(hours=1),
+                         hrv_rmssd=62.0, resting_heart_rate=52),
+            WearableData(user_id=1, source="google_fit", measurement_date=day + timedelta(hours=2),
+                         sleep_duration_minutes=300, steps=9000),
+        ])
+        refresh_wearable_rollups(db, 1, [day.date()])
+        fused = db.get(WearableDailyFused, (1, day.date()))
+
+        assert (fused.hrv_source, fused.hrv_rmssd) == ("polar_h10", 62.0)
+        assert (fused.heart_rate_source, fused.resting_heart_rate) == ("polar_h10", 52)
+        assert (fused.sleep_source, fused.sleep_duration_minutes) == ("apple_health", 450)
+        assert (fused.activity_source, fused.steps) == ("apple_health", 8000)
+
+        checkin = get_checkin_wearable(db, 1, day)
+        assert checkin == {"hrv_rmssd": 62.0, "resting_heart_rate": 52, "sleep_duration_minutes": 450}
+        db.rollback()
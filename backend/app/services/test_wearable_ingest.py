@@ -0,0 +1,84 @@
+"""Tests for bulk wearable ingestion."""
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import User, WearableData
+from app.services.wearable_ingest import ingest_readings, merge_readings, reading_key
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+DAY = datetime(2026, 6, 1, 7, 0, tzinfo=timezone.utc)
+
+
+def test_merge_readings_collapses_one_key_later_non_null_wins():
+    merged = merge_readings([
+        {"source": "oura", "measurement_date": DAY, "hrv_rmssd": 48.0, "steps": 1000},
+        # Naive timestamps are UTC: the same reading
+        {"source": "oura", "measurement_date": DAY.replace(tzinfo=None), "hrv_rmssd": None, "steps": 1200},
+        {"source": "oura", "measurement_date": DAY + timedelta(days=1), "hrv_rmssd": 51.0},
+    ])
+
+    assert len(merged) == 2
+    reading = merged[reading_key("oura", DAY)]
+    assert (reading["hrv_rmssd"], reading["steps"]) == (48.0, 1200)
+    assert reading_key("oura", DAY.astimezone(timezone(timedelta(hours=2)))) == reading_key("oura", DAY)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="sync@example.com", username="sync", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@requires_postgres
+def test_concurrent_syncs_of_one_reading_merge(engine):
+    first = Session(engine)
+    ingest_readings(first, 1, merge_readings([
+        {"source": "oura", "measurement_date": DAY, "hrv_rmssd": 48.0}
+    ]))
+
+    # The second sync blocks on the first's uncommitted row, then merges into it
+    errors = []
+
+    def second_sync():
+        try:
+            with Session(engine) as db:
+                ingest_readings(db, 1, merge_readings([
+                    {"source": "oura", "measurement_date": DAY, "resting_heart_rate": 52}
+                ]))
+                db.commit()
+        except Exception as exc:
+            errors.append(exc)
+
+    worker = threading.Thread(target=second_sync)
+    worker.start()
+    worker.join(0.5)
+    first.commit()
+    first.close()
+    worker.join(10)
+
+    assert not errors
+    with Session(engine) as db:
+        rows = db.scalars(select(WearableData).where(WearableData.user_id == 1)).all()
+        assert [(row.hrv_rmssd, row.resting_heart_rate) for row in rows] == [(48.0, 52)]
+        assert db.scalar(select(func.count()).select_from(WearableData)) == 1
@@ -0,0 +1,125 @@
+"""Tests for multi-resolution wearable rollups."""
+import os
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, event
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import User, WearableData, WearableRollup
+from app.services.wearable_rollups import (
+    ALL_SOURCES,
+    get_wearable_rollup_history,
+    next_period_start,
+    period_start,
+    pick_resolution,
+    rebuild_wearable_rollups,
+    refresh_wearable_rollups,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+# A Tuesday at the end of a month, so its week spans two months
+DAY = datetime(2026, 6, 30, 9, 0, tzinfo=timezone.utc)
+
+
+def test_periods_and_resolutions():
+    assert period_start(DAY.date(), "week") == date(2026, 6, 29)
+    assert period_start(DAY.date(), "month") == date(2026, 6, 1)
+    assert next_period_start(date(2026, 6, 29), "week") == date(2026, 7, 6)
+    assert next_period_start(date(2026, 12, 1), "month") == date(2027, 1, 1)
+
+    assert [pick_resolution(days) for days in (7, 180, 181, 730, 731)] == ["day", "day", "week", "week", "month"]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="rollups@example.com", username="rollups", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _rollup(db, resolution, period, source=ALL_SOURCES):
+    return db.get(WearableRollup, (1, resolution, period, source))
+
+
+@requires_postgres
+def test_combined_rollups_do_not_double_count_activity(engine):
+    with Session(engine) as db:
+        db.add_all([
+            WearableData(user_id=1, source="apple_health", measurement_date=DAY, steps=8000,
+                         active_calories=400, hrv_rmssd=40.0),
+            WearableData(user_id=1, source="google_fit", measurement_date=DAY, steps=7500,
+                         active_calories=450, hrv_rmssd=60.0),
+            WearableData(user_id=1, source="google_fit", measurement_date=DAY + timedelta(days=1), steps=3000),
+        ])
+        refresh_wearable_rollups(db, 1, [DAY.date(), DAY.date() + timedelta(days=1)])
+
+        day = _rollup(db, "day", DAY.date())
+        assert (day.reading_count, day.steps_sum, day.active_calories_sum) == (2, 8000, 450)
+        assert (day.hrv_count, day.hrv_sum) == (2, 100.0)
+        assert _rollup(db, "day", DAY.date(), "apple_health").steps_sum == 8000
+
+        # Weeks and months add up the per-day figures
+        assert _rollup(db, "week", date(2026, 6, 29)).steps_sum == 11000
+        assert _rollup(db, "month", date(2026, 6, 1)).steps_sum == 8000
+        assert _rollup(db, "month", date(2026, 7, 1)).steps_sum == 3000
+
+        (point,) = get_wearable_rollup_history(db, 1, "week", DAY - timedelta(days=1))
+        assert (point["steps"], point["hrv_mean"], point["source"]) == (11000, 50.0, None)
+
+        # Deleting a day's readings removes its rows and shrinks its periods
+        db.execute(delete(WearableData).where(WearableData.measurement_date > DAY))
+        refresh_wearable_rollups(db, 1, [DAY.date() + timedelta(days=1)])
+        db.expire_all()
+        assert _rollup(db, "day", DAY.date() + timedelta(days=1)) is None
+        assert _rollup(db, "month", date(2026, 7, 1)) is None
+        assert _rollup(db, "week", date(2026, 6, 29)).steps_sum == 8000
+
+        # A full rebuild lands on the same rows
+        refreshed = {
+            (row.resolution, row.period_start, row.source): (row.reading_count, row.steps_sum, row.hrv_sum)
+            for row in db.query(WearableRollup)
+        }
+        rebuild_wearable_rollups(db, 1)
+        db.expire_all()
+        assert refreshed == {
+            (row.resolution, row.period_start, row.source): (row.reading_count, row.steps_sum, row.hrv_sum)
+            for row in db.query(WearableRollup)
+        }
+        db.rollback()
+
+
+@requires_postgres
+def test_refresh_runs_a_constant_number_of_statements(engine):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with Session(engine) as db:
+        db.add(WearableData(user_id=1, source="polar_h10", measurement_date=DAY, hrv_rmssd=55.0))
+        db.flush()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            refresh_wearable_rollups(db, 1, [DAY.date() + timedelta(days=offset) for offset in range(10)])
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        db.rollback()
+
+    # Advisory lock, rollups, fused days
+    assert len(statements) == 3
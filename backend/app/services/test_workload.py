@@ -0,0 +1,74 @@
+"""Tests for per-user workload state."""
+import os
+import threading
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import User, UserWorkload
+from app.services.workload import get_workload_snapshot, update_user_workload
+from integration.workload import ACUTE_ALPHA, add_session_load, empty_workload
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL not set (needs a disposable Postgres database)"
+)
+
+DAY = date(2026, 6, 1)
+
+
+def test_empty_row_folds_like_no_state():
+    # A user's first log folds into the freshly inserted empty row
+    assert add_session_load(empty_workload(), DAY, 1000.0) == add_session_load(None, DAY, 1000.0)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(id=1, email="workload@example.com", username="workload", hashed_password="x"))
+        db.commit()
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@requires_postgres
+def test_concurrent_first_logs_both_count(engine):
+    first = Session(engine)
+    update_user_workload(first, 1, DAY, 1000.0)
+    first.flush()
+
+    # The second log's insert waits on the first's uncommitted row, then folds into it
+    errors = []
+
+    def second_log():
+        try:
+            with Session(engine) as db:
+                update_user_workload(db, 1, DAY, 500.0)
+                db.commit()
+        except Exception as exc:
+            errors.append(exc)
+
+    worker = threading.Thread(target=second_log)
+    worker.start()
+    worker.join(0.5)
+    first.commit()
+    first.close()
+    worker.join(10)
+
+    assert not errors
+    with Session(engine) as db:
+        row = db.get(UserWorkload, 1)
+        assert row.session_count == 2
+        assert row.acute_load == pytest.approx(ACUTE_ALPHA * 1500.0)
+        assert get_workload_snapshot(db, 1, DAY)["weekly_load"] == 1500.0
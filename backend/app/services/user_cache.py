@@ -0,0 +1,379 @@
+"""
+Cache of decoded access tokens and user principals for get_current_user
+
+Every authenticated request used to decode its JWT and SELECT the user
+row. Decoded claims are now kept in a small per-process LRU (until the
+token expires or CLAIMS_CACHE_TTL_SECONDS, whichever is first), and the
+user's columns (never the password hash) in a TTL cache, so a warm request
+authenticates without touching the database. A hit is turned back into a
+User attached to the request's session without a SELECT; columns not in
+the cache (hashed_password) are expired, so async code must load them
+explicitly (AsyncSession.refresh) before use.
+
+Backends (USER_CACHE):
+- "redis" (default): shared by every worker, so invalidation is seen
+  everywhere. Redis errors count as misses and fall through to the
+  database. After a connection error or timeout, lookups skip Redis for
+  REDIS_RETRY_SECONDS, so an outage does not add socket timeouts to every
+  request.
+- "memory": per-process LRU, for a single worker (tests, local runs).
+  Invalidation only reaches the worker that ran it; other workers would
+  keep the old principal for up to USER_CACHE_TTL_SECONDS.
+- "": principal caching off (claims are still cached).
+
+update_profile, change_password and delete_account call invalidate_user
+after they commit. Invalidation also bumps the user's generation; a miss
+reads the generation before loading the row and only caches it if the
+generation is unchanged, so a request that loaded the row just before a
+change cannot write the old principal back after the invalidation.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.models import User
+
+logger = structlog.get_logger()
+
+# Columns cached for a principal; hashed_password stays in the database
+PRINCIPAL_FIELDS = tuple(
+    column.key for column in User.__table__.columns if column.key != "hashed_password"
+)
+DATETIME_FIELDS = ("created_at", "updated_at")
+
+# Decoded tokens kept per process, and for at most this long
+MAX_CACHED_CLAIMS = 10_000
+CLAIMS_CACHE_TTL_SECONDS = 300
+
+METRIC_FIELDS = ("hits", "misses", "invalidations", "errors", "stale_writes", "bypassed")
+
+# Lookups skip Redis for this long after it could not be reached
+REDIS_RETRY_SECONDS = 5.0
+
+# Generation counters outlive any in-flight miss by a wide margin
+GENERATION_TTL_SECONDS = 24 * 60 * 60
+
+Generation = Union[int, str]
+
+
+def _metrics_with_ratio(counts: Dict) -> Dict:
+    lookups = counts["hits"] + counts["misses"]
+    return {**counts, "hit_ratio": round(counts["hits"] / lookups, 4) if lookups else None}
+
+
+class LRUCache:
+    """Thread-safe bounded LRU whose entries expire after their own TTL"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._metrics = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[1] <= now:
+                if item is not None:
+                    del self._items[key]
+                self._metrics["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._metrics["hits"] += 1
+            return item[0]
+
+    def set(self, key: str, value, ttl_seconds: float) -> None:
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl_seconds)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+            self._metrics["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return _metrics_with_ratio({field: self._metrics[field] for field in METRIC_FIELDS})
+
+
+class InProcessPrincipalCache:
+    """Per-process principal cache with the same interface as RedisPrincipalCache"""
+
+    backend = "memory"
+    blocking = False
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._cache = LRUCache(max_size)
+        self._generations: Dict[int, int] = {}
+        self._stale_writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        return self._cache.get(str(user_id))
+
+    def generation(self, user_id: int) -> Generation:
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def set(self, user_id: int, principal: Dict, generation: Generation) -> bool:
+        """Cache `principal` unless the user was invalidated since `generation` was read"""
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                self._stale_writes += 1
+                return False
+            self._cache.set(str(user_id), principal, self.ttl_seconds)
+            return True
+
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._cache.delete(str(user_id))
+
+    def metrics(self) -> Dict:
+        metrics = self._cache.metrics()
+        metrics["stale_writes"] = self._stale_writes
+        return {"backend": self.backend, "size": len(self._cache), **metrics}
+
+
+# Sets the principal only while the user's generation is still ARGV[2]
+_SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[2] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+return 1
+"""
+
+
+class RedisPrincipalCache:
+    """Principals as JSON strings with a TTL, shared by every worker"""
+
+    backend = "redis"
+    blocking = True
+    PREFIX = "equilibria:principal"
+
+    def __init__(self, url: str, ttl_seconds: int, retry_seconds: float = REDIS_RETRY_SECONDS):
+        import redis
+
+        self.redis = redis.Redis.from_url(
+            url, decode_responses=True, socket_timeout=0.25, socket_connect_timeout=0.25
+        )
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self._unavailable_until = 0.0
+        self._set_if_generation = self.redis.register_script(_SET_IF_GENERATION_SCRIPT)
+        # Counted per worker so a lookup stays a single round trip
+        self._metrics = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.PREFIX}:{user_id}"
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.PREFIX}:{user_id}:generation"
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            self._metrics[field] += 1
+
+    def _available(self) -> bool:
+        if time.monotonic() < self._unavailable_until:
+            self._count("bypassed")
+            return False
+        return True
+
+    def _failed(self, e: Exception) -> None:
+        import redis
+
+        self._count("errors")
+        if isinstance(e, (redis.ConnectionError, redis.TimeoutError)):
+            self._unavailable_until = time.monotonic() + self.retry_seconds
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        import redis
+
+        if not self._available():
+            self._count("misses")
+            return None
+        try:
+            stored = self.redis.get(self._key(user_id))
+        except redis.RedisError as e:
+            self._failed(e)
+            self._count("misses")
+            logger.warning("Principal cache read failed", error=str(e))
+            return None
+        self._count("hits" if stored is not None else "misses")
+        return json.loads(stored) if stored is not None else None
+
+    def generation(self, user_id: int) -> Optional[Generation]:
+        """The user's generation, or None when Redis is unreachable (skip caching)"""
+        import redis
+
+        if not self._available():
+            return None
+        try:
+            return self.redis.get(self._generation_key(user_id)) or ""
+        except redis.RedisError as e:
+            self._failed(e)
+            logger.warning("Principal cache read failed", error=str(e))
+            return None
+
+    def set(self, user_id: int, principal: Dict, generation: Optional[Generation]) -> bool:
+        """Cache `principal` unless the user was invalidated since `generation` was read"""
+        import redis
+
+        if generation is None:
+            return False
+        try:
+            stored = self._set_if_generation(
+                keys=[self._key(user_id), self._generation_key(user_id)],
+                args=[json.dumps(principal), generation, self.ttl_seconds]
+            )
+        except redis.RedisError as e:
+            self._failed(e)
+            logger.warning("Principal cache write failed", error=str(e))
+            return False
+        if not stored:
+            self._count("stale_writes")
+        return bool(stored)
+
+    def delete(self, user_id: int) -> None:
+        import redis
+
+        # Always attempted, even while lookups skip Redis. The change is already
+        # committed; a lost invalidation is bounded by the TTL
+        try:
+            pipe = self.redis.pipeline()
+            pipe.incr(self._generation_key(user_id))
+            pipe.expire(self._generation_key(user_id), GENERATION_TTL_SECONDS)
+            pipe.delete(self._key(user_id))
+            pipe.execute()
+            self._count("invalidations")
+        except redis.RedisError as e:
+            self._failed(e)
+            logger.error("Principal cache invalidation failed", user_id=user_id, error=str(e))
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {"backend": self.backend, **_metrics_with_ratio({field: self._metrics[field] for field in METRIC_FIELDS})}
+
+
+_claims = LRUCache(MAX_CACHED_CLAIMS)
+_principals = None
+_principals_lock = threading.Lock()
+
+
+def get_principal_cache():
+    """The configured principal cache, or None when USER_CACHE is off"""
+    global _principals
+    if _principals is None and settings.USER_CACHE:
+        with _principals_lock:
+            if _principals is None:
+                if settings.USER_CACHE == "redis":
+                    _principals = RedisPrincipalCache(settings.REDIS_URL, settings.USER_CACHE_TTL_SECONDS)
+                elif settings.USER_CACHE == "memory":
+                    _principals = InProcessPrincipalCache(
+                        settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS
+                    )
+                else:
+                    raise ValueError(f"Unknown USER_CACHE: {settings.USER_CACHE}")
+    return _principals
+
+
+def get_cached_claims(token: str) -> Optional[Dict]:
+    return _claims.get(token)
+
+
+def cache_claims(token: str, payload: Dict) -> None:
+    """Keep a decoded token until it expires, capped at CLAIMS_CACHE_TTL_SECONDS"""
+    ttl = CLAIMS_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _claims.set(token, payload, ttl)
+
+
+def principal_from_user(user: User) -> Dict:
+    principal = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+    for field in DATETIME_FIELDS:
+        if principal[field] is not None:
+            principal[field] = principal[field].isoformat()
+    return principal
+
+
+def user_from_principal(db: Session, principal: Dict) -> User:
+    """
+    A User for the cached columns, attached to `db` as if it had just been
+    loaded: changes are flushed as UPDATEs and uncached columns are loaded
+    on first access.
+    """
+    fields = dict(principal)
+    for field in DATETIME_FIELDS:
+        if fields.get(field) is not None:
+            fields[field] = datetime.fromisoformat(fields[field])
+    existing = db.identity_map.get(db.identity_key(User, fields["id"]))
+    if existing is not None:
+        return existing
+    user = User(**fields)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+
+async def _cache_call(cache, method: str, *args):
+    """Redis round trips go to the threadpool; the in-process cache runs inline"""
+    if cache.blocking:
+        return await run_in_threadpool(getattr(cache, method), *args)
+    return getattr(cache, method)(*args)
+
+
+async def load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """The user for an authenticated request, from the cache when possible"""
+    cache = get_principal_cache()
+    principal = await _cache_call(cache, "get", user_id) if cache else None
+    if principal is not None:
+        return await db.run_sync(user_from_principal, principal)
+
+    # Read before the row: an invalidation after this point voids the write
+    generation = await _cache_call(cache, "generation", user_id) if cache else None
+    user = await db.get(User, user_id)
+    if user is not None and cache:
+        await _cache_call(cache, "set", user_id, principal_from_user(user), generation)
+    return user
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Drop the cached principal after the user row changed"""
+    cache = get_principal_cache()
+    if cache:
+        await _cache_call(cache, "delete", user_id)
+
+
+def cache_metrics() -> Dict:
+    cache = get_principal_cache()
+    return {
+        "principals": cache.metrics() if cache else None,
+        "claims": {"size": len(_claims), **_claims.metrics()},
+    }
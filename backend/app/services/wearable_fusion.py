@@ -0,0 +1,203 @@
+"""
+Fused per-user, per-day wearable records
+
+A day often has readings from several sources (sleep from Apple Health,
+HRV from a Polar strap). wearable_daily_fused keeps one row per user per
+UTC day holding, for each metric group, the values from the highest-priority
+source that reported it. It is recomputed for the touched days alongside the
+rollups (see refresh_wearable_rollups), so the recovery check-in reads a
+primary-key row instead of sorting the user's recent readings.
+"""
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, text
+from sqlalchemy.orm import Session
+
+from app.db.models import WearableDailyFused
+from app.services.partitions import retained_since
+
+# Preferred sources per metric group, best first. Sources not listed rank
+# after these, newest reading first.
+SOURCE_PRIORITY = {
+    "hrv": ("polar_h10", "apple_health", "google_fit"),
+    "heart_rate": ("polar_h10", "apple_health", "google_fit"),
+    "sleep": ("apple_health", "google_fit", "polar_h10"),
+    "activity": ("apple_health", "google_fit", "polar_h10"),
+}
+
+UTC_DAY = "(measurement_date AT TIME ZONE 'UTC')::date"
+
+# {filter} restricts the wearable_data rows read and {stale_filter} the
+# stored rows considered; the priority arrays are bound parameters. Within
+# the chosen source the newest reading wins, except activity, which is that
+# source's day total. Stored days left without readings are deleted and the
+# others upserted, in one statement.
+FUSE_DAYS = """
+    WITH readings AS (
+        SELECT user_id, source, measurement_date, {utc_day} AS day,
+               hrv_rmssd, hrv_sdnn, resting_heart_rate, avg_heart_rate,
+               sleep_duration_minutes, deep_sleep_minutes, rem_sleep_minutes,
+               steps, active_calories
+        FROM wearable_data
+        WHERE {filter}
+    ),
+    hrv AS (
+        SELECT DISTINCT ON (user_id, day) user_id, day, source, measurement_date, hrv_rmssd, hrv_sdnn
+        FROM readings
+        WHERE hrv_rmssd IS NOT NULL OR hrv_sdnn IS NOT NULL
+        ORDER BY user_id, day, array_position(CAST(:hrv_priority AS text[]), source) NULLS LAST,
+                 measurement_date DESC
+    ),
+    heart_rate AS (
+        SELECT DISTINCT ON (user_id, day) user_id, day, source, measurement_date,
+               resting_heart_rate, avg_heart_rate
+        FROM readings
+        WHERE resting_heart_rate IS NOT NULL OR avg_heart_rate IS NOT NULL
+        ORDER BY user_id, day, array_position(CAST(:heart_rate_priority AS text[]), source) NULLS LAST,
+                 measurement_date DESC
+    ),
+    sleep AS (
+        SELECT DISTINCT ON (user_id, day) user_id, day, source, measurement_date,
+               sleep_duration_minutes, deep_sleep_minutes, rem_sleep_minutes
+        FROM readings
+        WHERE sleep_duration_minutes IS NOT NULL
+        ORDER BY user_id, day, array_position(CAST(:sleep_priority AS text[]), source) NULLS LAST,
+                 measurement_date DESC
+    ),
+    activity AS (
+        SELECT DISTINCT ON (user_id, day) user_id, day, source, measurement_date, steps, active_calories
+        FROM (
+            SELECT user_id, day, source, sum(steps) AS steps, sum(active_calories) AS active_calories,
+                   max(measurement_date) AS measurement_date
+            FROM readings
+            WHERE steps IS NOT NULL OR active_calories IS NOT NULL
+            GROUP BY user_id, day, source
+        ) per_source
+        ORDER BY user_id, day, array_position(CAST(:activity_priority AS text[]), source) NULLS LAST,
+                 measurement_date DESC
+    ),
+    days AS (
+        SELECT user_id, day, max(measurement_date) AS last_measurement_date
+        FROM readings
+        GROUP BY user_id, day
+    ),
+    stale AS (
+        DELETE FROM wearable_daily_fused AS stored
+        WHERE {stale_filter}
+          AND NOT EXISTS (SELECT 1 FROM days WHERE days.user_id = stored.user_id AND days.day = stored.day)
+    )
+    INSERT INTO wearable_daily_fused (
+        user_id, day, last_measurement_date,
+        hrv_source, hrv_measured_at, hrv_rmssd, hrv_sdnn,
+        heart_rate_source, heart_rate_measured_at, resting_heart_rate, avg_heart_rate,
+        sleep_source, sleep_measured_at, sleep_duration_minutes, deep_sleep_minutes, rem_sleep_minutes,
+        activity_source, activity_measured_at, steps, active_calories
+    )
+    SELECT
+        days.user_id, days.day, days.last_measurement_date,
+        hrv.source, hrv.measurement_date, hrv.hrv_rmssd, hrv.hrv_sdnn,
+        heart_rate.source, heart_rate.measurement_date, heart_rate.resting_heart_rate, heart_rate.avg_heart_rate,
+        sleep.source, sleep.measurement_date,
+        sleep.sleep_duration_minutes, sleep.deep_sleep_minutes, sleep.rem_sleep_minutes,
+        activity.source, activity.measurement_date, activity.steps, activity.active_calories
+    FROM days
+    LEFT JOIN hrv ON hrv.user_id = days.user_id AND hrv.day = days.day
+    LEFT JOIN heart_rate ON heart_rate.user_id = days.user_id AND heart_rate.day = days.day
+    LEFT JOIN sleep ON sleep.user_id = days.user_id AND sleep.day = days.day
+    LEFT JOIN activity ON activity.user_id = days.user_id AND activity.day = days.day
+    ON CONFLICT (user_id, day) DO UPDATE SET
+        last_measurement_date = EXCLUDED.last_measurement_date,
+        hrv_source = EXCLUDED.hrv_source,
+        hrv_measured_at = EXCLUDED.hrv_measured_at,
+        hrv_rmssd = EXCLUDED.hrv_rmssd,
+        hrv_sdnn = EXCLUDED.hrv_sdnn,
+        heart_rate_source = EXCLUDED.heart_rate_source,
+        heart_rate_measured_at = EXCLUDED.heart_rate_measured_at,
+        resting_heart_rate = EXCLUDED.resting_heart_rate,
+        avg_heart_rate = EXCLUDED.avg_heart_rate,
+        sleep_source = EXCLUDED.sleep_source,
+        sleep_measured_at = EXCLUDED.sleep_measured_at,
+        sleep_duration_minutes = EXCLUDED.sleep_duration_minutes,
+        deep_sleep_minutes = EXCLUDED.deep_sleep_minutes,
+        rem_sleep_minutes = EXCLUDED.rem_sleep_minutes,
+        activity_source = EXCLUDED.activity_source,
+        activity_measured_at = EXCLUDED.activity_measured_at,
+        steps = EXCLUDED.steps,
+        active_calories = EXCLUDED.active_calories
+"""
+
+# Metrics the recovery engine reads at check-in, with the column holding
+# when each was measured
+CHECKIN_METRICS = {
+    "hrv_rmssd": "hrv_measured_at",
+    "resting_heart_rate": "heart_rate_measured_at",
+    "sleep_duration_minutes": "sleep_measured_at",
+}
+
+
+def _priority_params() -> Dict[str, list]:
+    return {f"{group}_priority": list(sources) for group, sources in SOURCE_PRIORITY.items()}
+
+
+def refresh_fused_days(db: Session, user_id: int, days: Iterable[date], bounds: Dict[str, datetime]) -> None:
+    """
+    Recompute the user's fused rows for the given UTC days. `bounds` holds
+    the measurement_date range (lo/hi) covering them, for partition pruning.
+    Runs under the caller's per-user rollup lock.
+    """
+    params = {"user_id": user_id, "periods": list(days), **bounds, **_priority_params()}
+    db.execute(text(FUSE_DAYS.format(
+        utc_day=UTC_DAY,
+        filter=f"""user_id = :user_id
+          AND measurement_date >= :lo AND measurement_date < :hi
+          AND {UTC_DAY} = ANY(:periods)""",
+        stale_filter="stored.user_id = :user_id AND stored.day = ANY(:periods)"
+    )), params)
+
+
+def rebuild_fused_days(db: Session, user_id: Optional[int] = None) -> None:
+    """
+    Recompute the fused rows from wearable_data (caller commits). Days
+    before the oldest retained partition keep their rows.
+    """
+    user_filter = "user_id = :user_id" if user_id is not None else "true"
+    stale_filter = "stored.user_id = :user_id" if user_id is not None else "true"
+    params = {"user_id": user_id} if user_id is not None else {}
+
+    since = retained_since(db.connection(), "wearable_data")
+    if since is not None:
+        params.update(since=since, since_day=since.date())
+        user_filter += " AND measurement_date >= :since"
+        stale_filter += " AND stored.day >= :since_day"
+
+    db.execute(text(FUSE_DAYS.format(
+        utc_day=UTC_DAY,
+        filter=user_filter,
+        stale_filter=stale_filter
+    )), {**params, **_priority_params()})
+
+
+def get_checkin_wearable(db: Session, user_id: int, since: datetime) -> Optional[Dict]:
+    """
+    Check-in wearable metrics measured at or after `since`, from the fused
+    rows of the days touching it onward (at most two primary-key rows for a
+    24h window), newest day first per metric. Each metric is checked
+    against its own measurement time, so a day that started before `since`
+    only contributes what was measured after it. None when nothing was.
+    """
+    since = since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+    rows = db.query(*(
+        case((getattr(WearableDailyFused, measured_at) >= since, getattr(WearableDailyFused, metric)))
+        for metric, measured_at in CHECKIN_METRICS.items()
+    )).filter(
+        WearableDailyFused.user_id == user_id,
+        WearableDailyFused.day >= since.astimezone(timezone.utc).date(),
+        WearableDailyFused.last_measurement_date >= since
+    ).order_by(WearableDailyFused.day.desc()).all()
+
+    metrics = {
+        metric: next((row[index] for row in rows if row[index] is not None), None)
+        for index, metric in enumerate(CHECKIN_METRICS)
+    }
+    return metrics if any(value is not None for value in metrics.values()) else None
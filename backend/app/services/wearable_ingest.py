@@ -0,0 +1,163 @@
+"""
+Bulk wearable ingestion
+
+Writes many readings with a constant number of round trips: one SELECT of
+the metrics already stored for the batch, then multi-row
+INSERT ... ON CONFLICT DO UPDATE ... RETURNING statements. Merge semantics
+match the single-item sync: a reading's non-null fields overwrite the
+stored ones, nulls never do.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, null, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import WearableData
+from app.services.baselines import update_user_baseline
+from app.services.raw_payloads import store_raw_payloads
+from app.services.wearable_rollups import refresh_wearable_rollups, utc_day
+
+# Columns a re-sync may overwrite (everything except the natural key)
+METRIC_FIELDS = (
+    "hrv_rmssd",
+    "hrv_sdnn",
+    "resting_heart_rate",
+    "avg_heart_rate",
+    "sleep_duration_minutes",
+    "deep_sleep_minutes",
+    "rem_sleep_minutes",
+    "steps",
+    "active_calories",
+)
+
+# Reading fields merged per key; raw_data is stored as raw_data_digest
+MERGE_FIELDS = METRIC_FIELDS + ("raw_data",)
+
+# Rows per INSERT statement; keeps statements well under parameter limits
+UPSERT_CHUNK_SIZE = 1000
+
+ReadingKey = Tuple[str, datetime]
+
+
+def reading_key(source: str, measurement_date: datetime) -> ReadingKey:
+    """Natural key with timestamps normalized to UTC (naive = UTC)"""
+    if measurement_date.tzinfo is None:
+        measurement_date = measurement_date.replace(tzinfo=timezone.utc)
+    return source, measurement_date.astimezone(timezone.utc)
+
+
+def merge_readings(readings: Iterable[Dict]) -> Dict[ReadingKey, Dict]:
+    """
+    Collapse readings for the same (source, measurement_date), later non-null
+    fields winning. Postgres refuses to upsert one row twice per statement.
+    """
+    merged: Dict[ReadingKey, Dict] = {}
+    for reading in readings:
+        key = reading_key(reading["source"], reading["measurement_date"])
+        if key not in merged:
+            merged[key] = {field: reading.get(field) for field in MERGE_FIELDS}
+            merged[key]["source"] = reading["source"]
+            merged[key]["measurement_date"] = reading["measurement_date"]
+        else:
+            for field in MERGE_FIELDS:
+                if reading.get(field) is not None:
+                    merged[key][field] = reading[field]
+    return merged
+
+
+def fetch_stored_metrics(
+    db: Session,
+    user_id: int,
+    keys: List[ReadingKey]
+) -> Dict[ReadingKey, Tuple]:
+    """(hrv_rmssd, resting_heart_rate) already stored for each existing key"""
+    stored = {}
+    for start in range(0, len(keys), UPSERT_CHUNK_SIZE):
+        chunk = keys[start:start + UPSERT_CHUNK_SIZE]
+        rows = db.query(
+            WearableData.source,
+            WearableData.measurement_date,
+            WearableData.hrv_rmssd,
+            WearableData.resting_heart_rate
+        ).filter(
+            WearableData.user_id == user_id,
+            tuple_(WearableData.source, WearableData.measurement_date).in_(chunk)
+        ).all()
+        for source, measurement_date, hrv, rhr in rows:
+            stored[reading_key(source, measurement_date)] = (hrv, rhr)
+    return stored
+
+
+def bulk_upsert_wearable_data(
+    db: Session,
+    user_id: int,
+    readings: Dict[ReadingKey, Dict]
+) -> Dict[ReadingKey, WearableData]:
+    """
+    Upsert merged readings (see merge_readings) and return the stored rows
+    by key. Runs in the caller's transaction.
+    """
+    table = WearableData.__table__
+    results: Dict[ReadingKey, WearableData] = {}
+    digests = store_raw_payloads(db, (reading["raw_data"] for reading in readings.values()))
+    rows = []
+    for reading, digest in zip(readings.values(), digests):
+        row = {"user_id": user_id, **reading}
+        del row["raw_data"]
+        # Explicit NULL keeps every row's column list identical
+        row["raw_data_digest"] = digest if digest is not None else null()
+        rows.append(row)
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert(WearableData).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_wearable_data_user_id_source_measurement_date",
+            set_={
+                **{
+                    field: func.coalesce(stmt.excluded[field], table.c[field])
+                    for field in METRIC_FIELDS + ("raw_data_digest",)
+                },
+                "sync_timestamp": func.now(),
+            }
+        )
+        stored = db.scalars(
+            stmt.returning(WearableData),
+            execution_options={"populate_existing": True}
+        )
+        for row in stored:
+            results[reading_key(row.source, row.measurement_date)] = row
+
+    return results
+
+
+def ingest_readings(
+    db: Session,
+    user_id: int,
+    readings: Dict[ReadingKey, Dict]
+) -> Dict[ReadingKey, WearableData]:
+    """
+    Upsert merged readings and fold them into the user's baselines and
+    rollups.
+    Readings that already existed only contribute metrics they lacked, and
+    samples are folded oldest first so the EWMA weights recent days most.
+    Runs in the caller's transaction.
+    """
+    keys = list(readings)
+    stored = fetch_stored_metrics(db, user_id, keys)
+
+    baseline_samples = []
+    for key in sorted(keys, key=lambda key: key[1]):
+        hrv = readings[key].get("hrv_rmssd")
+        rhr = readings[key].get("resting_heart_rate")
+        if key in stored:
+            stored_hrv, stored_rhr = stored[key]
+            hrv = hrv if stored_hrv is None else None
+            rhr = rhr if stored_rhr is None else None
+        baseline_samples.append((hrv, rhr))
+
+    rows = bulk_upsert_wearable_data(db, user_id, readings)
+    update_user_baseline(db, user_id, baseline_samples)
+    refresh_wearable_rollups(db, user_id, (utc_day(key[1]) for key in keys))
+    return rows
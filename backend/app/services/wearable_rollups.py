@@ -0,0 +1,307 @@
+"""
+Multi-resolution wearable rollups
+
+wearable_rollups holds per-user, per-source aggregates at day, week and
+month resolution, plus combined rows under ALL_SOURCES. After every sync or
+delete the touched days are recomputed from wearable_data and the enclosing
+weeks/months from the daily rows, in one statement, so each refresh reads a
+handful of rows and stays exact under merges and deletes. Long-range
+history reads one rollup row per period instead of every reading.
+
+Combined rows pool the HRV, resting-HR and sleep readings of all sources,
+but take steps and active calories from the source with the largest day
+total: a phone and a watch count the same walk, so summing them would
+double it.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.models import WearableRollup
+from app.services.partitions import retained_since
+from app.services.wearable_fusion import rebuild_fused_days, refresh_fused_days
+
+RESOLUTIONS = ("day", "week", "month")
+
+# Source of the combined rows; wearable sources never start with "*"
+ALL_SOURCES = "*"
+
+# History spans (days) served by each resolution; longer goes coarser
+DAY_MAX_DAYS = 180
+WEEK_MAX_DAYS = 730
+
+# First key of the advisory lock serializing a user's rollup refreshes
+ROLLUP_LOCK_CLASS = 4207
+
+METRIC_COLUMNS = """
+    reading_count,
+    hrv_count, hrv_sum, hrv_min, hrv_max,
+    rhr_count, rhr_sum, rhr_min, rhr_max,
+    sleep_count, sleep_sum, sleep_min, sleep_max,
+    steps_sum, active_calories_sum
+"""
+
+ROLLUP_COLUMNS = f"user_id, resolution, source, period_start, {METRIC_COLUMNS}"
+
+# Per source and day, from wearable_data
+DAILY_AGGREGATES = """
+    count(*) AS reading_count,
+    count(hrv_rmssd) AS hrv_count, coalesce(sum(hrv_rmssd), 0) AS hrv_sum,
+    min(hrv_rmssd) AS hrv_min, max(hrv_rmssd) AS hrv_max,
+    count(resting_heart_rate) AS rhr_count, coalesce(sum(resting_heart_rate), 0) AS rhr_sum,
+    min(resting_heart_rate) AS rhr_min, max(resting_heart_rate) AS rhr_max,
+    count(sleep_duration_minutes) AS sleep_count, coalesce(sum(sleep_duration_minutes), 0) AS sleep_sum,
+    min(sleep_duration_minutes) AS sleep_min, max(sleep_duration_minutes) AS sleep_max,
+    sum(steps) AS steps_sum, sum(active_calories) AS active_calories_sum
+"""
+
+# Week/month rows from the day rows of one source (or of ALL_SOURCES)
+PERIOD_AGGREGATES = """
+    sum(reading_count),
+    sum(hrv_count), sum(hrv_sum), min(hrv_min), max(hrv_max),
+    sum(rhr_count), sum(rhr_sum), min(rhr_min), max(rhr_max),
+    sum(sleep_count), sum(sleep_sum), min(sleep_min), max(sleep_max),
+    sum(steps_sum), sum(active_calories_sum)
+"""
+
+# ALL_SOURCES day rows from the per-source day rows of the same day
+COMBINED_AGGREGATES = """
+    sum(reading_count),
+    sum(hrv_count), sum(hrv_sum), min(hrv_min), max(hrv_max),
+    sum(rhr_count), sum(rhr_sum), min(rhr_min), max(rhr_max),
+    sum(sleep_count), sum(sleep_sum), min(sleep_min), max(sleep_max),
+    max(steps_sum), max(active_calories_sum)
+"""
+
+UTC_DAY = "(measurement_date AT TIME ZONE 'UTC')::date"
+
+
+def _bucket(resolution: str, column: str = "period_start") -> str:
+    # resolution is one of RESOLUTIONS, never user input
+    return f"date_trunc('{resolution}', {column}::timestamp)::date"
+
+
+# Recomputes the :days rows and the :weeks/:months rows around them. Week
+# and month rows are rebuilt from the fresh day rows plus the stored day
+# rows of the other days in those periods. Rows that no longer have data
+# are deleted; the rest are upserted, so the two sets never overlap.
+REFRESH_ROLLUPS = f"""
+    WITH day_rows AS (
+        SELECT source, {UTC_DAY} AS period_start, {DAILY_AGGREGATES}
+        FROM wearable_data
+        WHERE user_id = :user_id
+          AND measurement_date >= :lo AND measurement_date < :hi
+          AND {UTC_DAY} = ANY(:days)
+        GROUP BY source, {UTC_DAY}
+    ),
+    touched_days AS (
+        SELECT source, period_start, {METRIC_COLUMNS} FROM day_rows
+        UNION ALL
+        SELECT :all_sources, period_start, {COMBINED_AGGREGATES}
+        FROM day_rows
+        GROUP BY period_start
+    ),
+    period_days AS (
+        SELECT source, period_start, {METRIC_COLUMNS} FROM touched_days
+        UNION ALL
+        SELECT source, period_start, {METRIC_COLUMNS}
+        FROM wearable_rollups
+        WHERE user_id = :user_id AND resolution = 'day'
+          AND period_start >= :period_lo AND period_start < :period_hi
+          AND NOT period_start = ANY(:days)
+    ),
+    fresh AS (
+        SELECT 'day' AS resolution, source, period_start, {METRIC_COLUMNS} FROM touched_days
+        UNION ALL
+        SELECT 'week', source, {_bucket('week')}, {PERIOD_AGGREGATES}
+        FROM period_days
+        WHERE {_bucket('week')} = ANY(:weeks)
+        GROUP BY source, {_bucket('week')}
+        UNION ALL
+        SELECT 'month', source, {_bucket('month')}, {PERIOD_AGGREGATES}
+        FROM period_days
+        WHERE {_bucket('month')} = ANY(:months)
+        GROUP BY source, {_bucket('month')}
+    ),
+    stale AS (
+        DELETE FROM wearable_rollups AS stored
+        WHERE stored.user_id = :user_id
+          AND (
+              (stored.resolution = 'day' AND stored.period_start = ANY(:days))
+              OR (stored.resolution = 'week' AND stored.period_start = ANY(:weeks))
+              OR (stored.resolution = 'month' AND stored.period_start = ANY(:months))
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM fresh
+              WHERE fresh.resolution = stored.resolution
+                AND fresh.period_start = stored.period_start
+                AND fresh.source = stored.source
+          )
+    )
+    INSERT INTO wearable_rollups ({ROLLUP_COLUMNS})
+    SELECT :user_id, resolution, source, period_start, {METRIC_COLUMNS}
+    FROM fresh
+    ON CONFLICT (user_id, resolution, period_start, source) DO UPDATE SET
+        {", ".join(f"{column} = EXCLUDED.{column}" for column in METRIC_COLUMNS.replace(",", " ").split())}
+"""
+
+
+def period_start(day: date, resolution: str) -> date:
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    if resolution == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period_start(start: date, resolution: str) -> date:
+    if resolution == "week":
+        return start + timedelta(days=7)
+    if resolution == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def pick_resolution(days: int) -> str:
+    """Coarsest resolution that still gives a useful chart for the span"""
+    if days <= DAY_MAX_DAYS:
+        return "day"
+    if days <= WEEK_MAX_DAYS:
+        return "week"
+    return "month"
+
+
+def utc_day(measurement_date: datetime) -> date:
+    if measurement_date.tzinfo is None:
+        measurement_date = measurement_date.replace(tzinfo=timezone.utc)
+    return measurement_date.astimezone(timezone.utc).date()
+
+
+def refresh_wearable_rollups(db: Session, user_id: int, days: Iterable[date]) -> None:
+    """
+    Recompute the user's rollups for the given UTC days (and their weeks
+    and months) and fused daily records from wearable_data. Call after
+    writing the readings, in the same transaction.
+    """
+    days = sorted(set(days))
+    if not days:
+        return
+
+    db.flush()
+
+    # Serialize per user: the recompute must see other syncs' committed rows
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:lock_class, :user_id)"),
+        {"lock_class": ROLLUP_LOCK_CLASS, "user_id": user_id}
+    )
+
+    weeks = sorted({period_start(day, "week") for day in days})
+    months = sorted({period_start(day, "month") for day in days})
+    bounds = {
+        "lo": datetime.combine(days[0], datetime.min.time(), tzinfo=timezone.utc),
+        "hi": datetime.combine(days[-1] + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc),
+    }
+    db.execute(text(REFRESH_ROLLUPS), {
+        "user_id": user_id,
+        "all_sources": ALL_SOURCES,
+        "days": days,
+        "weeks": weeks,
+        "months": months,
+        "period_lo": min(weeks[0], months[0]),
+        "period_hi": max(next_period_start(weeks[-1], "week"), next_period_start(months[-1], "month")),
+        **bounds,
+    })
+
+    refresh_fused_days(db, user_id, days, bounds)
+
+
+def rebuild_wearable_rollups(db: Session, user_id: Optional[int] = None) -> None:
+    """
+    Recompute the rollups and fused daily records from wearable_data (caller
+    commits). Days before the oldest retained partition keep their rows;
+    the week straddling it is rebuilt from the stored day rows.
+    """
+    user_filter = "AND user_id = :user_id" if user_id is not None else ""
+    params = {"user_id": user_id} if user_id is not None else {}
+    raw_filter = day_filter = period_filter = user_filter
+
+    since = retained_since(db.connection(), "wearable_data")
+    if since is not None:
+        params.update(since=since, since_day=since.date(), period_lo=period_start(since.date(), "week"))
+        raw_filter += " AND measurement_date >= :since"
+        day_filter += " AND period_start >= :since_day"
+        period_filter += " AND period_start >= :period_lo"
+
+    db.execute(text(f"DELETE FROM wearable_rollups WHERE resolution = 'day' {day_filter}"), params)
+    db.execute(text(f"DELETE FROM wearable_rollups WHERE resolution <> 'day' {period_filter}"), params)
+    db.execute(text(f"""
+        INSERT INTO wearable_rollups ({ROLLUP_COLUMNS})
+        SELECT user_id, 'day', source, {UTC_DAY}, {DAILY_AGGREGATES}
+        FROM wearable_data
+        WHERE true {raw_filter}
+        GROUP BY user_id, source, {UTC_DAY}
+    """), params)
+    db.execute(text(f"""
+        INSERT INTO wearable_rollups ({ROLLUP_COLUMNS})
+        SELECT user_id, 'day', :all_sources, period_start, {COMBINED_AGGREGATES}
+        FROM wearable_rollups
+        WHERE resolution = 'day' {day_filter}
+        GROUP BY user_id, period_start
+    """), {**params, "all_sources": ALL_SOURCES})
+    for resolution in RESOLUTIONS[1:]:
+        # Only whole periods from period_lo on: earlier months keep their rows
+        bucket_filter = user_filter + (f" AND {_bucket(resolution)} >= :period_lo" if since is not None else "")
+        db.execute(text(f"""
+            INSERT INTO wearable_rollups ({ROLLUP_COLUMNS})
+            SELECT user_id, '{resolution}', source, {_bucket(resolution)}, {PERIOD_AGGREGATES}
+            FROM wearable_rollups
+            WHERE resolution = 'day' {bucket_filter}
+            GROUP BY user_id, source, {_bucket(resolution)}
+        """), params)
+    rebuild_fused_days(db, user_id)
+
+
+def _mean(total, count) -> Optional[float]:
+    return round(float(total) / count, 1) if count else None
+
+
+def get_wearable_rollup_history(
+    db: Session,
+    user_id: int,
+    resolution: str,
+    since: datetime,
+    source: Optional[str] = None
+) -> List[Dict]:
+    """
+    One point per period, newest first, starting with the period that
+    contains `since`. Without a source, the combined (ALL_SOURCES) rows.
+    """
+    rows = db.query(WearableRollup).filter(
+        WearableRollup.user_id == user_id,
+        WearableRollup.resolution == resolution,
+        WearableRollup.source == (source or ALL_SOURCES),
+        WearableRollup.period_start >= period_start(utc_day(since), resolution)
+    ).order_by(WearableRollup.period_start.desc()).all()
+
+    return [
+        {
+            "period_start": row.period_start,
+            "resolution": resolution,
+            "source": source,
+            "reading_count": row.reading_count,
+            "hrv_mean": _mean(row.hrv_sum, row.hrv_count),
+            "hrv_min": row.hrv_min,
+            "hrv_max": row.hrv_max,
+            "resting_heart_rate_mean": _mean(row.rhr_sum, row.rhr_count),
+            "resting_heart_rate_min": row.rhr_min,
+            "resting_heart_rate_max": row.rhr_max,
+            "sleep_duration_minutes_mean": _mean(row.sleep_sum, row.sleep_count),
+            "sleep_duration_minutes_min": row.sleep_min,
+            "sleep_duration_minutes_max": row.sleep_max,
+            "steps": row.steps_sum,
+            "active_calories": row.active_calories_sum,
+        }
+        for row in rows
+    ]
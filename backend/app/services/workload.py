@@ -0,0 +1,82 @@
+"""
+Per-user training workload
+
+One running-state row per user (see integration.workload) updated with
+each logged session, so the acute:chronic workload ratio, monotony and
+strain cost the same to maintain and to read whether the user has a week
+or years of sessions. A session's load is its total volume.
+"""
+from datetime import date, timezone
+from typing import Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import UserWorkload, WorkoutSession
+from integration.workload import add_session_load, empty_workload, workload_snapshot
+
+STATE_FIELDS = tuple(empty_workload())
+
+
+def _state(row: UserWorkload) -> Dict:
+    return {field: getattr(row, field) for field in STATE_FIELDS}
+
+
+def _lock_workload(db: Session, user_id: int) -> Optional[UserWorkload]:
+    return db.query(UserWorkload).filter(
+        UserWorkload.user_id == user_id
+    ).with_for_update().first()
+
+
+def update_user_workload(db: Session, user_id: int, day: date, load: Optional[float]) -> UserWorkload:
+    """
+    Fold one session's load into the user's workload state. Runs inside
+    the caller's transaction; the row is locked so concurrent logs for the
+    same user apply one after the other.
+    """
+    row = _lock_workload(db, user_id)
+    if row is None:
+        # First session: create the row without racing a concurrent first
+        # log, then lock whichever insert won
+        db.execute(
+            insert(UserWorkload)
+            .values(user_id=user_id, **empty_workload())
+            .on_conflict_do_nothing(index_elements=[UserWorkload.user_id])
+        )
+        row = _lock_workload(db, user_id)
+
+    for field, value in add_session_load(_state(row), day, load).items():
+        setattr(row, field, value)
+    return row
+
+
+def get_workload_snapshot(db: Session, user_id: int, today: date) -> Dict:
+    """Workload metrics as of `today` (all zero/None for a user without sessions)"""
+    row = db.get(UserWorkload, user_id)
+    return workload_snapshot(_state(row) if row else None, today)
+
+
+def rebuild_user_workloads(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute workload state from workout_sessions in date order (caller
+    commits). Returns the number of users rebuilt.
+    """
+    delete = db.query(UserWorkload)
+    sessions = db.query(WorkoutSession.user_id, WorkoutSession.session_date, WorkoutSession.total_volume)
+    if user_id is not None:
+        delete = delete.filter(UserWorkload.user_id == user_id)
+        sessions = sessions.filter(WorkoutSession.user_id == user_id)
+    delete.delete(synchronize_session=False)
+
+    states: Dict[int, Dict] = {}
+    for session_user_id, session_date, volume in sessions.order_by(
+        WorkoutSession.user_id, WorkoutSession.session_date
+    ).yield_per(5000):
+        if session_date is None:
+            continue
+        states[session_user_id] = add_session_load(
+            states.get(session_user_id), session_date.astimezone(timezone.utc).date(), volume
+        )
+
+    db.add_all(UserWorkload(user_id=uid, **state) for uid, state in states.items())
+    return len(states)
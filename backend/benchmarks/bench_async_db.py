@@ -0,0 +1,117 @@
+"""
+Benchmark: concurrent I/O-bound requests, sync def + psycopg2 vs. async def + psycopg 3
+
+Serves the same endpoint, one query that waits `--query-ms` in Postgres
+(pg_sleep, standing in for a slow per-user read), as a sync route on the
+blocking engine (what every route was) and as an async route on the async
+engine (what they are now), then fires `--requests` requests at each with
+`--concurrency` in flight through an in-process ASGI client. Sync routes
+run on Starlette's threadpool (40 threads), so their throughput flattens
+once concurrency passes it; async routes are bounded by the connection
+pool. Both engines get the same pool size. Needs a Postgres database
+(nothing is written).
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_async_db [--requests 2000] [--concurrency 200]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+QUERY = text("SELECT pg_sleep(:seconds)")
+
+
+def make_app(url: str, pool_size: int, query_seconds: float) -> FastAPI:
+    sync_engine = create_engine(url, pool_size=pool_size, max_overflow=0)
+    async_engine = create_async_engine(
+        make_url(url).set(drivername="postgresql+psycopg"),
+        pool_size=pool_size,
+        max_overflow=0
+    )
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSessionFactory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionFactory() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_read(db: Session = Depends(get_sync_db)):
+        db.execute(QUERY, {"seconds": query_seconds})
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_read(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(QUERY, {"seconds": query_seconds})
+        return {"ok": True}
+
+    app.state.engines = (sync_engine, async_engine)
+    return app
+
+
+async def drive(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    """Seconds to complete `requests` GETs with `concurrency` in flight"""
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        # Warm both pools before timing
+        await asyncio.gather(*(client.get(path) for _ in range(min(concurrency, 20))))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+async def run(args, url: str) -> None:
+    app = make_app(url, args.pool_size, args.query_ms / 1000)
+    try:
+        for label, path in (("sync def", "/sync"), ("async def", "/async")):
+            seconds = await drive(app, path, args.requests, args.concurrency)
+            print(f"{label:<10}: {args.requests / seconds:8.1f} req/s  ({seconds:.2f}s)")
+    finally:
+        sync_engine, async_engine = app.state.engines
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=100)
+    parser.add_argument("--query-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        parser.error("BENCH_DATABASE_URL must point at a Postgres database")
+
+    print(f"requests={args.requests} concurrency={args.concurrency} "
+          f"pool_size={args.pool_size} query_ms={args.query_ms}")
+    asyncio.run(run(args, url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: renewing a session by password login vs. by refresh token
+
+Times the work behind POST /auth/login (user lookup, bcrypt verify, new
+token family) and POST /auth/refresh (HMAC check, one conditional UPDATE
+on the family's primary key, new pair) against the same user, each in its
+own transaction, and reports latency and single-core throughput. Needs a
+disposable Postgres database; the tables are dropped and recreated.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_auth_refresh [--logins 20] [--refreshes 2000]
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash, verify_password
+from app.db.base import Base
+from app.db.models import User
+from app.services.refresh_tokens import issue_token_pair, rotate_refresh_token
+
+PASSWORD = "correct horse battery staple"
+
+
+def run_logins(engine, count):
+    for _ in range(count):
+        with Session(engine) as db:
+            user = db.query(User).filter(User.username == "bench").first()
+            assert verify_password(PASSWORD, user.hashed_password)
+            tokens = issue_token_pair(db, user)
+            db.commit()
+    return tokens
+
+
+def run_refreshes(engine, count, refresh_token):
+    for _ in range(count):
+        with Session(engine) as db:
+            refresh_token = rotate_refresh_token(db, refresh_token)["refresh_token"]
+            db.commit()
+
+
+def report(label, seconds, count):
+    print(f"{label:<8}: {seconds / count * 1000:8.2f} ms/op  {count / seconds:8.1f} ops/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--refreshes", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        parser.error("BENCH_DATABASE_URL must point at a disposable Postgres database")
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(User(email="bench@example.com", username="bench", hashed_password=get_password_hash(PASSWORD)))
+        db.commit()
+
+    started = time.perf_counter()
+    tokens = run_logins(engine, args.logins)
+    login = time.perf_counter() - started
+
+    started = time.perf_counter()
+    run_refreshes(engine, args.refreshes, tokens["refresh_token"])
+    refresh = time.perf_counter() - started
+
+    report("login", login, args.logins)
+    report("refresh", refresh, args.refreshes)
+    print(f"speedup : {(login / args.logins) / (refresh / args.refreshes):.0f}x per renewal")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Micro-benchmark: compiled scoring policy vs. the original hand-written branches
+
+Checks both paths agree on a random sample, then times them.
+
+Usage:
+    python -m benchmarks.bench_scoring_policy [--rows 20000] [--repeat 5]
+"""
+import argparse
+import random
+import timeit
+
+from integration.recovery_engine import calculate_recovery_score
+from integration.recommendation_rules import get_workout_recommendation
+from integration.scoring_policy import get_active_policy
+
+
+def _clamp(value, min_value, max_value):
+    return max(min_value, min(max_value, value))
+
+
+def legacy_calculate_recovery_score(recovery_data, wearable_data=None):
+    """The engine as it was before scoring policies (population thresholds only)"""
+    sleep_quality = _clamp(float(recovery_data.get("sleep_quality", 5)), 1, 10)
+    soreness = _clamp(float(recovery_data.get("soreness_level", 5)), 1, 10)
+    energy = _clamp(float(recovery_data.get("energy_level", 5)), 1, 10)
+    stress = _clamp(float(recovery_data.get("stress_level", 5)), 1, 10)
+
+    base_score = (
+        0.30 * sleep_quality +
+        0.25 * (11 - soreness) +
+        0.20 * energy +
+        0.15 * (11 - stress)
+    )
+
+    if wearable_data and wearable_data.get("sleep_duration_minutes"):
+        sleep_hours = wearable_data["sleep_duration_minutes"] / 60.0
+    else:
+        sleep_hours = float(recovery_data.get("sleep_hours") or 0)
+
+    if sleep_hours <= 0:
+        sleep_factor = 1.0
+    elif sleep_hours < 5:
+        sleep_factor = 0.8
+    elif sleep_hours < 6:
+        sleep_factor = 0.9
+    elif sleep_hours <= 8.5:
+        sleep_factor = 1.0
+    else:
+        sleep_factor = 1.05
+
+    score = base_score * sleep_factor
+
+    if wearable_data:
+        hrv = wearable_data.get("hrv_rmssd")
+        rhr = wearable_data.get("resting_heart_rate")
+
+        if hrv is not None:
+            try:
+                hrv = float(hrv)
+                if hrv >= 80:
+                    score += 0.7
+                elif hrv >= 60:
+                    score += 0.4
+                elif hrv >= 40:
+                    score += 0.2
+                elif hrv >= 20:
+                    score += 0.0
+                else:
+                    score -= 0.3
+            except (TypeError, ValueError):
+                pass
+
+        if rhr is not None:
+            try:
+                rhr = float(rhr)
+                if rhr <= 50:
+                    score += 0.3
+                elif rhr <= 60:
+                    score += 0.15
+                elif rhr <= 70:
+                    score += 0.0
+                elif rhr <= 80:
+                    score -= 0.2
+                else:
+                    score -= 0.4
+            except (TypeError, ValueError):
+                pass
+
+    return round(_clamp(score, 1.0, 10.0), 1)
+
+
+def legacy_get_workout_recommendation(recovery_score):
+    if recovery_score >= 8.0:
+        return "Heavy"
+    elif recovery_score >= 5.0:
+        return "Moderate"
+    else:
+        return "Light/Rest"
+
+
+def make_samples(rows, seed=42):
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(rows):
+        recovery = {
+            "sleep_quality": rng.randint(1, 10),
+            "soreness_level": rng.randint(1, 10),
+            "energy_level": rng.randint(1, 10),
+            "stress_level": rng.randint(1, 10),
+            "sleep_hours": rng.choice([None, 4.0, 5.0, 6.0, 8.5, rng.uniform(3, 10)]),
+        }
+        wearable = None
+        if rng.random() < 0.7:
+            wearable = {
+                "hrv_rmssd": rng.choice([None, rng.uniform(10, 120)]),
+                "resting_heart_rate": rng.choice([None, rng.randint(40, 90)]),
+                "sleep_duration_minutes": rng.choice([None, rng.randint(200, 600)]),
+            }
+        samples.append((recovery, wearable))
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    samples = make_samples(args.rows)
+    policy = get_active_policy()
+
+    for recovery, wearable in samples:
+        expected = legacy_calculate_recovery_score(recovery, wearable)
+        assert calculate_recovery_score(recovery, wearable, policy=policy) == expected
+        assert get_workout_recommendation(expected, policy) == legacy_get_workout_recommendation(expected)
+
+    def run_legacy():
+        for recovery, wearable in samples:
+            legacy_get_workout_recommendation(legacy_calculate_recovery_score(recovery, wearable))
+
+    def run_compiled():
+        for recovery, wearable in samples:
+            get_workout_recommendation(calculate_recovery_score(recovery, wearable, policy=policy), policy)
+
+    legacy = min(timeit.repeat(run_legacy, number=1, repeat=args.repeat))
+    compiled = min(timeit.repeat(run_compiled, number=1, repeat=args.repeat))
+
+    print(f"policy version : {policy.version}")
+    print(f"rows           : {args.rows}")
+    print(f"hand-written   : {legacy / args.rows * 1e6:.2f} us/score")
+    print(f"compiled policy: {compiled / args.rows * 1e6:.2f} us/score")
+    print(f"ratio          : {compiled / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
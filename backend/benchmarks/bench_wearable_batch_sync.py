@@ -0,0 +1,141 @@
+"""
+Benchmark: /wearables/sync/batch write path, per-item vs. bulk upsert
+
+Replays the same Apple Health style backfill (half new readings, half
+re-syncs of stored ones) through the old select-per-item + refresh path
+and through ingest_readings (what /sync and /sync/batch run), reporting
+wall time and the number of statements sent. Both paths include the
+baseline, rollup and fused-day refreshes a sync performs. Needs a disposable Postgres database; the
+tables are dropped and recreated.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_wearable_batch_sync [--items 500]
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.models import User, WearableData
+from app.services.baselines import update_user_baseline
+from app.services.raw_payloads import store_raw_payload
+from app.services.wearable_ingest import ingest_readings, merge_readings
+from app.services.wearable_rollups import refresh_wearable_rollups, utc_day
+
+
+def make_readings(items, offset_days=0):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "source": "apple_health",
+            "measurement_date": start + timedelta(days=offset_days + i),
+            "hrv_rmssd": 40.0 + i % 30,
+            "resting_heart_rate": 50 + i % 15,
+            "sleep_duration_minutes": 380 + i % 90,
+            "steps": 8000 + i,
+            "raw_data": {"device": "watch", "index": i},
+        }
+        for i in range(items)
+    ]
+
+
+def legacy_sync(db, user_id, readings):
+    """The per-item path /sync/batch used before bulk upserts"""
+    results = []
+    baseline_samples = []
+    for reading in sorted(readings, key=lambda reading: reading["measurement_date"]):
+        reading = dict(reading)
+        reading["raw_data_digest"] = store_raw_payload(db, reading.pop("raw_data"))
+        existing = db.query(WearableData).filter(
+            WearableData.user_id == user_id,
+            WearableData.source == reading["source"],
+            WearableData.measurement_date == reading["measurement_date"]
+        ).first()
+        baseline_samples.append((
+            reading["hrv_rmssd"] if existing is None or existing.hrv_rmssd is None else None,
+            reading["resting_heart_rate"] if existing is None or existing.resting_heart_rate is None else None,
+        ))
+        if existing:
+            for key, value in reading.items():
+                if key not in ["source", "measurement_date"] and value is not None:
+                    setattr(existing, key, value)
+            existing.sync_timestamp = datetime.now(timezone.utc)
+            results.append(existing)
+        else:
+            new_data = WearableData(user_id=user_id, **reading)
+            db.add(new_data)
+            results.append(new_data)
+    update_user_baseline(db, user_id, baseline_samples)
+    refresh_wearable_rollups(db, user_id, (utc_day(reading["measurement_date"]) for reading in readings))
+    db.commit()
+    for item in results:
+        db.refresh(item)
+    return results
+
+
+def bulk_sync(db, user_id, readings):
+    rows = ingest_readings(db, user_id, merge_readings(readings))
+    db.commit()
+    return rows
+
+
+def run(engine, user_id, sync, readings):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        with Session(engine) as db:
+            started = time.perf_counter()
+            sync(db, user_id, readings)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return elapsed, len(statements)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        raise SystemExit("Set BENCH_DATABASE_URL to a disposable Postgres database")
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        db.add_all([
+            User(id=1, email="legacy@example.com", username="legacy", hashed_password="x"),
+            User(id=2, email="bulk@example.com", username="bulk", hashed_password="x"),
+        ])
+        db.commit()
+
+    # Half the batch re-syncs readings that are already stored
+    half = args.items // 2
+    for user_id, sync in ((1, legacy_sync), (2, bulk_sync)):
+        run(engine, user_id, sync, make_readings(half))
+
+    batch = make_readings(args.items)
+    legacy_time, legacy_statements = run(engine, 1, legacy_sync, batch)
+    bulk_time, bulk_statements = run(engine, 2, bulk_sync, batch)
+
+    print(f"items          : {args.items} ({half} already stored)")
+    print(f"per-item path  : {legacy_time * 1000:8.1f} ms, {legacy_statements} statements")
+    print(f"bulk upsert    : {bulk_time * 1000:8.1f} ms, {bulk_statements} statements")
+    print(f"speedup        : {legacy_time / bulk_time:.1f}x")
+
+    Base.metadata.drop_all(engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from typing import Dict, Optional, Tuple
+
+# ~4-week exponential window; early samples use a plain running mean
+# (alpha = 1/n) until the window is full.
+BASELINE_SPAN_DAYS = 28
+BASELINE_ALPHA = 2.0 / (BASELINE_SPAN_DAYS + 1)
+
+# Personal baselines are only trusted once a week of readings exists
+MIN_BASELINE_SAMPLES = 7
+
+# Floors on the standard deviation so a very stable user does not turn
+# small day-to-day noise into huge z-scores
+MIN_HRV_STD = 3.0
+MIN_RHR_STD = 1.0
+
+
+def update_ewma(
+    mean: Optional[float],
+    variance: Optional[float],
+    count: int,
+    value: float,
+    alpha: float = BASELINE_ALPHA
+) -> Tuple[float, float, int]:
+    """Fold one sample into an exponentially weighted mean/variance in O(1)."""
+    count = (count or 0) + 1
+    if mean is None or count == 1:
+        return float(value), 0.0, count
+
+    weight = max(alpha, 1.0 / count)
+    diff = value - mean
+    increment = weight * diff
+    mean = mean + increment
+    variance = (1 - weight) * ((variance or 0.0) + diff * increment)
+    return mean, variance, count
+
+
+def scoring_baseline(
+    hrv_mean: Optional[float],
+    hrv_variance: Optional[float],
+    hrv_count: int,
+    rhr_mean: Optional[float],
+    rhr_variance: Optional[float],
+    rhr_count: int
+) -> Dict[str, Optional[float]]:
+    """
+    Baseline dict accepted by calculate_recovery_score. Metrics without
+    enough history are None so the engine keeps its population thresholds.
+    """
+    baseline: Dict[str, Optional[float]] = {
+        "hrv_baseline_mean": None,
+        "hrv_baseline_std": None,
+        "rhr_baseline_mean": None,
+        "rhr_baseline_std": None,
+    }
+
+    if hrv_mean is not None and (hrv_count or 0) >= MIN_BASELINE_SAMPLES:
+        baseline["hrv_baseline_mean"] = hrv_mean
+        baseline["hrv_baseline_std"] = max((hrv_variance or 0.0) ** 0.5, MIN_HRV_STD)
+
+    if rhr_mean is not None and (rhr_count or 0) >= MIN_BASELINE_SAMPLES:
+        baseline["rhr_baseline_mean"] = rhr_mean
+        baseline["rhr_baseline_std"] = max((rhr_variance or 0.0) ** 0.5, MIN_RHR_STD)
+
+    return baseline
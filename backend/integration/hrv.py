@@ -0,0 +1,95 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Physiologically plausible RR intervals (ms): 30-200 bpm
+MIN_RR_MS = 300.0
+MAX_RR_MS = 2000.0
+
+# A beat differing from the local median by more than this fraction is
+# treated as an ectopic beat or a missed/extra detection
+MAX_MEDIAN_DEVIATION = 0.20
+MEDIAN_WINDOW = 11
+
+# Packed storage encodings for RR series
+INT16_ENCODING = "int16_ms"
+FLOAT32_ENCODING = "float32_ms"
+
+
+def _rolling_median(values: np.ndarray, window: int) -> np.ndarray:
+    """Centered rolling median, edges padded by reflection"""
+    if values.size < window:
+        return np.full(values.size, np.median(values)) if values.size else values
+    half = window // 2
+    padded = np.pad(values, half, mode="reflect")
+    return np.median(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+
+
+def artifact_mask(rr_ms: np.ndarray) -> np.ndarray:
+    """True for beats kept: in range and close to their local median"""
+    valid = (rr_ms >= MIN_RR_MS) & (rr_ms <= MAX_RR_MS)
+    if not valid.any():
+        return valid
+    # Median over in-range beats only, so one wild value can't shift it
+    in_range = rr_ms[valid]
+    local_median = np.empty_like(rr_ms)
+    local_median[valid] = _rolling_median(in_range, MEDIAN_WINDOW)
+    local_median[~valid] = np.nan
+    with np.errstate(invalid="ignore"):
+        return valid & (np.abs(rr_ms - local_median) <= MAX_MEDIAN_DEVIATION * local_median)
+
+
+def compute_hrv_metrics(rr_intervals: Sequence[float]) -> Dict[str, Optional[float]]:
+    """
+    Time-domain HRV from an RR-interval series in milliseconds.
+
+    Artifacts are dropped first (see artifact_mask). SDNN uses every clean
+    beat; RMSSD and pNN50 only use successive differences between two clean
+    beats that were adjacent in the recording, so a removed beat never
+    produces a spurious jump.
+    """
+    rr = np.asarray(rr_intervals, dtype=np.float64)
+    keep = artifact_mask(rr)
+    clean = rr[keep]
+
+    metrics: Dict[str, Optional[float]] = {
+        "beat_count": int(rr.size),
+        "artifact_count": int(rr.size - clean.size),
+        "artifact_ratio": round(float(1 - clean.size / rr.size), 4) if rr.size else None,
+        "mean_rr": None,
+        "mean_heart_rate": None,
+        "sdnn": None,
+        "rmssd": None,
+        "pnn50": None,
+    }
+    if clean.size < 2:
+        return metrics
+
+    successive = np.diff(rr)[keep[1:] & keep[:-1]]
+    mean_rr = clean.mean()
+    metrics["mean_rr"] = round(float(mean_rr), 1)
+    metrics["mean_heart_rate"] = round(float(60000.0 / mean_rr), 1)
+    metrics["sdnn"] = round(float(clean.std(ddof=1)), 2)
+    if successive.size:
+        metrics["rmssd"] = round(float(np.sqrt(np.mean(successive ** 2))), 2)
+        metrics["pnn50"] = round(float(np.mean(np.abs(successive) > 50.0) * 100), 2)
+    return metrics
+
+
+def pack_rr_intervals(rr_intervals: Sequence[float]) -> Tuple[str, bytes]:
+    """
+    Pack a series as little-endian int16 milliseconds when every value is a
+    whole number that fits (2 bytes/beat), else float32 (4 bytes/beat).
+    """
+    rr = np.asarray(rr_intervals, dtype=np.float64)
+    if rr.size and np.all(rr == np.round(rr)) and rr.min() >= 0 and rr.max() <= np.iinfo(np.int16).max:
+        return INT16_ENCODING, rr.astype("<i2").tobytes()
+    return FLOAT32_ENCODING, rr.astype("<f4").tobytes()
+
+
+def unpack_rr_intervals(encoding: str, data: bytes) -> np.ndarray:
+    if encoding == INT16_ENCODING:
+        return np.frombuffer(data, dtype="<i2").astype(np.float64)
+    if encoding == FLOAT32_ENCODING:
+        return np.frombuffer(data, dtype="<f4").astype(np.float64)
+    raise ValueError(f"Unknown RR-interval encoding: {encoding}")
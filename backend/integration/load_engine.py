@@ -0,0 +1,128 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from integration.recommendation_rules import get_workout_recommendations
+from integration.scoring_policy import CompiledPolicy, get_active_policy
+
+# Brzycki is the better fit up to ~10 reps; Epley beyond that
+BRZYCKI_MAX_REPS = 10
+
+# Intensity the next-load suggestion aims for (also assumed for sets logged
+# without RPE), the step added on top, and the per-session cap on how far
+# the suggestion may move above the load just lifted
+TARGET_RPE = 8.0
+PROGRESSION_STEP = 0.025
+MAX_PROGRESSION = 0.05
+
+# Suggestions are rounded down to a loadable increment (kg)
+LOAD_INCREMENT = 2.5
+
+# Scale on the suggested load for the recommendation the recovery score
+# maps to (integration.recommendation_rules); unknown scores leave it as is
+RECOMMENDATION_LOAD_FACTOR = {
+    "Heavy": 1.0,
+    "Moderate": 0.95,
+    "Light/Rest": 0.85,
+}
+
+
+def epley_1rm(weight, reps) -> np.ndarray:
+    """Epley: w * (1 + reps/30); a single is its own 1RM"""
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    return np.where(reps <= 1, weight, weight * (1 + reps / 30.0))
+
+
+def brzycki_1rm(weight, reps) -> np.ndarray:
+    """Brzycki: w * 36 / (37 - reps), defined below 37 reps"""
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(reps < 37, weight * 36.0 / (37.0 - reps), np.nan)
+
+
+def reps_to_failure(reps, rpe) -> np.ndarray:
+    """Reps plus reps in reserve (10 - RPE); reps alone where RPE is unknown"""
+    reps = np.asarray(reps, dtype=float)
+    rpe = np.clip(np.asarray(rpe, dtype=float), 5.0, 10.0)
+    return np.where(np.isnan(rpe), reps, reps + (10.0 - rpe))
+
+
+def estimate_1rm(weight, reps, rpe=None) -> np.ndarray:
+    """
+    Vectorized 1RM estimate per set. Reps are first extended by the reps
+    in reserve implied by RPE when it is known, then Brzycki is used up to
+    BRZYCKI_MAX_REPS and Epley above. NaN where weight or reps are missing.
+    """
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    rpe = np.full(weight.shape, np.nan) if rpe is None else np.asarray(rpe, dtype=float)
+
+    effective = reps_to_failure(reps, rpe)
+    estimate = np.where(
+        effective <= BRZYCKI_MAX_REPS,
+        brzycki_1rm(weight, effective),
+        epley_1rm(weight, effective)
+    )
+    valid = (weight > 0) & (reps > 0)
+    return np.where(valid, np.round(estimate, 1), np.nan)
+
+
+def load_factors(recovery_scores, policy: Optional[CompiledPolicy] = None) -> np.ndarray:
+    """Per-row load scale from the recommendation each recovery score maps to"""
+    scores = np.asarray(recovery_scores, dtype=float)
+    factors = np.ones(scores.shape)
+    known = ~np.isnan(scores)
+    if known.any():
+        policy = policy or get_active_policy()
+        recommendations = get_workout_recommendations(scores[known], policy)
+        factors[known] = [RECOMMENDATION_LOAD_FACTOR.get(value, 1.0) for value in recommendations]
+    return factors
+
+
+def suggest_next_load(
+    weight,
+    reps,
+    rpe,
+    recovery_scores,
+    policy: Optional[CompiledPolicy] = None
+) -> np.ndarray:
+    """
+    Load for the same rep count next session: the set's 1RM (sets without
+    RPE are taken as done at TARGET_RPE) inverted back to TARGET_RPE, plus
+    PROGRESSION_STEP, capped at MAX_PROGRESSION above the load lifted,
+    scaled by the recovery recommendation and rounded down to
+    LOAD_INCREMENT. NaN where weight or reps are missing.
+    """
+    weight = np.asarray(weight, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    rpe = np.asarray(rpe, dtype=float)
+
+    one_rep_max = estimate_1rm(weight, reps, np.where(np.isnan(rpe), TARGET_RPE, rpe))
+    effective = reps + (10.0 - TARGET_RPE)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        target = np.where(
+            effective <= BRZYCKI_MAX_REPS,
+            one_rep_max * (37.0 - effective) / 36.0,
+            one_rep_max / (1 + effective / 30.0)
+        )
+    target = np.minimum(target * (1 + PROGRESSION_STEP), weight * (1 + MAX_PROGRESSION))
+    target = target * load_factors(recovery_scores, policy)
+    return np.floor(np.round(target / LOAD_INCREMENT, 6)) * LOAD_INCREMENT
+
+
+def compute_load_targets(
+    columns: Dict[str, np.ndarray],
+    policy: Optional[CompiledPolicy] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (estimated_1rm, suggested_next_weight) for columns of weight_kg, reps,
+    rpe and recovery_score (NaN/None where unknown), in one pass.
+    """
+    weight = np.asarray(columns["weight_kg"], dtype=float)
+    reps = np.asarray(columns["reps"], dtype=float)
+    rpe = np.asarray(columns.get("rpe", np.full(weight.shape, np.nan)), dtype=float)
+    recovery = np.asarray(columns.get("recovery_score", np.full(weight.shape, np.nan)), dtype=float)
+
+    return estimate_1rm(weight, reps, rpe), suggest_next_load(weight, reps, rpe, recovery, policy)
@@ -1,4 +1,9 @@
-from typing import Dict, List
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from integration.load_engine import estimate_1rm
 
 
 def update_progression_history(
@@ -25,3 +30,78 @@ def get_best_lifts(history: List[Dict]) -> Dict[str, float]:
                 bests[name] = weight
 
     return bests
+
+
+def estimate_one_rep_max(
+    weight: Optional[float],
+    reps: Optional[int],
+    rpe: Optional[float] = None
+) -> Optional[float]:
+    """
+    1RM estimate from a single set, with the same formula as the stored
+    exercise_performance estimates (integration.load_engine.estimate_1rm).
+    """
+    if weight is None or not reps or weight <= 0 or reps <= 0:
+        return None
+    estimate = float(estimate_1rm(weight, reps, np.nan if rpe is None else rpe))
+    return None if np.isnan(estimate) else estimate
+
+
+def rep_max_key(weight: float) -> str:
+    """JSON key for a load in a rep-max table (100.0 -> "100", 102.5 -> "102.5")"""
+    return f"{weight:g}"
+
+
+def update_personal_record(
+    record: Optional[Dict],
+    sets: Iterable[Dict],
+    achieved_at: datetime
+) -> Tuple[Dict, List[str]]:
+    """
+    Fold one session's sets of an exercise into its personal-record entry.
+
+    `record` holds best_weight_kg (+ best_weight_reps, best_weight_at),
+    best_estimated_1rm (+ best_estimated_1rm_at) and rep_maxes, mapping a
+    load to {"reps", "achieved_at" (ISO string)}; None starts a new one. Sets need
+    weight_kg and reps; estimated_1rm is computed (with rpe, if given) when
+    missing. Returns the updated entry and which kinds improved
+    ("weight", "estimated_1rm", "rep_max"), so the cost is the session's
+    sets, never the history.
+    """
+    record = dict(record) if record else {
+        "best_weight_kg": None,
+        "best_weight_reps": None,
+        "best_weight_at": None,
+        "best_estimated_1rm": None,
+        "best_estimated_1rm_at": None,
+        "rep_maxes": {},
+    }
+    record["rep_maxes"] = dict(record.get("rep_maxes") or {})
+    improved: List[str] = []
+
+    for entry in sets:
+        weight, reps = entry.get("weight_kg"), entry.get("reps")
+        if weight is None or not reps or weight <= 0 or reps <= 0:
+            continue
+
+        best_weight = record["best_weight_kg"]
+        if best_weight is None or weight > best_weight or (
+            weight == best_weight and reps > (record["best_weight_reps"] or 0)
+        ):
+            record.update(best_weight_kg=weight, best_weight_reps=reps, best_weight_at=achieved_at)
+            improved.append("weight")
+
+        estimate = entry.get("estimated_1rm") or estimate_one_rep_max(weight, reps, entry.get("rpe"))
+        if estimate is not None and (
+            record["best_estimated_1rm"] is None or estimate > record["best_estimated_1rm"]
+        ):
+            record.update(best_estimated_1rm=estimate, best_estimated_1rm_at=achieved_at)
+            improved.append("estimated_1rm")
+
+        key = rep_max_key(weight)
+        previous = record["rep_maxes"].get(key)
+        if previous is None or reps > previous["reps"]:
+            record["rep_maxes"][key] = {"reps": reps, "achieved_at": achieved_at.isoformat()}
+            improved.append("rep_max")
+
+    return record, sorted(set(improved))
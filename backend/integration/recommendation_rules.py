@@ -1,7 +1,23 @@
-def get_workout_recommendation(recovery_score: float) -> str:
-    if recovery_score >= 8.0:
-        return "Heavy"
-    elif recovery_score >= 5.0:
-        return "Moderate"
-    else:
-        return "Light/Rest"
+from typing import Optional
+
+import numpy as np
+
+from integration.scoring_policy import CompiledPolicy, get_active_policy
+
+
+def get_workout_recommendation(
+    recovery_score: float,
+    policy: Optional[CompiledPolicy] = None
+) -> str:
+    # Cut-offs live in the scoring policy ("recommendation" ladder)
+    policy = policy or get_active_policy()
+    return policy.recommendation(recovery_score)
+
+
+def get_workout_recommendations(
+    recovery_scores,
+    policy: Optional[CompiledPolicy] = None
+) -> np.ndarray:
+    """Vectorized get_workout_recommendation over an array of scores."""
+    policy = policy or get_active_policy()
+    return policy.ladders["recommendation"].lookup(np.asarray(recovery_scores, dtype=float))
@@ -1,4 +1,9 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, Mapping, Any, Tuple
+
+import numpy as np
+
+from integration.recommendation_rules import get_workout_recommendations
+from integration.scoring_policy import CompiledPolicy, get_active_policy
 
 
 def _clamp(value: float, min_value: float, max_value: float) -> float:
@@ -8,29 +13,44 @@ def _clamp(value: float, min_value: float, max_value: float) -> float:
 
 def calculate_recovery_score(
     recovery_data: Dict,
-    wearable_data: Optional[Dict] = None
+    wearable_data: Optional[Dict] = None,
+    baseline: Optional[Dict] = None,
+    policy: Optional[CompiledPolicy] = None,
+    workload: Optional[Dict] = None
 ) -> float:
     """
     Calculate a 1–10 recovery score based on:
     - subjective inputs (sleep_quality, soreness_level, energy_level, stress_level)
     - optional wearable data (HRV, resting HR, sleep duration)
+    - optional personal baseline (see integration.baselines.scoring_baseline);
+      HRV / resting HR are then scored as z-scores against the user's own
+      norm instead of population thresholds
+    - optional training workload (integration.workload); a high acute:chronic
+      ratio lowers the score
+
+    Weights and thresholds come from the active scoring policy
+    (integration.scoring_policy) unless a compiled `policy` is passed in.
+    The policy's version is what gets stored as RecoveryLog.engine_version.
     """
+    policy = policy or get_active_policy()
     
-    sleep_quality = _clamp(float(recovery_data.get("sleep_quality", 5)), 1, 10)
-    soreness = _clamp(float(recovery_data.get("soreness_level", 5)), 1, 10)
-    energy = _clamp(float(recovery_data.get("energy_level", 5)), 1, 10)
-    stress = _clamp(float(recovery_data.get("stress_level", 5)), 1, 10)
+    # Clamps are written out (same as _clamp) as this runs on every check-in
+    sleep_quality = max(1, min(10, float(recovery_data.get("sleep_quality", 5))))
+    soreness = max(1, min(10, float(recovery_data.get("soreness_level", 5))))
+    energy = max(1, min(10, float(recovery_data.get("energy_level", 5))))
+    stress = max(1, min(10, float(recovery_data.get("stress_level", 5))))
 
     # Invert soreness and stress so that higher = better
     soreness_inverted = 11 - soreness
     stress_inverted = 11 - stress
 
     # Weights sum to 1.0
+    sleep_weight, soreness_weight, energy_weight, stress_weight = policy.weights
     base_score = (
-        0.30 * sleep_quality +
-        0.25 * soreness_inverted +
-        0.20 * energy +
-        0.15 * stress_inverted
+        sleep_weight * sleep_quality +
+        soreness_weight * soreness_inverted +
+        energy_weight * energy +
+        stress_weight * stress_inverted
     )
 
     #Sleep quantity modifier 
@@ -39,18 +59,7 @@ def calculate_recovery_score(
     else:
         sleep_hours = float(recovery_data.get("sleep_hours") or 0)
 
-    if sleep_hours <= 0:
-        sleep_factor = 1.0
-    elif sleep_hours < 5:
-        sleep_factor = 0.8
-    elif sleep_hours < 6:
-        sleep_factor = 0.9
-    elif sleep_hours <= 8.5:
-        sleep_factor = 1.0
-    else:
-        sleep_factor = 1.05
-
-    score = base_score * sleep_factor
+    score = base_score * policy.sleep_factor(sleep_hours)
 
     #Wearable contributions (HRV + resting HR)
     if wearable_data:
@@ -60,34 +69,158 @@ def calculate_recovery_score(
         if hrv is not None:
             try:
                 hrv = float(hrv)
-                if hrv >= 80:
-                    score += 0.7
-                elif hrv >= 60:
-                    score += 0.4
-                elif hrv >= 40:
-                    score += 0.2
-                elif hrv >= 20:
-                    score += 0.0
+                hrv_mean = baseline.get("hrv_baseline_mean") if baseline else None
+                if hrv_mean is not None:
+                    score += policy.hrv_z((hrv - hrv_mean) / baseline["hrv_baseline_std"])
                 else:
-                    score -= 0.3
+                    score += policy.hrv(hrv)
             except (TypeError, ValueError):
                 pass
 
         if rhr is not None:
             try:
                 rhr = float(rhr)
-                if rhr <= 50:
-                    score += 0.3
-                elif rhr <= 60:
-                    score += 0.15
-                elif rhr <= 70:
-                    score += 0.0
-                elif rhr <= 80:
-                    score -= 0.2
+                rhr_mean = baseline.get("rhr_baseline_mean") if baseline else None
+                if rhr_mean is not None:
+                    # Lower than usual resting HR is the good direction
+                    score += policy.resting_heart_rate_z((rhr - rhr_mean) / baseline["rhr_baseline_std"])
                 else:
-                    score -= 0.4
+                    score += policy.resting_heart_rate(rhr)
             except (TypeError, ValueError):
                 pass
 
-    score = _clamp(score, 1.0, 10.0)
+    if workload and workload.get("acwr") is not None:
+        score += policy.acwr(float(workload["acwr"]))
+
+    score = max(1.0, min(10.0, score))
     return round(score, 1)
+
+
+# Columns read by calculate_recovery_scores. Missing columns (or NaN / None
+# entries) behave exactly like a missing key in the scalar dicts.
+RECOVERY_COLUMNS = ("sleep_quality", "soreness_level", "energy_level", "stress_level", "sleep_hours")
+WEARABLE_COLUMNS = ("sleep_duration_minutes", "hrv_rmssd", "resting_heart_rate")
+BASELINE_COLUMNS = ("hrv_baseline_mean", "hrv_baseline_std", "rhr_baseline_mean", "rhr_baseline_std")
+WORKLOAD_COLUMNS = ("acwr",)
+
+
+def _column(columns: Mapping[str, Any], name: str, size: int) -> np.ndarray:
+    """Return a float64 column, with NaN for missing or non-numeric entries."""
+    if name not in columns:
+        return np.full(size, np.nan)
+
+    values = columns[name]
+    try:
+        return np.asarray(values, dtype=float).reshape(size)
+    except (TypeError, ValueError):
+        pass
+
+    out = np.empty(size)
+    for i, value in enumerate(values):
+        try:
+            out[i] = float(value)
+        except (TypeError, ValueError):
+            out[i] = np.nan
+    return out
+
+
+def _column_size(columns: Mapping[str, Any]) -> int:
+    for name in RECOVERY_COLUMNS + WEARABLE_COLUMNS + BASELINE_COLUMNS + WORKLOAD_COLUMNS:
+        if name in columns:
+            return len(columns[name])
+    return 0
+
+
+def _round_1(scores: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of round(x, 1).
+
+    np.round works on x * 10, which can land exactly on .5 when the real
+    value does not; those few ambiguous entries fall back to Python's
+    correctly-rounded round() so results stay identical to the scalar path.
+    """
+    rounded = np.round(scores, 1)
+    scaled = scores * 10
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(ambiguous):
+        rounded[i] = round(float(scores[i]), 1)
+    return rounded
+
+
+def calculate_recovery_scores(
+    columns: Mapping[str, Any],
+    policy: Optional[CompiledPolicy] = None
+) -> np.ndarray:
+    """
+    Vectorized calculate_recovery_score over columnar input.
+
+    `columns` is a pandas DataFrame or any mapping of column name to
+    array-like, holding the check-in fields (RECOVERY_COLUMNS) and, when
+    available, the wearable fields (WEARABLE_COLUMNS), personal baseline
+    fields (BASELINE_COLUMNS) and workload ratio (WORKLOAD_COLUMNS). Each row scores exactly as
+    calculate_recovery_score would for the same values and policy.
+    """
+    policy = policy or get_active_policy()
+    size = _column_size(columns)
+
+    def subjective(name: str) -> np.ndarray:
+        values = _column(columns, name, size)
+        return np.clip(np.where(np.isnan(values), 5.0, values), 1, 10)
+
+    sleep_quality = subjective("sleep_quality")
+    soreness = subjective("soreness_level")
+    energy = subjective("energy_level")
+    stress = subjective("stress_level")
+
+    sleep_weight, soreness_weight, energy_weight, stress_weight = policy.weights
+    base_score = (
+        sleep_weight * sleep_quality +
+        soreness_weight * (11 - soreness) +
+        energy_weight * energy +
+        stress_weight * (11 - stress)
+    )
+
+    # Wearable sleep duration wins whenever it is present and non-zero
+    sleep_minutes = _column(columns, "sleep_duration_minutes", size)
+    manual_hours = np.nan_to_num(_column(columns, "sleep_hours", size), nan=0.0)
+    has_minutes = ~np.isnan(sleep_minutes) & (sleep_minutes != 0)
+    sleep_hours = np.where(has_minutes, sleep_minutes / 60.0, manual_hours)
+
+    score = base_score * policy.ladders["sleep_factor"].lookup(sleep_hours)
+
+    hrv = _column(columns, "hrv_rmssd", size)
+    hrv_mean = _column(columns, "hrv_baseline_mean", size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hrv_z = (hrv - hrv_mean) / _column(columns, "hrv_baseline_std", size)
+    hrv_bonus = np.where(
+        np.isnan(hrv_mean),
+        policy.ladders["hrv"].lookup(hrv),
+        policy.ladders["hrv_z"].lookup(hrv_z),
+    )
+    score = score + np.where(np.isnan(hrv), 0.0, hrv_bonus)
+
+    rhr = _column(columns, "resting_heart_rate", size)
+    rhr_mean = _column(columns, "rhr_baseline_mean", size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rhr_z = (rhr - rhr_mean) / _column(columns, "rhr_baseline_std", size)
+    rhr_bonus = np.where(
+        np.isnan(rhr_mean),
+        policy.ladders["resting_heart_rate"].lookup(rhr),
+        policy.ladders["resting_heart_rate_z"].lookup(rhr_z),
+    )
+    score = score + np.where(np.isnan(rhr), 0.0, rhr_bonus)
+
+    acwr = _column(columns, "acwr", size)
+    score = score + np.where(np.isnan(acwr), 0.0, policy.ladders["acwr"].lookup(acwr))
+
+    return _round_1(np.clip(score, 1.0, 10.0))
+
+
+def evaluate_recovery_batch(
+    columns: Mapping[str, Any],
+    policy: Optional[CompiledPolicy] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score a batch and map it to workout recommendations in one pass."""
+    policy = policy or get_active_policy()
+    scores = calculate_recovery_scores(columns, policy)
+    return scores, get_workout_recommendations(scores, policy)
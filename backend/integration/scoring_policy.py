@@ -0,0 +1,246 @@
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_right
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Declarative form of the production scoring rules. Each ladder is a list of
+# [operator, threshold, value] rules checked in order (like an if/elif
+# chain), with "default" as the final else.
+DEFAULT_POLICY: Dict[str, Any] = {
+    # v2: HRV / resting HR scored against personal baselines when available
+    "version": "fenthon_production_v2",
+    "weights": {
+        "sleep_quality": 0.30,
+        "soreness": 0.25,
+        "energy": 0.20,
+        "stress": 0.15,
+    },
+    "sleep_factor": {
+        "rules": [["<=", 0, 1.0], ["<", 5, 0.8], ["<", 6, 0.9], ["<=", 8.5, 1.0]],
+        "default": 1.05,
+    },
+    "hrv": {
+        "rules": [[">=", 80, 0.7], [">=", 60, 0.4], [">=", 40, 0.2], [">=", 20, 0.0]],
+        "default": -0.3,
+    },
+    "resting_heart_rate": {
+        "rules": [["<=", 50, 0.3], ["<=", 60, 0.15], ["<=", 70, 0.0], ["<=", 80, -0.2]],
+        "default": -0.4,
+    },
+    "hrv_z": {
+        "rules": [[">=", 1.0, 0.7], [">=", 0.25, 0.4], [">=", -0.5, 0.2], [">=", -1.5, 0.0]],
+        "default": -0.3,
+    },
+    "resting_heart_rate_z": {
+        "rules": [["<=", -1.0, 0.3], ["<=", -0.25, 0.15], ["<=", 0.5, 0.0], ["<=", 1.5, -0.2]],
+        "default": -0.4,
+    },
+    "recommendation": {
+        "rules": [[">=", 8.0, "Heavy"], [">=", 5.0, "Moderate"]],
+        "default": "Light/Rest",
+    },
+    # Acute:chronic workload ratio; only applied when a workload is passed
+    "acwr": {
+        "rules": [[">", 1.5, -1.0], [">", 1.3, -0.5]],
+        "default": 0.0,
+    },
+}
+
+WEIGHTS = ("sleep_quality", "soreness", "energy", "stress")
+LADDERS = (
+    "sleep_factor",
+    "hrv",
+    "resting_heart_rate",
+    "hrv_z",
+    "resting_heart_rate_z",
+    "recommendation",
+    "acwr",
+)
+
+# How often get_active_policy() checks the policy file for changes
+RELOAD_INTERVAL_SECONDS = 5.0
+
+
+def _scalar_lookup(boundaries, values, default):
+    # Bound as defaults so a call does no global or attribute lookups
+    def lookup(x, _bisect=bisect_right, _boundaries=boundaries, _values=values, _default=default):
+        if x != x:
+            # NaN matches no rule, but bisect_right would put it in the top bin
+            return _default
+        return _values[_bisect(_boundaries, x)]
+    return lookup
+
+
+class Ladder:
+    """
+    A rule ladder compiled to sorted boundaries plus one value per bin.
+
+    Every rule is rewritten as "lower bin while x < boundary" (x <= t becomes
+    x < nextafter(t, inf)), so a lookup is a single bisect_right, or one
+    np.searchsorted for arrays, with exactly the if/elif semantics.
+    """
+
+    __slots__ = ("boundaries", "values", "default", "value_array", "scalar")
+
+    def __init__(self, spec: Dict[str, Any]):
+        rules = spec.get("rules") or []
+        if "default" not in spec:
+            raise ValueError("Ladder is missing a default value")
+
+        ops = {rule[0] for rule in rules}
+        if ops and ops <= {"<", "<="}:
+            # x < t0 -> v0, x < t1 -> v1, ..., else default
+            boundaries = [
+                math.nextafter(float(t), math.inf) if op == "<=" else float(t)
+                for op, t, _ in rules
+            ]
+            values = [v for _, _, v in rules] + [spec["default"]]
+        elif ops and ops <= {">", ">="}:
+            # x >= t0 -> v0, x >= t1 -> v1, ..., else default; bins run upwards
+            # from default to v0, so walk the rules in reverse
+            boundaries = [
+                math.nextafter(float(t), math.inf) if op == ">" else float(t)
+                for op, t, _ in reversed(rules)
+            ]
+            values = [spec["default"]] + [v for _, _, v in reversed(rules)]
+        elif not ops:
+            boundaries, values = [], [spec["default"]]
+        else:
+            raise ValueError(f"Ladder mixes upward and downward operators: {sorted(ops)}")
+
+        if any(a > b for a, b in zip(boundaries, boundaries[1:])):
+            raise ValueError("Ladder thresholds are not monotonic")
+
+        self.boundaries = boundaries
+        self.values = values
+        self.default = spec["default"]
+        self.value_array = np.array(values, dtype=object if isinstance(values[0], str) else float)
+        self.scalar = _scalar_lookup(tuple(boundaries), tuple(values), self.default)
+
+    def __call__(self, x: float):
+        return self.scalar(x)
+
+    def lookup(self, x: np.ndarray) -> np.ndarray:
+        """Vectorized lookup; NaN gets the default, like the scalar path."""
+        x = np.asarray(x, dtype=float)
+        result = self.value_array[np.searchsorted(self.boundaries, x, side="right")]
+        missing = np.isnan(x)
+        if missing.any():
+            result[missing] = self.default
+        return result
+
+
+class CompiledPolicy:
+    """Immutable, ready-to-evaluate form of a scoring policy"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        if not spec.get("version"):
+            raise ValueError("Scoring policy needs a version tag")
+
+        weights = spec.get("weights") or {}
+        missing = [name for name in WEIGHTS if name not in weights]
+        if missing:
+            raise ValueError(f"Scoring policy is missing weights: {missing}")
+
+        self.version: str = str(spec["version"])
+        self.spec = spec
+        # (sleep_quality, soreness, energy, stress), in WEIGHTS order
+        self.weights = tuple(float(weights[name]) for name in WEIGHTS)
+
+        self.ladders: Dict[str, Ladder] = {name: Ladder(spec[name]) for name in LADDERS}
+
+        # Scalar evaluators, exposed directly for the per-request hot path
+        self.sleep_factor = self.ladders["sleep_factor"].scalar
+        self.hrv = self.ladders["hrv"].scalar
+        self.resting_heart_rate = self.ladders["resting_heart_rate"].scalar
+        self.hrv_z = self.ladders["hrv_z"].scalar
+        self.resting_heart_rate_z = self.ladders["resting_heart_rate_z"].scalar
+        self.recommendation = self.ladders["recommendation"].scalar
+        self.acwr = self.ladders["acwr"].scalar
+
+
+def compile_policy(spec: Dict[str, Any]) -> CompiledPolicy:
+    """Validate a policy, filling any omitted ladders from DEFAULT_POLICY"""
+    merged = dict(DEFAULT_POLICY)
+    merged.update(spec)
+    return CompiledPolicy(merged)
+
+
+class PolicyStore:
+    """
+    Holds the active compiled policy. Swapping is a single reference
+    assignment, so a request that already fetched a policy keeps using it
+    while new requests see the new one. An optional JSON file is polled
+    (at most every RELOAD_INTERVAL_SECONDS) so edits reach every worker
+    without a restart.
+    """
+
+    def __init__(self, policy: CompiledPolicy):
+        self._policy = policy
+        self._path: Optional[str] = None
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.last_error: Optional[str] = None
+
+    def get(self) -> CompiledPolicy:
+        if self._path is not None and time.monotonic() >= self._next_check:
+            self._reload_if_changed()
+        return self._policy
+
+    def set(self, policy: CompiledPolicy) -> None:
+        self._policy = policy
+
+    def watch(self, path: Optional[str]) -> None:
+        """Load policies from `path` (None or "" stops watching)"""
+        with self._lock:
+            self._path = path or None
+            self._mtime = None
+            self._next_check = 0.0
+        if self._path is not None:
+            self._reload_if_changed()
+
+    def _reload_if_changed(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already checking
+        try:
+            self._next_check = time.monotonic() + RELOAD_INTERVAL_SECONDS
+            mtime = os.path.getmtime(self._path)
+            if mtime == self._mtime:
+                return
+            with open(self._path) as f:
+                self._policy = compile_policy(json.load(f))
+            self._mtime = mtime
+            self.last_error = None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the last good policy
+            self.last_error = str(e)
+        finally:
+            self._lock.release()
+
+
+_store = PolicyStore(compile_policy(DEFAULT_POLICY))
+
+
+def get_active_policy() -> CompiledPolicy:
+    return _store.get()
+
+
+def set_active_policy(spec: Dict[str, Any]) -> CompiledPolicy:
+    """Compile `spec` and make it the active policy for this process"""
+    policy = compile_policy(spec)
+    _store.set(policy)
+    return policy
+
+
+def watch_policy_file(path: Optional[str]) -> None:
+    _store.watch(path)
+
+
+def policy_status() -> Dict[str, Optional[str]]:
+    return {"version": get_active_policy().version, "last_error": _store.last_error}
@@ -0,0 +1,31 @@
+"""Tests for the running HRV / resting HR baselines."""
+import statistics
+
+from integration.baselines import MIN_BASELINE_SAMPLES, MIN_RHR_STD, scoring_baseline, update_ewma
+from integration.recovery_engine import calculate_recovery_score
+
+
+def test_early_samples_fold_to_the_plain_mean_and_variance():
+    samples = [52.0, 61.0, 47.0, 58.0, 55.0]
+    mean = variance = None
+    count = 0
+    for value in samples:
+        mean, variance, count = update_ewma(mean, variance, count, value)
+
+    assert count == len(samples)
+    assert round(mean, 9) == round(statistics.fmean(samples), 9)
+    assert round(variance, 9) == round(statistics.pvariance(samples), 9)
+
+
+def test_baseline_is_only_trusted_after_a_week_and_changes_the_score():
+    assert scoring_baseline(40.0, 25.0, MIN_BASELINE_SAMPLES - 1, 60.0, 0.0, 30)["hrv_baseline_mean"] is None
+
+    baseline = scoring_baseline(40.0, 25.0, MIN_BASELINE_SAMPLES, 60.0, 0.0, 30)
+    assert (baseline["hrv_baseline_mean"], baseline["hrv_baseline_std"]) == (40.0, 5.0)
+    assert baseline["rhr_baseline_std"] == MIN_RHR_STD
+
+    # 48 ms is unremarkable on population thresholds but well above this
+    # user's norm
+    checkin = {"sleep_quality": 6, "soreness_level": 5, "energy_level": 6, "stress_level": 5}
+    wearable = {"hrv_rmssd": 48.0, "resting_heart_rate": 60}
+    assert calculate_recovery_score(checkin, wearable, baseline) > calculate_recovery_score(checkin, wearable)
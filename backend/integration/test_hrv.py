@@ -0,0 +1,17 @@
+"""Tests for server-side HRV metrics and RR-interval packing."""
+from integration.hrv import compute_hrv_metrics, pack_rr_intervals, unpack_rr_intervals
+
+
+def test_hrv_metrics_skip_artifacts():
+    rr = [800, 820, 810, 2500, 805, 815, 800, 810, 380, 820, 805]
+    metrics = compute_hrv_metrics(rr)
+    assert metrics["artifact_count"] == 2
+
+    # Successive differences only between adjacent clean beats
+    diffs = [20, -10, 10, -15, 10, -15]
+    assert metrics["rmssd"] == round((sum(d * d for d in diffs) / len(diffs)) ** 0.5, 2)
+    assert metrics["pnn50"] == 0.0
+
+    encoding, data = pack_rr_intervals(rr)
+    assert encoding == "int16_ms" and len(data) == 2 * len(rr)
+    assert unpack_rr_intervals(encoding, data).tolist() == rr
@@ -0,0 +1,24 @@
+"""Tests for 1RM estimates and recovery-adjusted load targets."""
+import math
+
+from integration.load_engine import brzycki_1rm, compute_load_targets, epley_1rm
+
+
+def test_load_engine_scales_suggestions_with_recovery():
+    estimated, suggested = compute_load_targets({
+        "weight_kg": [100.0, 100.0, 60.0, None, 100.0],
+        "reps": [5, 5, 15, 5, 5],
+        "rpe": [None, 8, None, None, 8],
+        "recovery_score": [None, 9.0, None, 9.0, 3.0],
+    })
+
+    assert estimated[0] == round(float(brzycki_1rm(100.0, 5)), 1)
+    # RPE 8 leaves two reps in reserve: estimated as a 7-rep max
+    assert estimated[1] == round(float(brzycki_1rm(100.0, 7)), 1)
+    # Past 10 reps Epley takes over
+    assert estimated[2] == round(float(epley_1rm(60.0, 15)), 1)
+    assert math.isnan(estimated[3]) and math.isnan(suggested[3])
+
+    # On target: one small step up; a Light/Rest day scales the same set down
+    assert suggested[1] == 102.5
+    assert suggested[4] < 100.0
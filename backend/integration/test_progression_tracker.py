@@ -0,0 +1,34 @@
+"""Tests for the incremental personal-record fold."""
+from datetime import datetime, timedelta
+
+from integration.load_engine import estimate_1rm
+from integration.progression_tracker import estimate_one_rep_max, update_personal_record
+
+
+def test_personal_records_fold_one_session_at_a_time():
+    day1 = datetime(2026, 5, 1)
+    record, improved = update_personal_record(None, [
+        {"weight_kg": 100.0, "reps": 5},
+        {"weight_kg": 90.0, "reps": 7},
+    ], day1)
+    assert improved == ["estimated_1rm", "rep_max", "weight"]
+    assert (record["best_weight_kg"], record["best_weight_reps"]) == (100.0, 5)
+
+    # Lighter, more reps: a new rep max at 90 only
+    record, improved = update_personal_record(record, [{"weight_kg": 90.0, "reps": 8}], day1 + timedelta(days=2))
+    assert improved == ["rep_max"]
+    assert record["rep_maxes"]["90"]["reps"] == 8
+    assert record["best_weight_at"] == day1
+
+    record, improved = update_personal_record(record, [{"weight_kg": 80.0, "reps": 5}], day1 + timedelta(days=4))
+    assert improved == ["rep_max"] and record["rep_maxes"]["80"]["reps"] == 5
+
+
+def test_personal_record_fallback_uses_the_load_engine_1rm():
+    # Sets without a stored estimate get the same one exercise_performance stores
+    record, _ = update_personal_record(None, [{"weight_kg": 100.0, "reps": 5, "rpe": 8}], datetime(2026, 5, 1))
+    expected = estimate_1rm(100.0, 5, 8)
+    assert record["best_estimated_1rm"] == float(expected)
+    assert estimate_one_rep_max(100.0, 5) == float(estimate_1rm(100.0, 5))
+    assert estimate_one_rep_max(100.0, 1) == 100.0
+    assert estimate_one_rep_max(None, 5) is None
@@ -0,0 +1,26 @@
+"""Tests for the scalar and vectorized recovery scoring engines."""
+from integration.recovery_engine import calculate_recovery_score, evaluate_recovery_batch
+from integration.recommendation_rules import get_workout_recommendation
+
+
+def test_batch_scoring_matches_scalar_engine():
+    rows = [
+        ({"sleep_quality": 8, "soreness_level": 2, "energy_level": 9, "stress_level": 3, "sleep_hours": 7.5}, None),
+        ({"sleep_quality": 3, "soreness_level": 9, "energy_level": 2, "stress_level": 8, "sleep_hours": 4.0},
+         {"hrv_rmssd": 15, "resting_heart_rate": 85, "sleep_duration_minutes": 250}),
+        ({"sleep_quality": 6, "soreness_level": 5, "energy_level": 6, "stress_level": 4, "sleep_hours": None},
+         {"hrv_rmssd": 72.5, "resting_heart_rate": 48, "sleep_duration_minutes": None}),
+        ({"sleep_quality": 10, "soreness_level": 1, "energy_level": 10, "stress_level": 1, "sleep_hours": 9.0},
+         {"hrv_rmssd": 95, "resting_heart_rate": 45, "sleep_duration_minutes": 0}),
+    ]
+    columns = {}
+    for name in ["sleep_quality", "soreness_level", "energy_level", "stress_level", "sleep_hours"]:
+        columns[name] = [r[name] for r, _ in rows]
+    for name in ["hrv_rmssd", "resting_heart_rate", "sleep_duration_minutes"]:
+        columns[name] = [(w or {}).get(name) for _, w in rows]
+
+    scores, recommendations = evaluate_recovery_batch(columns)
+
+    expected = [calculate_recovery_score(r, w) for r, w in rows]
+    assert list(scores) == expected
+    assert list(recommendations) == [get_workout_recommendation(s) for s in expected]
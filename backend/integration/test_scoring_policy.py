@@ -0,0 +1,78 @@
+"""Tests for compiled scoring policies and hot reload."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from integration import scoring_policy
+from integration.scoring_policy import DEFAULT_POLICY, LADDERS, Ladder, PolicyStore, compile_policy
+
+
+def test_ladders_keep_if_elif_semantics():
+    sleep_factor = Ladder(DEFAULT_POLICY["sleep_factor"])
+    hours = [-1.0, 0.0, 4.99, 5.0, 5.5, 6.0, 8.5, 8.51, 12.0]
+    expected = [1.0, 1.0, 0.8, 0.9, 0.9, 1.0, 1.0, 1.05, 1.05]
+    assert [sleep_factor(h) for h in hours] == expected
+    assert list(sleep_factor.lookup(np.array(hours))) == expected
+
+    hrv = Ladder(DEFAULT_POLICY["hrv"])
+    assert [hrv(value) for value in (10, 20, 39.9, 40, 80, 120)] == [-0.3, 0.0, 0.0, 0.2, 0.7, 0.7]
+
+    acwr = Ladder(DEFAULT_POLICY["acwr"])
+    assert [acwr(ratio) for ratio in (1.0, 1.3, 1.31, 1.5, 1.51)] == [0.0, 0.0, -0.5, -0.5, -1.0]
+
+    recommendation = Ladder(DEFAULT_POLICY["recommendation"])
+    assert list(recommendation.lookup(np.array([9.0, 5.0, 4.9]))) == ["Heavy", "Moderate", "Light/Rest"]
+
+
+@pytest.mark.parametrize("name", LADDERS)
+def test_scalar_and_vector_lookups_agree_including_nan(name):
+    ladder = Ladder(DEFAULT_POLICY[name])
+    values = [float("nan"), -1.0, 0.0, 1.3, 2.0, 4.5, 5.0, 8.5, 20.0, 40.0, 60.0, 95.0, float("inf"), float("-inf")]
+    assert list(ladder.lookup(np.array(values))) == [ladder(value) for value in values]
+    assert ladder(float("nan")) == DEFAULT_POLICY[name]["default"]
+
+
+@pytest.mark.parametrize("spec", [
+    {"rules": [["<", 5, 1.0]]},
+    {"rules": [["<", 5, 1.0], [">", 8, 2.0]], "default": 0.0},
+    {"rules": [["<", 8, 1.0], ["<", 5, 2.0]], "default": 0.0},
+])
+def test_malformed_ladders_are_rejected(spec):
+    with pytest.raises(ValueError):
+        Ladder(spec)
+
+
+def test_policies_need_a_version_and_every_weight():
+    with pytest.raises(ValueError):
+        compile_policy({"version": ""})
+    with pytest.raises(ValueError):
+        compile_policy({"weights": {"sleep_quality": 1.0}})
+
+    # Omitted ladders come from the default policy
+    policy = compile_policy({"version": "custom", "hrv": {"rules": [[">=", 50, 1.0]], "default": 0.0}})
+    assert (policy.version, policy.hrv(60), policy.resting_heart_rate(45)) == ("custom", 1.0, 0.3)
+
+
+def test_store_reloads_edits_and_keeps_the_last_good_policy(tmp_path, monkeypatch):
+    monkeypatch.setattr(scoring_policy, "RELOAD_INTERVAL_SECONDS", 0.0)
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({"version": "first"}))
+
+    store = PolicyStore(compile_policy(DEFAULT_POLICY))
+    store.watch(str(path))
+    assert store.get().version == "first"
+
+    path.write_text(json.dumps({"version": "second"}))
+    os.utime(path, (1, 1))
+    assert store.get().version == "second"
+
+    # A broken edit is reported and the previous policy stays active
+    path.write_text("{not json")
+    os.utime(path, (2, 2))
+    assert store.get().version == "second"
+    assert store.last_error
+
+    store.watch(None)
+    assert store.get().version == "second"
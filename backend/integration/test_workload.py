@@ -0,0 +1,37 @@
+"""Tests for the incremental acute:chronic workload state."""
+from datetime import date, timedelta
+
+from integration.recovery_engine import calculate_recovery_score, calculate_recovery_scores
+from integration.workload import ACUTE_ALPHA, CHRONIC_ALPHA, add_session_load, workload_snapshot
+
+
+def test_workload_state_matches_daily_ewma():
+    start = date(2026, 1, 1)
+    loads = {0: 5000.0, 2: 6000.0, 3: 1000.0, 9: 8000.0}
+    state = None
+    for offset, load in loads.items():
+        state = add_session_load(state, start + timedelta(days=offset), load)
+    # A second session on a past day, logged late
+    state = add_session_load(state, start + timedelta(days=2), 500.0)
+    loads[2] += 500.0
+
+    # Reference: fold every calendar day, rest days included
+    today = start + timedelta(days=12)
+    acute = chronic = 0.0
+    for offset in range(13):
+        load = loads.get(offset, 0.0)
+        acute = (1 - ACUTE_ALPHA) * acute + ACUTE_ALPHA * load
+        chronic = (1 - CHRONIC_ALPHA) * chronic + CHRONIC_ALPHA * load
+
+    snapshot = workload_snapshot(state, today)
+    assert snapshot["acute_load"] == round(acute, 1)
+    assert snapshot["chronic_load"] == round(chronic, 1)
+    assert snapshot["weekly_load"] == 8000.0
+    assert snapshot["risk"] == "insufficient_history"
+
+    # A workload ratio scores the same through the scalar and batch engines
+    checkin = {"sleep_quality": 8, "soreness_level": 2, "energy_level": 8, "stress_level": 3}
+    scalar = [calculate_recovery_score(checkin, workload={"acwr": acwr}) for acwr in (1.0, 1.4, 1.8)]
+    batch = calculate_recovery_scores({**{k: [v] * 3 for k, v in checkin.items()}, "acwr": [1.0, 1.4, 1.8]})
+    assert list(batch) == scalar
+    assert scalar[0] > scalar[1] > scalar[2]
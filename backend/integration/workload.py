@@ -0,0 +1,125 @@
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+
+# Exponentially weighted acute (~1 week) and chronic (~4 week) load,
+# alpha = 2 / (span + 1), with every day folded in (rest days as 0)
+ACUTE_SPAN_DAYS = 7
+CHRONIC_SPAN_DAYS = 28
+ACUTE_ALPHA = 2.0 / (ACUTE_SPAN_DAYS + 1)
+CHRONIC_ALPHA = 2.0 / (CHRONIC_SPAN_DAYS + 1)
+
+# Daily loads kept for monotony / strain (Foster): the last week
+MONOTONY_WINDOW_DAYS = 7
+
+# The chronic load needs about its span of history before the ratio means much
+MIN_HISTORY_DAYS = CHRONIC_SPAN_DAYS
+
+# Acute:chronic ratio bands, checked upwards
+UNDERTRAINING_BELOW = 0.8
+OPTIMAL_UP_TO = 1.3
+ELEVATED_UP_TO = 1.5
+
+
+def empty_workload() -> Dict:
+    return {
+        "acute_load": 0.0,
+        "chronic_load": 0.0,
+        "daily_loads": [0.0] * MONOTONY_WINDOW_DAYS,
+        "last_load_date": None,
+        "first_load_date": None,
+        "session_count": 0,
+    }
+
+
+def _shift(daily_loads, days: int):
+    """Move the window `days` days forward; index 0 is the newest day"""
+    if days <= 0:
+        return list(daily_loads)
+    days = min(days, MONOTONY_WINDOW_DAYS)
+    return [0.0] * days + list(daily_loads)[:MONOTONY_WINDOW_DAYS - days]
+
+
+def add_session_load(state: Optional[Dict], day: date, load: float) -> Dict:
+    """
+    Fold one session's load on `day` into the workload state in O(1).
+
+    The EWMAs are linear in the daily loads, so moving forward decays the
+    state by (1 - alpha) per elapsed day and adds alpha * load, another
+    session on the same day simply adds alpha * load, and a back-dated
+    session adds its exact contribution alpha * (1 - alpha)^age * load.
+    """
+    state = dict(state) if state else empty_workload()
+    load = float(load or 0.0)
+    last = state["last_load_date"]
+
+    if last is None or day >= last:
+        elapsed = (day - last).days if last is not None else 0
+        state["acute_load"] = state["acute_load"] * (1 - ACUTE_ALPHA) ** elapsed + ACUTE_ALPHA * load
+        state["chronic_load"] = state["chronic_load"] * (1 - CHRONIC_ALPHA) ** elapsed + CHRONIC_ALPHA * load
+        daily_loads = _shift(state["daily_loads"], elapsed)
+        daily_loads[0] += load
+        state["last_load_date"] = day
+    else:
+        age = (last - day).days
+        state["acute_load"] += ACUTE_ALPHA * (1 - ACUTE_ALPHA) ** age * load
+        state["chronic_load"] += CHRONIC_ALPHA * (1 - CHRONIC_ALPHA) ** age * load
+        daily_loads = list(state["daily_loads"])
+        if age < MONOTONY_WINDOW_DAYS:
+            daily_loads[age] += load
+
+    state["daily_loads"] = daily_loads
+    first = state["first_load_date"]
+    state["first_load_date"] = day if first is None or day < first else first
+    state["session_count"] = (state["session_count"] or 0) + 1
+    return state
+
+
+def acwr_risk(acwr: Optional[float], history_days: int) -> Optional[str]:
+    if acwr is None:
+        return None
+    if history_days < MIN_HISTORY_DAYS:
+        return "insufficient_history"
+    if acwr < UNDERTRAINING_BELOW:
+        return "undertraining"
+    if acwr <= OPTIMAL_UP_TO:
+        return "optimal"
+    if acwr <= ELEVATED_UP_TO:
+        return "elevated"
+    return "high"
+
+
+def workload_snapshot(state: Optional[Dict], today: date) -> Dict[str, Optional[float]]:
+    """
+    Acute/chronic load, their ratio, and last-7-day monotony and strain as
+    of `today`, decaying the state over the rest days since the last
+    session. Constant cost however long the user's history is.
+    """
+    state = state or empty_workload()
+    last = state["last_load_date"]
+    elapsed = max((today - last).days, 0) if last is not None else 0
+
+    acute = state["acute_load"] * (1 - ACUTE_ALPHA) ** elapsed
+    chronic = state["chronic_load"] * (1 - CHRONIC_ALPHA) ** elapsed
+    acwr = round(acute / chronic, 2) if chronic > 0 else None
+
+    daily_loads = np.asarray(_shift(state["daily_loads"], elapsed), dtype=float)
+    weekly_load = float(daily_loads.sum())
+    spread = float(daily_loads.std())
+    monotony = round(float(daily_loads.mean()) / spread, 2) if spread > 0 else None
+
+    first = state["first_load_date"]
+    history_days = (today - first).days + 1 if first is not None else 0
+
+    return {
+        "acute_load": round(acute, 1),
+        "chronic_load": round(chronic, 1),
+        "acwr": acwr,
+        "risk": acwr_risk(acwr, history_days),
+        "weekly_load": round(weekly_load, 1),
+        "monotony": monotony,
+        "strain": round(weekly_load * monotony, 1) if monotony is not None else None,
+        "history_days": history_days,
+        "session_count": state["session_count"] or 0,
+    }
@@ -2,16 +2,27 @@
 Equilibria Backend - Main Application Entry Point
 Author: Dwain Nicholson
 """
-from fastapi import FastAPI, Request
+import math
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import structlog
 from contextlib import asynccontextmanager
 
-from app.api.routes import auth, recovery, wearables, workouts, users
+from app.api.routes import auth, recovery, evaluate, wearables, workouts, users
 from app.core.config import settings
-from app.db.session import engine
+from app.core.security import get_current_admin_user
+from app.db.session import SessionLocal, engine
 from app.db.base import Base
+from app.db.models import User
+from app.db.instrumentation import QueryStatsMiddleware, query_metrics
+from app.services.health_import import reap_stalled_import_jobs
+from app.services.ingest_queue import InProcessDrainer, InProcessIngestQueue, get_ingest_queue
+from app.services.password_pool import shutdown_password_pool
+from integration.scoring_policy import watch_policy_file, get_active_policy
 
 # Initialize structured logging
 logger = structlog.get_logger()
@@ -33,8 +44,28 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("Migration failed", error=str(e))
     
+    # Imports that were running in a worker that has since died
+    try:
+        with SessionLocal() as db:
+            reap_stalled_import_jobs(db)
+    except Exception as e:
+        logger.error("Import job reaper failed", error=str(e))
+    
+    watch_policy_file(settings.SCORING_POLICY_PATH)
+    logger.info("Scoring policy loaded", version=get_active_policy().version)
+    
+    # The in-process ingest queue is drained by this process
+    drainer = None
+    ingest_queue = get_ingest_queue()
+    if isinstance(ingest_queue, InProcessIngestQueue):
+        drainer = InProcessDrainer(ingest_queue)
+        drainer.start()
+    
     yield
     # Shutdown
+    if drainer:
+        drainer.stop()
+    shutdown_password_pool()
     logger.info("Shutting down Equilibria API")
 
 
@@ -54,8 +85,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query count and DB time (logs, N+1 warnings, X-DB-* headers if enabled)
+app.add_middleware(QueryStatsMiddleware)
+
 
 # Global Exception Handler
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    # Errors echo the rejected input, and strict JSON cannot encode inf/NaN
+    return JSONResponse(
+        status_code=422,
+        content={"detail": jsonable_encoder(
+            exc.errors(), custom_encoder={float: lambda v: v if math.isfinite(v) else str(v)}
+        )}
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error("Unhandled exception", exc_info=exc, path=request.url.path)
@@ -75,10 +120,19 @@ async def health_check():
     }
 
 
+@app.get("/health/sql")
+async def sql_health(current_user: User = Depends(get_current_admin_user)):
+    """Query counts, DB time, slow queries and N+1 requests seen by this worker"""
+    return query_metrics()
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(recovery.router, prefix="/api/v1/recovery", tags=["Recovery"])
+app.include_router(evaluate.router, prefix="/api/v1/recovery", tags=["Recovery"])
+# Unversioned path used by the admin dashboard
+app.include_router(evaluate.router, prefix="/recovery", tags=["Recovery"])
 app.include_router(wearables.router, prefix="/api/v1/wearables", tags=["Wearables"])
 app.include_router(workouts.router, prefix="/api/v1/workouts", tags=["Workouts"])
 